@@ -10,6 +10,30 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 240
+    TOKEN_CACHE_SIZE: int = 10000  # Verified tokens kept in memory (0 disables)
+
+    # Password hashing (bcrypt). Existing hashes are upgraded on login when BCRYPT_ROUNDS changes.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 64
+
+    # Login rate limiting. "memory" is per process; "mongo" is shared by all replicas.
+    LOGIN_RATE_LIMIT_BACKEND: str = "memory"
+    LOGIN_USER_BUCKET_SIZE: int = 5
+    LOGIN_USER_REFILL_PER_MINUTE: float = 5.0
+    # Off by default: behind the router every request comes from its IP unless TRUSTED_PROXIES covers it
+    LOGIN_IP_RATE_LIMIT_ENABLED: bool = False
+    LOGIN_IP_BUCKET_SIZE: int = 30
+    LOGIN_IP_REFILL_PER_MINUTE: float = 30.0
+    LOGIN_LOCKOUT_THRESHOLD: int = 10  # Failed attempts per username within the window
+    LOGIN_LOCKOUT_WINDOW_SECONDS: int = 900
+    LOGIN_LOCKOUT_SECONDS: int = 900
+    # Proxies (IPs / CIDRs) whose X-Forwarded-For is trusted for the client IP; match uvicorn's --forwarded-allow-ips
+    TRUSTED_PROXIES: list[str] = []
+    UNKNOWN_USERS_CACHE_SIZE: int = 10000
+    UNKNOWN_USERS_CACHE_SECONDS: float = 300.0
+    ADFS_GROUPS_CACHE_SIZE: int = 10000
+    ADFS_GROUPS_CACHE_SECONDS: float = 300.0
 
     # Auth
     USERNAME: str = 'admin'
@@ -29,6 +53,50 @@ class Settings(BaseSettings):
     S3_REGION: str = "us-east-1"
     S3_ACCESS_KEY: str = ""
     S3_SECRET_KEY: str = ""
+    S3_ENDPOINT_URL: str = ""  # S3-compatible stand-in (MinIO, moto server); empty = AWS
+    S3_MULTIPART_THRESHOLD_MB: int = 8
+    S3_MULTIPART_CHUNK_MB: int = 8
+    S3_MAX_CONCURRENCY: int = 4
+    STORAGE_STREAM_CHUNK_SIZE: int = 256 * 1024  # Bytes per chunk when streaming downloads
+    STORAGE_CLEANUP_RETRY_SECONDS: int = 60  # Retry interval for failed background file deletes
+    STORAGE_CLEANUP_MAX_ATTEMPTS: int = 5
+    PROCUREMENT_STATS_CACHE_SECONDS: int = 300  # Also invalidated on every order change
+    BLOB_GC_GRACE_SECONDS: int = 3600  # Blobs/objects younger than this are left alone by the GC
+    RECONCILIATION_INTERVAL_SECONDS: int = 300  # Inventory/procurement reconciliation job; 0 disables it
+    RECONCILIATION_FULL_REBUILD_SECONDS: int = 24 * 3600
+    RECONCILIATION_CACHE_SECONDS: int = 60  # Also cleared after every run
+
+    # Query profiling (app/db/instrumentation.py). Operation metrics are recorded either way.
+    QUERY_PROFILING_ENABLED: bool = True
+    SLOW_QUERY_MS: float = 100.0  # Operations at least this slow are logged and may be explained
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS: float = 600.0  # Per shape
+    SLOW_QUERY_MAX_SHAPES: int = 500
+
+    # Metrics (/metrics, needs prometheus_client). Scrapers send "Authorization: Bearer <METRICS_TOKEN>";
+    # the endpoint answers 404 while the token is unset, since the app is reachable through the public route.
+    METRICS_TOKEN: str = ""
+    METRICS_LOOP_LAG_INTERVAL_SECONDS: float = 1.0  # 0 disables the event loop lag probe
+
+    # Blocking call detection (app/core/loop_diagnostics.py); adds overhead to every callback
+    LOOP_DIAGNOSTICS_ENABLED: bool = False
+    LOOP_BLOCK_THRESHOLD_MS: float = 100.0
+    LOOP_DIAGNOSTICS_MAX_SITES: int = 200
+
+    # Analytics
+    ACTIVITY_ROLLUP_FLUSH_SECONDS: float = 30.0
+
+    # Change streams (cross-replica cache invalidation)
+    CHANGE_STREAMS_ENABLED: bool = True
+    # Stable, unique name of this replica (e.g. a StatefulSet pod name). Resume tokens are only persisted
+    # when it is set; otherwise a restarted replica starts from "now" (its caches start empty anyway).
+    CHANGE_STREAM_CONSUMER: str = ""
+    CHANGE_STREAM_TOKEN_TTL_SECONDS: int = 7 * 24 * 3600  # Tokens of consumers that went away
+    CHANGE_STREAM_POLL_SECONDS: float = 5.0
+
+    # Live items feed (SSE)
+    ITEM_EVENTS_QUEUE_SIZE: int = 500
+    ITEM_EVENTS_HEARTBEAT_SECONDS: float = 15.0
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,96 @@
+"""
+Small in-process caches.
+"""
+from typing import Any, Hashable, Optional
+from collections import OrderedDict
+import time
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with optional per-entry expiry.
+
+    Expiry times are wall-clock epoch seconds (time.time()), so they can be
+    taken directly from JWT 'exp' claims. maxsize=0 disables the cache.
+    Not thread-safe - meant for use from the event loop.
+    """
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, expires_at: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        if expires_at is None and self.ttl is not None:
+            expires_at = time.time() + self.ttl
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, None)
+        return entry[0] if entry is not None else default
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class ExpiringSet:
+    """
+    Set whose members are dropped only once they expire - never to make room.
+
+    Expired members are pruned whenever the set has doubled since the last prune.
+    Not thread-safe - meant for use from the event loop.
+    """
+
+    def __init__(self):
+        self._data: dict[Hashable, float] = {}
+        self._prune_at = 1024
+
+    def add(self, key: Hashable, expires_at: float) -> None:
+        self._data[key] = max(expires_at, self._data.get(key, expires_at))
+        if len(self._data) >= self._prune_at:
+            self.prune()
+            self._prune_at = max(1024, 2 * len(self._data))
+
+    def prune(self) -> None:
+        now = time.time()
+        self._data = {key: expires_at for key, expires_at in self._data.items() if expires_at > now}
+
+    def __contains__(self, key: Hashable) -> bool:
+        expires_at = self._data.get(key)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            del self._data[key]
+            return False
+        return True
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+_MISSING = object()
@@ -0,0 +1,23 @@
+"""
+Response compression.
+"""
+from typing import Iterable
+import re
+
+from fastapi.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+
+class SelectiveGZipMiddleware:
+    """GZipMiddleware that passes responses for the excluded paths through untouched."""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Iterable[str] = (), **gzip_options):
+        self.app = app
+        self.gzip = GZipMiddleware(app, **gzip_options)
+        self.exclude_paths = [re.compile(pattern) for pattern in exclude_paths]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and any(pattern.fullmatch(scope["path"]) for pattern in self.exclude_paths):
+            await self.app(scope, receive, send)
+            return
+        await self.gzip(scope, receive, send)
@@ -0,0 +1,86 @@
+"""
+In-process publish/subscribe for data change events.
+
+Events are produced by the change-stream listener (app/db/change_streams.py)
+for writes made by ANY backend replica, so subscribers can keep local caches
+coherent without querying on every request.
+"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+from datetime import datetime
+from enum import Enum
+import asyncio
+import logging
+
+from pydantic import BaseModel, Field
+
+logger = logging.getLogger(__name__)
+
+
+class ChangeOperation(str, Enum):
+    """Type of change observed on a collection."""
+    INSERT = "insert"
+    UPDATE = "update"
+    REPLACE = "replace"
+    DELETE = "delete"
+    # Something changed but the listener cannot tell what (e.g. stream invalidated)
+    RESYNC = "resync"
+
+
+class ChangeSource(str, Enum):
+    """How the change was observed."""
+    CHANGE_STREAM = "change_stream"
+    POLLING = "polling"
+
+
+class ChangeEvent(BaseModel):
+    """A single change on a watched collection."""
+    collection: str
+    operation: ChangeOperation
+    document_id: Optional[str] = None
+    updated_fields: Optional[Dict[str, Any]] = None
+    removed_fields: Optional[List[str]] = None
+    source: ChangeSource = ChangeSource.CHANGE_STREAM
+    observed_at: datetime = Field(default_factory=datetime.utcnow)
+
+
+Handler = Callable[[ChangeEvent], Union[None, Awaitable[None]]]
+
+# Subscribe to this key to receive events from every collection
+ALL_COLLECTIONS = "*"
+
+
+class EventBus:
+    """Dispatches change events to in-process subscribers."""
+
+    def __init__(self):
+        self._handlers: Dict[str, List[Handler]] = {}
+
+    def subscribe(self, collection: str, handler: Handler) -> Callable[[], None]:
+        """
+        Register a handler (sync or async) for a collection's events.
+
+        Returns:
+            A callable that removes the subscription
+        """
+        self._handlers.setdefault(collection, []).append(handler)
+
+        def unsubscribe() -> None:
+            handlers = self._handlers.get(collection, [])
+            if handler in handlers:
+                handlers.remove(handler)
+
+        return unsubscribe
+
+    async def publish(self, event: ChangeEvent) -> None:
+        """Deliver an event. A failing handler is logged and does not affect the others."""
+        handlers = self._handlers.get(event.collection, []) + self._handlers.get(ALL_COLLECTIONS, [])
+        for handler in handlers:
+            try:
+                result = handler(event)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Change event handler failed for {event.collection}: {e}")
+
+
+event_bus = EventBus()
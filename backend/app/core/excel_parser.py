@@ -35,6 +35,28 @@ class ExcelParser:
         'כמות': 'quantity'
     }
 
+    PROCUREMENT_COLUMNS_MAP = {
+        'מק"ט': 'catalog_number',
+        'מק״ט': 'catalog_number',
+        'יצרן': 'manufacturer',
+        'תיאור': 'description',
+        'תאור': 'description',
+        'כמות': 'quantity',
+        'תאריך הזמנה': 'order_date',
+        'סכום': 'amount',
+        'סטטוס': 'status',
+        'התקבל EMF': 'received_emf',
+        'התקבל BOM': 'received_bom'
+    }
+
+    # Hebrew status labels as shown in the UI -> stored values
+    PROCUREMENT_STATUS_LABELS = {
+        'מחכה ל-EMF': 'waiting_emf',
+        'מחכה ל-BOM': 'waiting_bom',
+        'רכש יצא': 'ordered',
+        'רכש הגיע': 'received'
+    }
+
     @staticmethod
     def _read_excel_robust(contents: bytes, required_columns: List[str]) -> pd.DataFrame:
         """Tries to read Excel from header 0, if validation fails triggers logic for header 3"""
@@ -132,6 +154,52 @@ class ExcelParser:
         df = df.fillna('')
         return df.to_dict('records')
 
+    @classmethod
+    def parse_procurement_orders(cls, contents: bytes, filename: str) -> List[Dict[str, Any]]:
+        """
+        Parses a procurement orders file (.csv / .xlsx / .xls). Headers may be Hebrew or the field names.
+        Values keep their types (numbers, dates) for schema validation; empty cells are dropped.
+        Each record carries '_row': its line in the file (header = 1).
+        """
+        try:
+            if filename.lower().endswith('.csv'):
+                df = pd.read_csv(io.BytesIO(contents), encoding='utf-8-sig')
+            else:
+                df = pd.read_excel(io.BytesIO(contents), header=0)
+        except Exception as e:
+            raise ExcelFileException(f"שגיאה בקריאת הקובץ: {str(e)}")
+
+        df = df.rename(columns=lambda col: cls.PROCUREMENT_COLUMNS_MAP.get(str(col).strip(), str(col).strip()))
+
+        required = ['catalog_number', 'manufacturer', 'quantity', 'order_date', 'amount']
+        missing = [col for col in required if col not in df.columns]
+        if missing:
+            rev_map = {v: k for k, v in cls.PROCUREMENT_COLUMNS_MAP.items()}
+            missing_heb = [rev_map.get(m, m) for m in missing]
+            raise ExcelFileException(f"קובץ ההזמנות אינו תקין. חסרות העמודות הבאות: {', '.join(missing_heb)}")
+
+        records = []
+        for index, record in enumerate(df.to_dict('records')):
+            clean = {}
+            for key, value in record.items():
+                if pd.isna(value) or (isinstance(value, str) and not value.strip()):
+                    continue
+                if isinstance(value, pd.Timestamp):
+                    value = value.to_pydatetime()
+                elif hasattr(value, 'item'):
+                    value = value.item()  # numpy scalar
+                elif isinstance(value, str):
+                    value = value.strip()
+                clean[key] = value
+            if not clean:
+                continue  # Empty row
+            if 'status' in clean:
+                clean['status'] = cls.PROCUREMENT_STATUS_LABELS.get(clean['status'], clean['status'])
+            clean.setdefault('description', '')
+            clean['_row'] = index + 2
+            records.append(clean)
+        return records
+
     @staticmethod
     def generate_inventory_excel(items: List[Dict[str, Any]]) -> io.BytesIO:
         """
@@ -66,3 +66,20 @@ class BadRequestException(HTTPException):
             detail=detail
         )
 
+
+
+class TooManyRequestsException(HTTPException):
+    def __init__(self, retry_after: int, detail: str = "יותר מדי ניסיונות, נסה שוב מאוחר יותר"):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+
+class RangeNotSatisfiableException(HTTPException):
+    def __init__(self, detail: str = "טווח הבתים המבוקש אינו תקין"):
+        super().__init__(
+            status_code=status.HTTP_416_RANGE_NOT_SATISFIABLE,
+            detail=detail
+        )
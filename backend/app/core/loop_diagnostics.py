@@ -0,0 +1,222 @@
+"""
+Blocking-call detection for the event loop (opt-in, LOOP_DIAGNOSTICS_ENABLED).
+
+Every asyncio callback (a task step, a timer, ...) runs the loop exclusively,
+so a synchronous call inside async code - pandas parsing, bcrypt, boto3, file
+I/O - stalls every other request for its whole duration.
+
+While enabled, asyncio's Handle._run is wrapped to note when each callback
+starts. A watchdog thread polls those start times and, when a callback has
+run longer than LOOP_BLOCK_THRESHOLD_MS, samples the loop thread's stack with
+sys._current_frames(). The sample is attributed to the innermost frame of our
+own code (the call site) and the innermost frame overall (the blocking call),
+and aggregated for GET /admin/blocking-calls. Blocks too short for the
+watchdog to catch are attributed to the task's await chain instead.
+
+Only asyncio's own loop runs callbacks through Handle._run: uvloop (uvicorn's
+default when installed) never calls it, so enable() refuses to start under any
+other loop and reports it as unsupported_loop. Run uvicorn with --loop asyncio
+(UVICORN_LOOP=asyncio in the Dockerfile) while diagnostics are on.
+
+The same detector backs the --fail-on-blocking pytest option
+(tests/plugins/blocking_calls.py).
+"""
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Frames under this directory, outside installed packages, are "our code"
+PROJECT_ROOT = str(Path(__file__).resolve().parents[2])
+
+_STACK_LIMIT = 20
+
+
+def _is_project_frame(filename: str) -> bool:
+    return (
+        filename.startswith(PROJECT_ROOT)
+        and "site-packages" not in filename
+        and filename != __file__
+    )
+
+
+def _describe(frame: traceback.FrameSummary) -> str:
+    filename = frame.filename
+    if filename.startswith(PROJECT_ROOT):
+        filename = filename[len(PROJECT_ROOT) + 1:]
+    return f"{filename}:{frame.lineno} in {frame.name}"
+
+
+def _task_stack(handle: asyncio.Handle) -> List[traceback.FrameSummary]:
+    """Await chain of the task a handle stepped, outermost first (empty for other callbacks)"""
+    task = getattr(handle._callback, "__self__", None)
+    if not isinstance(task, asyncio.Task):
+        return []
+    frames = []
+    coro = task.get_coro()
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            break
+        frames.append(traceback.FrameSummary(frame.f_code.co_filename, frame.f_lineno, frame.f_code.co_name))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+    return frames
+
+
+class BlockingCallDetector:
+    """Callbacks that held the event loop longer than threshold_ms, by call site."""
+
+    def __init__(
+        self,
+        threshold_ms: float = settings.LOOP_BLOCK_THRESHOLD_MS,
+        max_sites: int = settings.LOOP_DIAGNOSTICS_MAX_SITES
+    ):
+        self.threshold_ms = threshold_ms
+        self.max_sites = max_sites
+        self.enabled = False
+        self.unsupported_loop: Optional[str] = None  # Loop class enable() refused to patch
+        self.max_block_ms = 0.0
+        self._sites: "OrderedDict[tuple, Dict[str, Any]]" = OrderedDict()
+        self._running: Dict[int, tuple] = {}  # loop thread id -> (callback id, start)
+        self._samples: Dict[int, List[traceback.FrameSummary]] = {}  # callback id -> sampled stack
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watchdog: Optional[threading.Thread] = None
+        self._original_run = None
+
+    def enable(self) -> None:
+        """Start timing callbacks and sampling blocked ones."""
+        if self.enabled:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None  # Enabled before the loop starts (pytest plugin); the default loop is asyncio's
+        if loop is not None and not isinstance(loop, asyncio.BaseEventLoop):
+            self.unsupported_loop = f"{type(loop).__module__}.{type(loop).__qualname__}"
+            logger.warning(
+                f"Blocking call detection needs the asyncio event loop, not {self.unsupported_loop}; "
+                "run uvicorn with --loop asyncio"
+            )
+            return
+        self.unsupported_loop = None
+        original_run = self._original_run = asyncio.Handle._run
+        detector = self
+
+        def _run(handle):
+            ident = threading.get_ident()
+            token = (id(handle), time.perf_counter())
+            previous = detector._running.get(ident)
+            detector._running[ident] = token
+            try:
+                return original_run(handle)
+            finally:
+                if previous is None:
+                    detector._running.pop(ident, None)
+                else:
+                    detector._running[ident] = previous
+                duration_ms = (time.perf_counter() - token[1]) * 1000
+                if duration_ms >= detector.threshold_ms:
+                    detector._finish(handle, token, duration_ms)
+
+        asyncio.Handle._run = _run
+        self._stop.clear()
+        self._watchdog = threading.Thread(target=self._watch, name="loop-block-watchdog", daemon=True)
+        self._watchdog.start()
+        self.enabled = True
+        logger.info(f"Blocking call detection enabled ({self.threshold_ms:.0f}ms)")
+
+    def disable(self) -> None:
+        """Restore asyncio and stop the watchdog."""
+        if not self.enabled:
+            return
+        asyncio.Handle._run = self._original_run
+        self._stop.set()
+        self._watchdog.join()
+        self._watchdog = None
+        self._running.clear()
+        self._samples.clear()
+        self.enabled = False
+
+    def _watch(self) -> None:
+        interval = max(self.threshold_ms / 4000, 0.005)
+        while not self._stop.wait(interval):
+            now = time.perf_counter()
+            for ident, (callback_id, start) in list(self._running.items()):
+                if (now - start) * 1000 < self.threshold_ms or callback_id in self._samples:
+                    continue
+                frame = sys._current_frames().get(ident)
+                if frame is not None:
+                    self._samples[callback_id] = traceback.extract_stack(frame)
+                    del frame
+
+    def _finish(self, handle: asyncio.Handle, token: tuple, duration_ms: float) -> None:
+        stack = self._samples.pop(token[0], None)
+        sampled = stack is not None
+        if not sampled:
+            stack = _task_stack(handle)
+        self.record(stack, duration_ms, sampled=sampled, callback=repr(handle))
+
+    def record(
+        self,
+        stack: List[traceback.FrameSummary],
+        duration_ms: float,
+        sampled: bool = True,
+        callback: Optional[str] = None
+    ) -> None:
+        """Aggregate one blocked callback by call site"""
+        project_frames = [frame for frame in stack if _is_project_frame(frame.filename)]
+        site = _describe(project_frames[-1]) if project_frames else (callback or "unknown")
+        # The leaf of a watchdog sample is the blocking call; a task's await chain only shows where it resumed
+        call = _describe(stack[-1]) if sampled and stack else None
+        if call == site:  # Blocked in C code called directly from our frame
+            call = None
+        key = (site, call)
+        with self._lock:
+            entry = self._sites.get(key)
+            if entry is None:
+                entry = self._sites[key] = {
+                    "site": site,
+                    "call": call,
+                    "sampled": sampled,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+                while len(self._sites) > self.max_sites:
+                    self._sites.popitem(last=False)
+            self._sites.move_to_end(key)
+            entry["count"] += 1
+            entry["total_ms"] += duration_ms
+            entry["max_ms"] = max(entry["max_ms"], duration_ms)
+            entry["last_seen"] = datetime.utcnow()
+            entry["stack"] = [_describe(frame) for frame in stack[-_STACK_LIMIT:]]
+            self.max_block_ms = max(self.max_block_ms, duration_ms)
+        logger.warning(f"Event loop blocked {duration_ms:.0f}ms at {site}" + (f" ({call})" if call else ""))
+
+    def top(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Call sites that blocked the loop longest in total"""
+        with self._lock:
+            entries = [dict(entry) for entry in self._sites.values()]
+        for entry in entries:
+            entry["avg_ms"] = entry["total_ms"] / entry["count"]
+        entries.sort(key=lambda entry: entry["total_ms"], reverse=True)
+        return entries[:limit]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._sites.clear()
+            self.max_block_ms = 0.0
+
+
+blocking_detector = BlockingCallDetector()
@@ -0,0 +1,221 @@
+"""
+Prometheus metrics, served at /metrics.
+
+prometheus_client is optional: without it every metric below is a no-op and
+/metrics answers 503. Label values are bounded (route templates, collection
+names, job names), and hot paths only touch pre-created metrics.
+"""
+from contextlib import contextmanager
+from typing import Iterator, Optional
+import asyncio
+import functools
+import logging
+import time
+
+from pymongo import monitoring
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+try:
+    from prometheus_client import (
+        CollectorRegistry, Counter, Gauge, Histogram, GCCollector, ProcessCollector,
+        generate_latest, CONTENT_TYPE_LATEST
+    )
+    PROMETHEUS_AVAILABLE = True
+except ImportError:
+    PROMETHEUS_AVAILABLE = False
+    CONTENT_TYPE_LATEST = "text/plain; version=0.0.4; charset=utf-8"
+    logger.warning("prometheus_client not installed. /metrics is disabled.")
+
+
+class _NoopMetric:
+    """Stands in for every metric type when prometheus_client is missing."""
+
+    def labels(self, *args, **kwargs) -> "_NoopMetric":
+        return self
+
+    def inc(self, amount: float = 1) -> None:
+        pass
+
+    def dec(self, amount: float = 1) -> None:
+        pass
+
+    def set(self, value: float) -> None:
+        pass
+
+    def set_function(self, function) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+
+if PROMETHEUS_AVAILABLE:
+    registry = CollectorRegistry()
+    ProcessCollector(registry=registry)
+    GCCollector(registry=registry)
+
+    def _counter(name: str, documentation: str, labels=()):
+        return Counter(name, documentation, labels, registry=registry)
+
+    def _gauge(name: str, documentation: str, labels=()):
+        return Gauge(name, documentation, labels, registry=registry)
+
+    def _histogram(name: str, documentation: str, labels=(), buckets=Histogram.DEFAULT_BUCKETS):
+        return Histogram(name, documentation, labels, registry=registry, buckets=buckets)
+else:
+    registry = None
+
+    def _counter(name: str, documentation: str, labels=(), **kwargs):
+        return _NoopMetric()
+
+    _gauge = _histogram = _counter
+
+
+_FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+_JOB_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+# HTTP
+http_request_seconds = _histogram(
+    "http_request_duration_seconds", "Request latency until the response starts",
+    ("method", "route", "status")
+)
+
+# MongoDB
+mongo_operation_seconds = _histogram(
+    "mongo_operation_duration_seconds", "Repository MongoDB operation latency",
+    ("collection", "operation"), buckets=_FAST_BUCKETS
+)
+mongo_pool_connections = _gauge("mongo_pool_connections", "Open pooled MongoDB connections")
+mongo_pool_checked_out = _gauge("mongo_pool_connections_checked_out", "Pooled MongoDB connections in use")
+mongo_pool_checkout_failures = _counter("mongo_pool_checkout_failures_total", "Failed connection checkouts")
+
+# Event loop
+event_loop_lag_seconds = _gauge("event_loop_lag_seconds", "Latest event loop scheduling delay")
+event_loop_lag_histogram = _histogram(
+    "event_loop_lag_distribution_seconds", "Event loop scheduling delay", buckets=_FAST_BUCKETS
+)
+
+# Audit trail
+audit_writes_in_flight = _gauge("audit_writes_in_flight", "Audit log writes awaiting MongoDB")
+audit_logs_written = _counter("audit_logs_written_total", "Audit log entries written")
+activity_rollup_pending = _gauge("activity_rollup_pending_buckets", "Hourly activity buckets waiting for the next flush")
+storage_cleanup_pending = _gauge("storage_cleanup_pending_files", "Stored files waiting for deletion")
+
+# Import / export jobs
+job_seconds = _histogram("job_duration_seconds", "Import / export job duration", ("job", "status"), buckets=_JOB_BUCKETS)
+job_rows = _counter("job_rows_total", "Rows processed by import / export jobs", ("job", "outcome"))
+
+
+def observe_request(method: str, route: str, status: int, seconds: float) -> None:
+    http_request_seconds.labels(method, route, str(status)).observe(seconds)
+
+
+@contextmanager
+def track_job(job: str) -> Iterator[None]:
+    """Time an import / export job; failures are counted with status 'error'"""
+    start = time.perf_counter()
+    status = "error"
+    try:
+        yield
+        status = "success"
+    finally:
+        job_seconds.labels(job, status).observe(time.perf_counter() - start)
+
+
+def timed_job(job: str):
+    """Decorator form of track_job for async service methods"""
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with track_job(job):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def count_rows(job: str, outcome: str, rows: int) -> None:
+    if rows:
+        job_rows.labels(job, outcome).inc(rows)
+
+
+def render() -> Optional[bytes]:
+    """Exposition of all metrics; None when prometheus_client is missing"""
+    if not PROMETHEUS_AVAILABLE:
+        return None
+    return generate_latest(registry)
+
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Tracks motor's connection pool in the mongo_pool_* metrics."""
+
+    def pool_created(self, event) -> None:
+        pass
+
+    def pool_ready(self, event) -> None:
+        pass
+
+    def pool_cleared(self, event) -> None:
+        pass
+
+    def pool_closed(self, event) -> None:
+        pass
+
+    def connection_created(self, event) -> None:
+        mongo_pool_connections.inc()
+
+    def connection_ready(self, event) -> None:
+        pass
+
+    def connection_closed(self, event) -> None:
+        mongo_pool_connections.dec()
+
+    def connection_check_out_started(self, event) -> None:
+        pass
+
+    def connection_check_out_failed(self, event) -> None:
+        mongo_pool_checkout_failures.inc()
+
+    def connection_checked_out(self, event) -> None:
+        mongo_pool_checked_out.inc()
+
+    def connection_checked_in(self, event) -> None:
+        mongo_pool_checked_out.dec()
+
+
+class LoopLagMonitor:
+    """Measures how late the event loop wakes a sleeping task."""
+
+    def __init__(self, interval: float = settings.METRICS_LOOP_LAG_INTERVAL_SECONDS):
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - start - self.interval)
+            event_loop_lag_seconds.set(self.last_lag)
+            event_loop_lag_histogram.observe(self.last_lag)
+
+    def start(self) -> None:
+        """Start measuring."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop measuring."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+loop_lag_monitor = LoopLagMonitor()
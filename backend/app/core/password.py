@@ -1,13 +1,35 @@
 """
 Password hashing utilities using bcrypt directly
+
+bcrypt is deliberately slow (~100-300ms per call), so request handlers use the
+*_async variants, which run on a dedicated bounded thread pool instead of
+blocking the event loop. bcrypt releases the GIL while hashing.
 """
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+import asyncio
 import bcrypt
 
+from app.config import settings
+
+# Dedicated pool so a login burst cannot starve the default executor
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="bcrypt"
+)
+
+# Limits how many hash jobs may be queued at once; callers beyond this wait on the loop
+_semaphore: Optional[asyncio.Semaphore] = None
+_semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+
+# Checked against for unknown usernames, so response time does not reveal whether a user exists
+_dummy_hash: Optional[str] = None
+
 
-def hash_password(password: str) -> str:
+def hash_password(password: str, rounds: Optional[int] = None) -> str:
     """Hash a password using bcrypt"""
     password_bytes = password.encode('utf-8')
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=rounds or settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password_bytes, salt)
     return hashed.decode('utf-8')
 
@@ -21,3 +43,48 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     except Exception:
         return False
 
+
+def needs_rehash(hashed_password: str) -> bool:
+    """True if the hash was made with a different cost factor than BCRYPT_ROUNDS"""
+    # Format: $2b$<cost>$<salt+hash>
+    parts = hashed_password.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return False
+    return int(parts[2]) != settings.BCRYPT_ROUNDS
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore = asyncio.Semaphore(settings.PASSWORD_HASH_MAX_PENDING)
+        _semaphore_loop = loop
+    return _semaphore
+
+
+async def _run(func, *args):
+    async with _get_semaphore():
+        return await asyncio.get_running_loop().run_in_executor(_executor, func, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    """hash_password on the bcrypt pool"""
+    return await _run(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password on the bcrypt pool"""
+    return await _run(verify_password, plain_password, hashed_password)
+
+
+async def dummy_verify_async(plain_password: str) -> bool:
+    """Spend the same time as a real verification. Always False."""
+    global _dummy_hash
+    if _dummy_hash is None:
+        _dummy_hash = await hash_password_async("dummy-password")
+    await verify_password_async(plain_password, _dummy_hash)
+    return False
+
+
+def shutdown_password_pool() -> None:
+    _executor.shutdown(wait=False, cancel_futures=True)
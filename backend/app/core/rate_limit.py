@@ -0,0 +1,253 @@
+"""
+Login rate limiting.
+
+Every login attempt takes a token from a per-IP and a per-username bucket,
+and repeated failures lock the username for a while. Both checks run before
+the user lookup and any bcrypt work.
+
+Backends:
+- MemoryRateLimitBackend: per process (default)
+- MongoRateLimitBackend: shared by all replicas, one atomic update per check
+"""
+from typing import Optional
+from datetime import datetime, timedelta
+import ipaddress
+import logging
+import math
+import time
+
+from fastapi import Request
+from pymongo import ReturnDocument
+
+from app.config import settings
+from app.core.cache import LRUCache
+from app.core.events import ChangeEvent, ChangeOperation
+from app.core.exceptions import TooManyRequestsException
+from app.db.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITS_COLLECTION = "login-rate-limits"
+
+# Usernames known not to exist -> skip the users lookup while cached
+unknown_usernames = LRUCache(
+    maxsize=settings.UNKNOWN_USERS_CACHE_SIZE,
+    ttl=settings.UNKNOWN_USERS_CACHE_SECONDS
+)
+
+
+_trusted_networks = [ipaddress.ip_network(proxy, strict=False) for proxy in settings.TRUSTED_PROXIES]
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in _trusted_networks)
+
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    Client address for rate limiting.
+
+    X-Forwarded-For is only honoured when the peer is a trusted proxy; its
+    entries are walked from the right, skipping trusted proxies, so a client
+    cannot spoof its address by sending the header itself.
+    """
+    address = request.client.host if request.client else None
+    if address is None or not _is_trusted_proxy(address):
+        return address
+    forwarded = [hop.strip() for hop in request.headers.get("x-forwarded-for", "").split(",") if hop.strip()]
+    for hop in reversed(forwarded):
+        if not _is_trusted_proxy(hop):
+            return hop
+    return forwarded[0] if forwarded else address
+
+
+def forget_unknown_username(username: Optional[str] = None) -> None:
+    """Call when a user is created (None clears everything)"""
+    if username is None:
+        unknown_usernames.clear()
+    else:
+        unknown_usernames.pop(username)
+
+
+def on_user_event(event: ChangeEvent) -> None:
+    """Change listener handler - a user may have been created on another replica"""
+    if event.operation in (ChangeOperation.INSERT, ChangeOperation.REPLACE, ChangeOperation.RESYNC):
+        forget_unknown_username()
+
+
+class MemoryRateLimitBackend:
+    """Token buckets and failure counters in process memory."""
+
+    def __init__(self, maxsize: int = 100000):
+        self._buckets = LRUCache(maxsize=maxsize)   # key -> [tokens, updated_at]
+        self._failures = LRUCache(maxsize=maxsize)  # key -> [failures, window_start, locked_until]
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = time.time()
+        tokens, updated_at = self._buckets.get(key) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated_at) * refill_per_second)
+        if tokens >= 1:
+            self._buckets.set(key, (tokens - 1, now))
+            return 0
+        self._buckets.set(key, (tokens, now))
+        return (1 - tokens) / refill_per_second
+
+    async def locked_until(self, key: str) -> float:
+        entry = self._failures.get(key)
+        return entry[2] if entry else 0
+
+    async def record_failure(self, key: str, window: int, threshold: int, lockout: int) -> None:
+        now = time.time()
+        failures, window_start, locked_until = self._failures.get(key) or (0, now, 0)
+        if window_start <= now - window:
+            failures, window_start = 0, now
+        failures += 1
+        if failures >= threshold:
+            failures, window_start, locked_until = 0, now, now + lockout
+        self._failures.set(key, (failures, window_start, locked_until))
+
+    async def reset(self, key: str) -> None:
+        self._failures.pop(key)
+
+    async def clear(self) -> None:
+        self._buckets.clear()
+        self._failures.clear()
+
+
+class MongoRateLimitBackend:
+    """Token buckets and failure counters in a shared collection (TTL index on expires_at)."""
+
+    def __init__(self, collection_name: str = RATE_LIMITS_COLLECTION):
+        self.collection_name = collection_name
+
+    def _get_collection(self):
+        return MongoDB.get_collection(self.collection_name)
+
+    async def take(self, key: str, capacity: int, refill_per_second: float) -> float:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        doc = await self._get_collection().find_one_and_update(
+            {"_id": f"bucket:{key}"},
+            [
+                {"$set": {
+                    "tokens": {"$min": [capacity, {"$add": [
+                        {"$ifNull": ["$tokens", capacity]},
+                        {"$multiply": [elapsed, refill_per_second]}
+                    ]}]},
+                    "updated_at": now
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {
+                    "tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]},
+                    "expires_at": now + timedelta(seconds=capacity / refill_per_second + 60)
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        if doc["allowed"]:
+            return 0
+        return (1 - doc["tokens"]) / refill_per_second
+
+    async def locked_until(self, key: str) -> float:
+        doc = await self._get_collection().find_one({"_id": f"lock:{key}"}, {"locked_until": 1})
+        if not doc or not doc.get("locked_until"):
+            return 0
+        return (doc["locked_until"] - datetime(1970, 1, 1)).total_seconds()
+
+    async def record_failure(self, key: str, window: int, threshold: int, lockout: int) -> None:
+        now = datetime.utcnow()
+        in_window = {"$gt": [{"$ifNull": ["$window_start", datetime(1970, 1, 1)]}, now - timedelta(seconds=window)]}
+        locking = {"$gte": ["$failures", threshold]}
+        await self._get_collection().update_one(
+            {"_id": f"lock:{key}"},
+            [
+                {"$set": {
+                    "failures": {"$cond": [in_window, {"$add": ["$failures", 1]}, 1]},
+                    "window_start": {"$cond": [in_window, "$window_start", now]}
+                }},
+                {"$set": {
+                    "locked_until": {"$cond": [locking, now + timedelta(seconds=lockout), "$locked_until"]},
+                    "window_start": {"$cond": [locking, now, "$window_start"]},
+                    "failures": {"$cond": [locking, 0, "$failures"]},
+                    "expires_at": now + timedelta(seconds=window + lockout)
+                }},
+            ],
+            upsert=True
+        )
+
+    async def reset(self, key: str) -> None:
+        await self._get_collection().delete_one({"_id": f"lock:{key}"})
+
+    async def clear(self) -> None:
+        await self._get_collection().delete_many({})
+
+
+class LoginRateLimiter:
+    """Per-IP and per-username token buckets plus username lockout."""
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    async def check(self, username: str, ip_address: Optional[str] = None) -> None:
+        """
+        Consume one attempt. Raises TooManyRequestsException when locked or out of tokens.
+        Backend errors are logged and the attempt is allowed.
+        """
+        try:
+            retry_after = await self._retry_after(username, ip_address)
+        except Exception as e:
+            logger.error(f"Login rate limiter unavailable: {e}")
+            return
+        if retry_after > 0:
+            raise TooManyRequestsException(math.ceil(retry_after))
+
+    async def _retry_after(self, username: str, ip_address: Optional[str]) -> float:
+        locked_until = await self.backend.locked_until(f"user:{username}")
+        if locked_until > time.time():
+            return locked_until - time.time()
+
+        if ip_address and settings.LOGIN_IP_RATE_LIMIT_ENABLED:
+            retry_after = await self.backend.take(
+                f"ip:{ip_address}",
+                settings.LOGIN_IP_BUCKET_SIZE,
+                settings.LOGIN_IP_REFILL_PER_MINUTE / 60
+            )
+            if retry_after > 0:
+                return retry_after
+
+        return await self.backend.take(
+            f"user:{username}",
+            settings.LOGIN_USER_BUCKET_SIZE,
+            settings.LOGIN_USER_REFILL_PER_MINUTE / 60
+        )
+
+    async def record_failure(self, username: str) -> None:
+        try:
+            await self.backend.record_failure(
+                f"user:{username}",
+                settings.LOGIN_LOCKOUT_WINDOW_SECONDS,
+                settings.LOGIN_LOCKOUT_THRESHOLD,
+                settings.LOGIN_LOCKOUT_SECONDS
+            )
+        except Exception as e:
+            logger.error(f"Failed to record login failure: {e}")
+
+    async def record_success(self, username: str) -> None:
+        try:
+            await self.backend.reset(f"user:{username}")
+        except Exception as e:
+            logger.error(f"Failed to reset login failures: {e}")
+
+
+def _create_backend():
+    if settings.LOGIN_RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimitBackend()
+    return MemoryRateLimitBackend()
+
+
+login_rate_limiter = LoginRateLimiter(_create_backend())
@@ -1,14 +1,23 @@
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import hashlib
+import time
+import jwt
 from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 
 from app.config import settings
+from app.core.cache import LRUCache, ExpiringSet
 from app.core.exceptions import UnauthorizedException, ForbiddenException
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
 
+# Verified token payloads, keyed by token fingerprint. Entries expire with the token.
+_verified_tokens = LRUCache(maxsize=settings.TOKEN_CACHE_SIZE)
+
+# Revoked token fingerprints, kept until the token would have expired anyway (never evicted)
+_revoked_tokens = ExpiringSet()
+
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """יצירת JWT token"""
@@ -22,25 +31,70 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def token_fingerprint(token: str) -> str:
+    """Cache key for a token - the raw token is never kept in memory longer than the request"""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
 def verify_token(token: str) -> dict:
     """אימות JWT token"""
+    fingerprint = token_fingerprint(token)
+    if fingerprint in _revoked_tokens:
+        raise UnauthorizedException("Could not validate credentials")
+
+    # Fast path: already verified and not yet expired
+    payload = _verified_tokens.get(fingerprint)
+    if payload is not None:
+        return dict(payload)
+
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        username: str = payload.get("sub")
-        if username is None:
-            raise UnauthorizedException("Could not validate credentials")
-        return payload
-    except JWTError:
+    except jwt.PyJWTError:
         raise UnauthorizedException("Could not validate credentials")
 
+    username: str = payload.get("sub")
+    if username is None:
+        raise UnauthorizedException("Could not validate credentials")
+
+    _verified_tokens.set(fingerprint, payload, expires_at=payload.get("exp"))
+    return dict(payload)
+
+
+def revoke_fingerprint(fingerprint: str, expires_at: Optional[float] = None) -> None:
+    """Reject a token from now on (in this process)"""
+    if expires_at is None:
+        expires_at = time.time() + settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    _verified_tokens.pop(fingerprint)
+    _revoked_tokens.add(fingerprint, expires_at)
+
+
+def revoke_token(token: str) -> Optional[tuple[str, float]]:
+    """
+    Revoke a valid token.
+
+    Returns:
+        (fingerprint, exp) of the revoked token, or None if the token was not valid anyway
+    """
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except jwt.PyJWTError:
+        return None
+    fingerprint = token_fingerprint(token)
+    revoke_fingerprint(fingerprint, payload.get("exp"))
+    return fingerprint, payload.get("exp")
+
+
+def get_request_token(request: Request, token: Optional[str] = None) -> Optional[str]:
+    """Bearer token if given, else the access_token cookie"""
+    return token or request.cookies.get("access_token")
+
 
 async def get_current_user(
         request: Request,
         token: Optional[str] = Depends(oauth2_scheme)
 ) -> dict:
     """קבלת משתמש מחובר"""
-    if not token:
-        token = request.cookies.get("access_token")
+    token = get_request_token(request, token)
 
     if not token:
         raise UnauthorizedException("Not authenticated")
@@ -0,0 +1,201 @@
+"""
+MongoDB change-stream listener.
+
+Watches the shared collections and publishes a ChangeEvent on the in-process
+event bus for every write, including writes made by other backend replicas.
+
+- Replica set / sharded cluster: uses change streams. The resume token is
+  kept across reconnects, and persisted per consumer (when it has a stable
+  name) so a restarted replica continues where it left off.
+- Standalone server (no change streams): polls each collection on its
+  'updated_at' field. Polling cannot observe deletes.
+"""
+from typing import Dict, List, Optional, Any
+from datetime import datetime
+import asyncio
+import logging
+import time
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.config import settings
+from app.core.events import ChangeEvent, ChangeOperation, ChangeSource, EventBus, event_bus
+from app.db.mongodb import MongoDB
+
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ["inventory", "procurement_orders", "users", "groups", "revoked-tokens"]
+
+# Server error codes meaning the stored resume token can no longer be used
+RESUME_TOKEN_LOST_CODES = {260, 280, 286}  # InvalidResumeToken, ChangeStreamFatalError, ChangeStreamHistoryLost
+
+# Save resume tokens at most this often (seconds) per collection
+TOKEN_SAVE_INTERVAL = 5.0
+
+
+class ChangeStreamListener:
+    """Publishes change events for a set of collections."""
+
+    def __init__(
+        self,
+        collections: List[str],
+        bus: EventBus,
+        consumer: Optional[str],
+        poll_interval: float,
+        token_collection_name: str = "change-stream-tokens"
+    ):
+        self.collections = collections
+        self.bus = bus
+        self.consumer = consumer
+        self.poll_interval = poll_interval
+        self.token_collection_name = token_collection_name
+        self.mode: Optional[str] = None
+        self._tasks: List[asyncio.Task] = []
+        self._last_token_save: Dict[str, float] = {}
+
+    # --- Lifecycle ---
+
+    async def start(self, force_polling: bool = False) -> None:
+        """Start one watcher (or poller) task per collection."""
+        if self._tasks:
+            return
+
+        use_streams = not force_polling and await self._supports_change_streams()
+        self.mode = ChangeSource.CHANGE_STREAM.value if use_streams else ChangeSource.POLLING.value
+
+        for name in self.collections:
+            runner = self._watch(name) if use_streams else self._poll(name)
+            self._tasks.append(asyncio.create_task(runner, name=f"change-listener:{name}"))
+
+        logger.info(f"Change listener started ({self.mode}) for: {', '.join(self.collections)}")
+
+    async def stop(self) -> None:
+        """Cancel all watcher tasks (watchers persist their resume token on cancel)."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _supports_change_streams(self) -> bool:
+        """Change streams require a replica set or a mongos."""
+        try:
+            hello = await MongoDB.client.admin.command("hello")
+        except PyMongoError as e:
+            logger.warning(f"Could not detect deployment type ({e}); falling back to polling")
+            return False
+        return "setName" in hello or hello.get("msg") == "isdbgrid"
+
+    # --- Change streams ---
+
+    async def _watch(self, name: str) -> None:
+        collection = MongoDB.get_collection(name)
+        token = await self._load_token(name)
+        backoff = 1
+
+        while True:
+            try:
+                async with collection.watch(resume_after=token) as stream:
+                    backoff = 1
+                    async for change in stream:
+                        token = stream.resume_token
+                        await self.bus.publish(self._to_event(name, change))
+                        await self._save_token(name, token)
+            except asyncio.CancelledError:
+                await self._save_token(name, token, force=True)
+                raise
+            except OperationFailure as e:
+                if e.code in RESUME_TOKEN_LOST_CODES:
+                    # History is gone - restart from now and tell subscribers to drop their state
+                    logger.warning(f"Resume token for {name} is no longer valid; restarting stream")
+                    token = None
+                    await self._save_token(name, None, force=True)
+                    await self.bus.publish(ChangeEvent(collection=name, operation=ChangeOperation.RESYNC))
+                    continue
+                logger.error(f"Change stream on {name} failed: {e}")
+            except PyMongoError as e:
+                logger.error(f"Change stream on {name} failed: {e}")
+
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 60)
+
+    def _to_event(self, name: str, change: Dict[str, Any]) -> ChangeEvent:
+        operation = change.get("operationType")
+        if operation not in ("insert", "update", "replace", "delete"):
+            # drop / rename / invalidate ...
+            return ChangeEvent(collection=name, operation=ChangeOperation.RESYNC)
+
+        description = change.get("updateDescription") or {}
+        return ChangeEvent(
+            collection=name,
+            operation=ChangeOperation(operation),
+            document_id=str(change["documentKey"]["_id"]),
+            updated_fields=description.get("updatedFields"),
+            removed_fields=description.get("removedFields")
+        )
+
+    async def _load_token(self, name: str) -> Optional[Dict[str, Any]]:
+        if not self.consumer:
+            return None
+        doc = await MongoDB.get_collection(self.token_collection_name).find_one(
+            {"_id": f"{self.consumer}:{name}"}
+        )
+        return doc.get("token") if doc else None
+
+    async def _save_token(self, name: str, token: Optional[Dict[str, Any]], force: bool = False) -> None:
+        if not self.consumer:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_token_save.get(name, 0) < TOKEN_SAVE_INTERVAL:
+            return
+        self._last_token_save[name] = now
+        try:
+            await MongoDB.get_collection(self.token_collection_name).update_one(
+                {"_id": f"{self.consumer}:{name}"},
+                {"$set": {"token": token, "updated_at": datetime.utcnow()}},
+                upsert=True
+            )
+        except PyMongoError as e:
+            logger.error(f"Failed to save resume token for {name}: {e}")
+
+    # --- Polling fallback ---
+
+    async def _poll(self, name: str) -> None:
+        watermark = datetime.utcnow()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                watermark = await self.poll_once(name, watermark)
+            except PyMongoError as e:
+                logger.error(f"Polling {name} failed: {e}")
+
+    async def poll_once(self, name: str, since: datetime) -> datetime:
+        """
+        Publish an event for every document updated after `since`.
+
+        Returns:
+            The new watermark (latest 'updated_at' seen)
+        """
+        cursor = MongoDB.get_collection(name).find(
+            {"updated_at": {"$gt": since}},
+            {"_id": 1, "created_at": 1, "updated_at": 1}
+        ).sort("updated_at", 1)
+
+        async for doc in cursor:
+            is_new = doc.get("created_at") is not None and doc.get("created_at") == doc.get("updated_at")
+            await self.bus.publish(ChangeEvent(
+                collection=name,
+                operation=ChangeOperation.INSERT if is_new else ChangeOperation.UPDATE,
+                document_id=str(doc["_id"]),
+                source=ChangeSource.POLLING
+            ))
+            since = doc["updated_at"]
+
+        return since
+
+
+change_listener = ChangeStreamListener(
+    WATCHED_COLLECTIONS,
+    event_bus,
+    consumer=settings.CHANGE_STREAM_CONSUMER or None,
+    poll_interval=settings.CHANGE_STREAM_POLL_SECONDS
+)
@@ -0,0 +1,115 @@
+"""
+Collection and index definitions for the application collections.
+Both are created on startup; create_index is a no-op when the index already exists.
+"""
+import logging
+
+from pymongo.errors import CollectionInvalid
+
+from app.config import settings
+from app.db.mongodb import MongoDB
+from app.db.utils.procurement_query import PROCUREMENT_COLLATION
+from app.db.utils.query_builder import ITEMS_COLLATION
+
+logger = logging.getLogger(__name__)
+
+
+# collection name -> timeseries options
+TIMESERIES_COLLECTIONS = {
+    "warehouse-activity-hourly": {"timeField": "hour", "metaField": "meta", "granularity": "hours"},
+}
+
+# collection name -> default collation. Existing collections are migrated by their repository.
+COLLATED_COLLECTIONS = {
+    # $merge on _id must run under the aggregation's collation (see ReconciliationRepository)
+    "procurement-reconciliation": PROCUREMENT_COLLATION,
+}
+
+# collection name -> list of (keys, options)
+INDEXES = {
+    # 'updated_at' drives the change-listener polling fallback and the stale items view
+    "inventory": [
+        ([("updated_at", 1)], {"name": "updated_at"}),
+        # Items list exact / prefix filters (ITEMS_COLLATION) and the procurement reconciliation $lookup
+        ([("catalog_number", 1)], {"name": "catalog_number", "collation": ITEMS_COLLATION}),
+        ([("serial", 1)], {"name": "serial", "collation": ITEMS_COLLATION}),
+        ([("manufacturer", 1)], {"name": "manufacturer", "collation": ITEMS_COLLATION}),
+        ([("location", 1)], {"name": "location", "collation": ITEMS_COLLATION}),
+        ([("target_site", 1)], {"name": "target_site", "collation": ITEMS_COLLATION}),
+        # stock_min / stock_max filters and sorting by stock
+        ([("stock_qty", 1)], {"name": "stock_qty"}),
+        # Warranty expiry windows (items endpoint and dashboard)
+        ([("warranty_expiry_date", 1)], {"name": "warranty_expiry_date"}),
+    ],
+    # The list query runs under PROCUREMENT_COLLATION, so its indexes share it
+    "procurement_orders": [
+        ([("updated_at", 1)], {"name": "updated_at"}),
+        ([("order_date", -1), ("_id", -1)], {"name": "order_date", "collation": PROCUREMENT_COLLATION}),
+        ([("status", 1), ("order_date", -1), ("_id", -1)], {"name": "status_order_date", "collation": PROCUREMENT_COLLATION}),
+        ([("catalog_number", 1), ("order_date", -1)], {"name": "catalog_number", "collation": PROCUREMENT_COLLATION}),
+        ([("manufacturer", 1), ("order_date", -1)], {"name": "manufacturer", "collation": PROCUREMENT_COLLATION}),
+    ],
+    "users": [
+        ([("updated_at", 1)], {"name": "updated_at"}),
+    ],
+    "groups": [
+        ([("updated_at", 1)], {"name": "updated_at"}),
+        ([("name", 1)], {"name": "name_unique", "unique": True}),
+    ],
+    "revoked-tokens": [
+        ([("expires_at", 1)], {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+        ([("updated_at", 1)], {"name": "updated_at"}),
+    ],
+    # Resume tokens left by consumers that no longer run
+    "change-stream-tokens": [
+        ([("updated_at", 1)], {"name": "updated_at_ttl", "expireAfterSeconds": settings.CHANGE_STREAM_TOKEN_TTL_SECONDS}),
+    ],
+    "login-rate-limits": [
+        ([("expires_at", 1)], {"name": "expires_at_ttl", "expireAfterSeconds": 0}),
+    ],
+    "procurement-reconciliation": [
+        ([("state", 1), ("missing_qty", -1), ("ordered_qty", -1)], {"name": "state_missing"}),
+    ],
+    "procurement-blobs": [
+        ([("updated_at", 1)], {"name": "updated_at"}),
+    ],
+    "warehouse-activity-daily": [
+        ([("day", 1), ("action", 1)], {"name": "day_action_unique", "unique": True}),
+    ],
+    "warehouse-activity-hourly": [
+        ([("hour", 1)], {"name": "hour"}),
+    ],
+}
+
+
+async def ensure_collections() -> None:
+    """
+    Create the time-series collections (falling back to a regular collection when
+    unsupported) and the collections with a default collation.
+    """
+    db = MongoDB.get_db()
+    for collection_name, collation in COLLATED_COLLECTIONS.items():
+        try:
+            await db.create_collection(collection_name, collation=collation)
+            logger.info(f"Created collated collection: {collection_name}")
+        except CollectionInvalid:
+            pass  # Already exists
+    for collection_name, timeseries in TIMESERIES_COLLECTIONS.items():
+        try:
+            await db.create_collection(collection_name, timeseries=timeseries)
+            logger.info(f"Created time-series collection: {collection_name}")
+        except CollectionInvalid:
+            pass  # Already exists
+        except Exception as e:
+            logger.warning(f"Time-series collection {collection_name} not created ({e}); using a regular collection")
+
+
+async def ensure_indexes() -> None:
+    """Create all application indexes. Failures are logged and do not stop startup."""
+    for collection_name, indexes in INDEXES.items():
+        collection = MongoDB.get_collection(collection_name)
+        for keys, options in indexes:
+            try:
+                await collection.create_index(keys, **options)
+            except Exception as e:
+                logger.error(f"Failed to create index {options.get('name')} on {collection_name}: {e}")
@@ -0,0 +1,357 @@
+"""
+Timing and slow-query capture for repository collections.
+
+Repositories wrap their collections with instrument(). Every operation is
+timed and aggregated by *query shape* - the collection, operation and the
+filter / sort / pipeline with values replaced by their type - so the same
+query with different values counts as one shape.
+
+Operations over SLOW_QUERY_MS are logged with their shape. For a sample of
+them (SLOW_QUERY_EXPLAIN_SAMPLE_RATE, at most once per shape every
+SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS) the filter is explained in a background
+task, and the plan summary (stages, index, keys/docs examined per returned
+document) is kept with the shape for GET /admin/slow-queries.
+
+QUERY_PROFILING_ENABLED only switches the per-shape statistics off: operation
+timings are always observed into the mongo_operation_duration_seconds metric.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set
+import asyncio
+import json
+import logging
+import random
+import time
+
+from app.config import settings
+from app.core.metrics import mongo_operation_seconds
+
+logger = logging.getLogger(__name__)
+
+# Operations timed as a single awaited call; the filter is their first argument
+FILTER_METHODS = {
+    "find_one", "count_documents", "distinct", "update_one", "update_many", "replace_one",
+    "delete_one", "delete_many", "find_one_and_update", "find_one_and_delete", "find_one_and_replace",
+}
+UNFILTERED_METHODS = {"insert_one", "insert_many", "bulk_write", "estimated_document_count"}
+
+# aggregate() options that change the plan; repeated in its explain command
+AGGREGATE_EXPLAIN_OPTIONS = ("collation", "hint", "let")
+
+# Pipelines with these stages write - never explain them
+_WRITE_STAGES = ("$merge", "$out")
+
+
+def query_shape(value: Any) -> Any:
+    """Filter / pipeline with every value replaced by its type name"""
+    if isinstance(value, dict):
+        return {key: query_shape(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(not isinstance(item, (dict, list, tuple)) for item in value):
+            return [type(value[0]).__name__]  # $in lists of any length share a shape
+        return [query_shape(item) for item in value]
+    return type(value).__name__
+
+
+def _pipeline_shape(pipeline: List[Dict[str, Any]]) -> List[Any]:
+    """Stage names, with the shape of $match stages"""
+    shape = []
+    for stage in pipeline:
+        name = next(iter(stage), "?")
+        shape.append({name: query_shape(stage[name])} if name == "$match" else name)
+    return shape
+
+
+def _plan_stages(plan: Dict[str, Any]) -> tuple[List[str], List[str]]:
+    """Stage names and index names of a winning plan, outermost first"""
+    stages, indexes = [], []
+    pending = [plan]
+    while pending:
+        node = pending.pop(0)
+        if "stage" in node:
+            stages.append(node["stage"])
+        if "indexName" in node:
+            indexes.append(node["indexName"])
+        if isinstance(node.get("queryPlan"), dict):  # SBE plans
+            pending.append(node["queryPlan"])
+        if isinstance(node.get("inputStage"), dict):
+            pending.append(node["inputStage"])
+        pending.extend(node.get("inputStages", []))
+    return stages, indexes
+
+
+def summarize_explain(explain: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of an executionStats explain worth keeping"""
+    planner = explain.get("queryPlanner") or {}
+    stats = explain.get("executionStats") or {}
+    if not planner and explain.get("stages"):  # aggregate explains nest the find under $cursor
+        cursor_stage = explain["stages"][0].get("$cursor", {})
+        planner = cursor_stage.get("queryPlanner") or {}
+        stats = cursor_stage.get("executionStats") or {}
+
+    stages, indexes = _plan_stages(planner.get("winningPlan") or {})
+    returned = stats.get("nReturned", 0)
+    keys_examined = stats.get("totalKeysExamined", 0)
+    docs_examined = stats.get("totalDocsExamined", 0)
+    return {
+        "stages": stages,
+        "indexes": indexes,
+        "collection_scan": "COLLSCAN" in stages,
+        "returned": returned,
+        "keys_examined": keys_examined,
+        "docs_examined": docs_examined,
+        "keys_examined_per_returned": round(keys_examined / max(returned, 1), 2),
+        "docs_examined_per_returned": round(docs_examined / max(returned, 1), 2),
+        "execution_ms": stats.get("executionTimeMillis"),
+        "explained_at": datetime.utcnow(),
+    }
+
+
+class QueryProfiler:
+    """Per-shape operation statistics of this process."""
+
+    def __init__(
+        self,
+        slow_ms: float = settings.SLOW_QUERY_MS,
+        explain_sample_rate: float = settings.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+        explain_interval: float = settings.SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS,
+        max_shapes: int = settings.SLOW_QUERY_MAX_SHAPES
+    ):
+        self.enabled = settings.QUERY_PROFILING_ENABLED
+        self.slow_ms = slow_ms
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_interval = explain_interval
+        self.max_shapes = max_shapes
+        self._shapes: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._explaining: Set[asyncio.Task] = set()
+
+    def record(
+        self,
+        collection: Any,
+        operation: str,
+        shape: Dict[str, Any],
+        duration_ms: float,
+        explain_args: Optional[Dict[str, Any]] = None
+    ) -> None:
+        key = json.dumps([collection.name, operation, shape], sort_keys=True, default=str)
+        entry = self._shapes.get(key)
+        if entry is None:
+            entry = self._shapes[key] = {
+                "collection": collection.name,
+                "operation": operation,
+                "shape": shape,
+                "count": 0,
+                "slow_count": 0,
+                "total_ms": 0.0,
+                "max_ms": 0.0,
+                "plan": None,
+            }
+            while len(self._shapes) > self.max_shapes:
+                self._shapes.popitem(last=False)
+        self._shapes.move_to_end(key)
+
+        entry["count"] += 1
+        entry["total_ms"] += duration_ms
+        entry["max_ms"] = max(entry["max_ms"], duration_ms)
+        if duration_ms < self.slow_ms:
+            return
+
+        entry["slow_count"] += 1
+        logger.warning(f"Slow query {duration_ms:.0f}ms {collection.name}.{operation} {key}")
+        if explain_args is not None and self._should_explain(entry):
+            entry["explain_requested_at"] = time.time()
+            task = asyncio.create_task(self._explain(entry, collection, explain_args))
+            self._explaining.add(task)
+            task.add_done_callback(self._explaining.discard)
+
+    def _should_explain(self, entry: Dict[str, Any]) -> bool:
+        last = entry.get("explain_requested_at")
+        if last is not None and time.time() - last < self.explain_interval:
+            return False
+        return random.random() < self.explain_sample_rate
+
+    async def _explain(self, entry: Dict[str, Any], collection: Any, explain_args: Dict[str, Any]) -> None:
+        try:
+            if "pipeline" in explain_args:
+                command = {"aggregate": collection.name, "pipeline": explain_args["pipeline"], "cursor": {}}
+                command.update((option, explain_args[option]) for option in AGGREGATE_EXPLAIN_OPTIONS if option in explain_args)
+                explain = await collection.database.command("explain", command, verbosity="executionStats")
+            else:
+                cursor = collection.find(explain_args.get("filter") or {})
+                if explain_args.get("sort"):
+                    cursor = cursor.sort(explain_args["sort"])
+                if explain_args.get("collation"):
+                    cursor = cursor.collation(explain_args["collation"])
+                explain = await cursor.explain()
+            entry["plan"] = summarize_explain(explain)
+        except Exception as e:
+            logger.debug(f"Explain failed for {collection.name}.{entry['operation']}: {e}")
+
+    def top(self, limit: int = 20, order_by: str = "total_ms") -> List[Dict[str, Any]]:
+        """Shapes with slow operations, worst first"""
+        shapes = [dict(entry) for entry in self._shapes.values() if entry["slow_count"]]
+        for entry in shapes:
+            entry.pop("explain_requested_at", None)
+            entry["avg_ms"] = round(entry["total_ms"] / entry["count"], 2)
+            entry["total_ms"] = round(entry["total_ms"], 2)
+            entry["max_ms"] = round(entry["max_ms"], 2)
+        shapes.sort(key=lambda entry: entry[order_by], reverse=True)
+        return shapes[:limit]
+
+    def reset(self) -> None:
+        self._shapes.clear()
+
+    async def wait_for_explains(self) -> None:
+        """Wait for explains in flight (tests, shutdown)"""
+        if self._explaining:
+            await asyncio.gather(*self._explaining, return_exceptions=True)
+
+
+query_profiler = QueryProfiler()
+
+
+def _report(collection: Any, operation: str, duration_ms: float, describe: Callable[[], tuple]) -> None:
+    """Observe the operation metric; describe() -> (shape, explain_args) is only built for the profiler"""
+    mongo_operation_seconds.labels(collection.name, operation).observe(duration_ms / 1000)
+    if query_profiler.enabled:
+        shape, explain_args = describe()
+        query_profiler.record(collection, operation, shape, duration_ms, explain_args)
+
+
+class InstrumentedCursor:
+    """find / aggregate cursor that reports once it has been consumed."""
+
+    def __init__(self, collection: Any, cursor: Any, operation: str, explain_args: Dict[str, Any]):
+        self._collection = collection
+        self._cursor = cursor
+        self._operation = operation
+        self._explain_args = explain_args
+        self._elapsed = 0.0
+        self._recorded = False
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+    def sort(self, key_or_list: Any, direction: Optional[int] = None) -> "InstrumentedCursor":
+        if direction is None:
+            self._cursor.sort(key_or_list)
+            self._explain_args["sort"] = key_or_list
+        else:
+            self._cursor.sort(key_or_list, direction)
+            self._explain_args["sort"] = [(key_or_list, direction)]
+        return self
+
+    def collation(self, collation: Optional[Dict[str, Any]]) -> "InstrumentedCursor":
+        self._cursor.collation(collation)
+        self._explain_args["collation"] = collation
+        return self
+
+    def skip(self, skip: int) -> "InstrumentedCursor":
+        self._cursor.skip(skip)
+        return self
+
+    def limit(self, limit: int) -> "InstrumentedCursor":
+        self._cursor.limit(limit)
+        return self
+
+    def _record(self) -> None:
+        if self._recorded:
+            return
+        self._recorded = True
+        _report(self._collection, self._operation, self._elapsed * 1000, self._describe)
+
+    def _describe(self) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        explain_args: Optional[Dict[str, Any]] = self._explain_args
+        if "pipeline" in self._explain_args:
+            pipeline = self._explain_args["pipeline"]
+            shape = {"pipeline": _pipeline_shape(pipeline)}
+            if any(name in _WRITE_STAGES for stage in pipeline for name in stage):
+                explain_args = None
+        else:
+            shape = {"filter": query_shape(self._explain_args.get("filter") or {})}
+            if self._explain_args.get("sort"):
+                shape["sort"] = self._explain_args["sort"]  # Field names and directions only
+        return shape, explain_args
+
+    async def to_list(self, *args, **kwargs) -> List[Any]:
+        start = time.perf_counter()
+        try:
+            return await self._cursor.to_list(*args, **kwargs)
+        finally:
+            self._elapsed += time.perf_counter() - start
+            self._record()
+
+    def __aiter__(self) -> "InstrumentedCursor":
+        return self
+
+    async def __anext__(self) -> Any:
+        start = time.perf_counter()
+        try:
+            return await self._cursor.__anext__()
+        except StopAsyncIteration:
+            self._elapsed += time.perf_counter() - start
+            self._record()
+            raise
+        finally:
+            if not self._recorded:
+                self._elapsed += time.perf_counter() - start
+
+
+class InstrumentedCollection:
+    """Motor collection proxy that times operations into query_profiler."""
+
+    def __init__(self, collection: Any):
+        self._collection = collection
+
+    @property
+    def delegate(self) -> Any:
+        return self._collection
+
+    def __getattr__(self, name: str) -> Any:
+        attribute = getattr(self._collection, name)
+        if name in FILTER_METHODS or name in UNFILTERED_METHODS:
+            return self._timed(name, attribute)
+        return attribute
+
+    def _timed(self, name: str, method: Any):
+        async def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            finally:
+                _report(self._collection, name, (time.perf_counter() - start) * 1000, lambda: describe(args, kwargs))
+
+        def describe(args: tuple, kwargs: Dict[str, Any]) -> tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+            if name not in FILTER_METHODS:
+                return {}, None
+            query_filter = kwargs.get("filter", args[0] if args else {})
+            if name == "distinct":  # distinct(key, filter)
+                query_filter = kwargs.get("filter", args[1] if len(args) > 1 else {})
+            explain_args = {"filter": query_filter, "collation": kwargs.get("collation")}
+            return {"filter": query_shape(query_filter or {})}, explain_args
+        return timed
+
+    def find(self, *args, **kwargs) -> InstrumentedCursor:
+        explain_args = {"filter": kwargs.get("filter", args[0] if args else {})}
+        if kwargs.get("sort"):
+            explain_args["sort"] = kwargs["sort"]
+        if kwargs.get("collation"):
+            explain_args["collation"] = kwargs["collation"]
+        return InstrumentedCursor(self._collection, self._collection.find(*args, **kwargs), "find", explain_args)
+
+    def aggregate(self, pipeline: List[Dict[str, Any]], *args, **kwargs) -> InstrumentedCursor:
+        cursor = self._collection.aggregate(pipeline, *args, **kwargs)
+        explain_args = {"pipeline": pipeline}
+        for option in AGGREGATE_EXPLAIN_OPTIONS:
+            if kwargs.get(option) is not None:
+                value = kwargs[option]
+                explain_args[option] = dict(value) if option == "hint" and isinstance(value, list) else value
+        return InstrumentedCursor(self._collection, cursor, "aggregate", explain_args)
+
+
+def instrument(collection: Any) -> Any:
+    """Wrap a collection for operation metrics and query profiling (no-op when already wrapped)"""
+    if isinstance(collection, InstrumentedCollection):
+        return collection
+    return InstrumentedCollection(collection)
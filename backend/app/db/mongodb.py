@@ -3,6 +3,7 @@ from typing import Optional
 import logging
 
 from app.config import settings
+from app.core.metrics import PROMETHEUS_AVAILABLE, PoolMetricsListener
 
 logger = logging.getLogger(__name__)
 
@@ -32,7 +33,8 @@ class MongoDB:
                 maxIdleTimeMS=45000,  # Close idle connections after 45s
                 serverSelectionTimeoutMS=5000,  # 5s timeout for server selection
                 retryWrites=True,  # Retry write operations on failure
-                retryReads=True    # Retry read operations on failure
+                retryReads=True,   # Retry read operations on failure
+                event_listeners=[PoolMetricsListener()] if PROMETHEUS_AVAILABLE else []
             )
             cls.db = cls.client[settings.DB_NAME]
             
@@ -0,0 +1,98 @@
+"""
+Repository for pre-aggregated audit activity counters.
+"""
+from typing import List, Dict, Any
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from app.db.instrumentation import instrument
+from app.db.mongodb import MongoDB
+
+
+def truncate_to_day(timestamp: datetime) -> datetime:
+    """Round a timestamp down to midnight (UTC)."""
+    return timestamp.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def truncate_to_hour(timestamp: datetime) -> datetime:
+    """Round a timestamp down to the start of its hour."""
+    return timestamp.replace(minute=0, second=0, microsecond=0)
+
+
+class ActivityRepository:
+    """
+    Repository for the pre-aggregated rollups of audit logs.
+
+    Daily rollup - one document per action per day:
+        {"day": <midnight>, "action": <action>, "count": n}
+
+    Hourly rollup - a time-series collection of measurements:
+        {"hour": <start of hour>, "meta": {"action", "actor", "resource_type"}, "count": n}
+    The same (hour, meta) may appear in several measurements (one per flush),
+    so readers always $sum the counts.
+    """
+
+    def __init__(
+        self,
+        daily_collection_name: str = "warehouse-activity-daily",
+        hourly_collection_name: str = "warehouse-activity-hourly"
+    ):
+        self.daily_collection = instrument(MongoDB.get_collection(daily_collection_name))
+        self.hourly_collection = instrument(MongoDB.get_collection(hourly_collection_name))
+
+    async def record_action(self, action: str, timestamp: datetime) -> None:
+        """Increment the daily counter for an action."""
+        await self.daily_collection.update_one(
+            {"day": truncate_to_day(timestamp), "action": action},
+            {"$inc": {"count": 1}},
+            upsert=True
+        )
+
+    async def record_actions(self, counts: Dict[str, int], timestamp: datetime) -> None:
+        """Increment the daily counters of several actions in one round trip."""
+        if counts:
+            await self.daily_collection.bulk_write([
+                UpdateOne({"day": truncate_to_day(timestamp), "action": action}, {"$inc": {"count": count}}, upsert=True)
+                for action, count in counts.items()
+            ], ordered=False)
+
+    async def get_daily_counts(self, start_date: datetime) -> List[Dict[str, Any]]:
+        """Get all daily counters from start_date (inclusive) onwards."""
+        cursor = self.daily_collection.find(
+            {"day": {"$gte": truncate_to_day(start_date)}},
+            {"_id": 0, "day": 1, "action": 1, "count": 1}
+        ).sort("day", 1)
+        return await cursor.to_list(length=None)
+
+    async def insert_hourly_buckets(self, buckets: List[Dict[str, Any]]) -> None:
+        """Append hourly measurements to the time-series collection."""
+        if buckets:
+            await self.hourly_collection.insert_many(buckets, ordered=False)
+
+    async def get_hourly_series(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        unit: str,
+        group_by: str
+    ) -> List[Dict[str, Any]]:
+        """
+        Sum hourly measurements into buckets of `unit` (hour/day),
+        split by the given meta field (action/actor/resource_type).
+        """
+        pipeline = [
+            {"$match": {"hour": {"$gte": start_date, "$lt": end_date}}},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$hour", "unit": unit}},
+                    "key": f"$meta.{group_by}"
+                },
+                "count": {"$sum": "$count"}
+            }},
+            {"$sort": {"_id.bucket": 1}}
+        ]
+        return [
+            {"bucket": doc["_id"]["bucket"], "key": doc["_id"].get("key"), "count": doc["count"]}
+            async for doc in self.hourly_collection.aggregate(pipeline)
+        ]
@@ -5,18 +5,42 @@ from typing import List, Optional, Dict, Any
 from datetime import datetime
 from bson import ObjectId
 
+from app.db.instrumentation import instrument
 from app.db.mongodb import MongoDB
 from app.schemas.audit import AuditLogCreate, AuditAction
 
 
+# Root keys under which log entries are nested (see create_audit_log)
+AUDIT_WRAPPERS = ["user_action", "item_action", "procurement_action", "general_action"]
+
+
+def _coalesce_field(field: str) -> Dict[str, Any]:
+    """Aggregation expression resolving a field from whichever wrapper the document uses."""
+    expr: Any = None
+    for wrapper in reversed(AUDIT_WRAPPERS):
+        expr = {"$ifNull": [f"${wrapper}.{field}", expr]}
+    return expr
+
+
 class AuditRepository:
     """Repository for managing audit logs."""
     
     def __init__(self, collection_name: str = "warehouse-audit-logs"):
-        self.collection = MongoDB.get_collection(collection_name)
+        self.collection = instrument(MongoDB.get_collection(collection_name))
     
     async def create_audit_log(self, audit_data: AuditLogCreate) -> str:
         """Create a new audit log entry with nested schema."""
+        result = await self.collection.insert_one(self._to_document(audit_data))
+        return str(result.inserted_id)
+    
+    async def create_audit_logs(self, entries: List[AuditLogCreate]) -> List[str]:
+        """Create many audit log entries in one insert."""
+        if not entries:
+            return []
+        result = await self.collection.insert_many([self._to_document(entry) for entry in entries])
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    def _to_document(self, audit_data: AuditLogCreate) -> Dict[str, Any]:
         # Optimize storage by excluding None values
         log_dict = audit_data.model_dump(exclude_none=True)
         log_dict["timestamp"] = datetime.utcnow()
@@ -33,13 +57,10 @@ class AuditRepository:
             wrapper = "general_action"
             
         # Create the nested document
-        document = {
+        return {
             wrapper: log_dict,
             "type": wrapper # Optional indexable helper
         }
-        
-        result = await self.collection.insert_one(document)
-        return str(result.inserted_id)
     
     async def get_audit_logs(
         self,
@@ -222,3 +243,64 @@ class AuditRepository:
                 flat_logs.append(data)
         
         return flat_logs, total
+
+    async def count_by_category(
+        self,
+        start_date: datetime,
+        categories: Dict[str, List[str]]
+    ) -> Dict[str, int]:
+        """
+        Count log entries since start_date, grouped into action categories.
+        Runs as a single aggregation over the date window.
+        """
+        all_actions = [action for actions in categories.values() for action in actions]
+        action_expr = _coalesce_field("action")
+
+        pipeline = [
+            {"$match": {"$or": [
+                {f"{w}.timestamp": {"$gte": start_date}, f"{w}.action": {"$in": all_actions}}
+                for w in AUDIT_WRAPPERS
+            ]}},
+            {"$group": {
+                "_id": {"$switch": {
+                    "branches": [
+                        {"case": {"$in": [action_expr, actions]}, "then": category}
+                        for category, actions in categories.items()
+                    ],
+                    "default": None
+                }},
+                "count": {"$sum": 1}
+            }}
+        ]
+
+        counts = {category: 0 for category in categories}
+        async for doc in self.collection.aggregate(pipeline):
+            if doc["_id"] in counts:
+                counts[doc["_id"]] = doc["count"]
+        return counts
+
+    async def rebuild_daily_rollup(self, target_collection: str) -> None:
+        """Recompute the daily per-action rollup from the raw logs ($merge into target)."""
+        pipeline = [
+            {"$project": {
+                "timestamp": _coalesce_field("timestamp"),
+                "action": _coalesce_field("action")
+            }},
+            {"$match": {"timestamp": {"$type": "date"}, "action": {"$ne": None}}},
+            {"$group": {
+                "_id": {
+                    "day": {"$dateTrunc": {"date": "$timestamp", "unit": "day"}},
+                    "action": "$action"
+                },
+                "count": {"$sum": 1}
+            }},
+            {"$project": {"_id": 0, "day": "$_id.day", "action": "$_id.action", "count": 1}},
+            {"$merge": {
+                "into": target_collection,
+                "on": ["day", "action"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+        async for _ in self.collection.aggregate(pipeline):
+            pass
@@ -3,10 +3,11 @@ from motor.motor_asyncio import AsyncIOMotorCollection
 from bson import ObjectId
 
 from app.core.exceptions import InvalidItemIdException
+from app.db.instrumentation import instrument
 
 class BaseRepository:
     def __init__(self, collection: AsyncIOMotorCollection):
-        self.collection = collection
+        self.collection = instrument(collection)
 
     def _validate_object_id(self, item_id: str) -> ObjectId:
         """המרת string ל-ObjectId עם validation"""
@@ -0,0 +1,81 @@
+from datetime import datetime
+from typing import Optional, Dict, Any, AsyncIterator
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.db.instrumentation import instrument
+from app.db.mongodb import MongoDB
+
+
+class BlobRepository:
+    """
+    Content-addressed procurement file blobs (_id = sha256 hex digest).
+    'refcount' is the number of procurement_orders.files entries pointing at the blob.
+    """
+
+    def __init__(self, collection_name: str = "procurement-blobs"):
+        self.collection = instrument(MongoDB.get_collection(collection_name))
+
+    async def acquire(self, sha256: str, location: Dict[str, Any], size: int) -> Dict[str, Any]:
+        """
+        Add a reference, creating the blob at `location` if it does not exist yet.
+
+        Returns:
+            The blob document after the update (its location may differ from `location`)
+        """
+        now = datetime.utcnow()
+        update = {
+            "$inc": {"refcount": 1},
+            "$set": {"updated_at": now},
+            "$setOnInsert": {
+                "s3_key": location.get("s3_key"),
+                "local_path": location.get("local_path"),
+                "size": size,
+                "created_at": now
+            }
+        }
+        try:
+            return await self.collection.find_one_and_update(
+                {"_id": sha256}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Concurrent first upload of the same content - the other insert won
+            return await self.collection.find_one_and_update(
+                {"_id": sha256}, update, upsert=True, return_document=ReturnDocument.AFTER
+            )
+
+    async def release(self, sha256: str) -> Optional[Dict[str, Any]]:
+        """
+        Drop a reference.
+
+        Returns:
+            The removed blob document when this was the last reference, else None
+        """
+        blob = await self.collection.find_one_and_update(
+            {"_id": sha256},
+            {"$inc": {"refcount": -1}, "$set": {"updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
+        )
+        if not blob or blob["refcount"] > 0:
+            return None
+        # A concurrent acquire in between keeps the blob alive
+        result = await self.collection.delete_one({"_id": sha256, "refcount": {"$lte": 0}})
+        return blob if result.deleted_count else None
+
+    async def iter_blobs(self) -> AsyncIterator[Dict[str, Any]]:
+        async for blob in self.collection.find():
+            yield blob
+
+    async def set_refcount(self, sha256: str, refcount: int, last_updated: datetime) -> bool:
+        """Correct a refcount, unless the blob changed since `last_updated`"""
+        result = await self.collection.update_one(
+            {"_id": sha256, "updated_at": last_updated},
+            {"$set": {"refcount": refcount, "updated_at": datetime.utcnow()}}
+        )
+        return result.modified_count > 0
+
+    async def delete_unreferenced(self, sha256: str, last_updated: datetime) -> bool:
+        """Delete a blob document, unless it changed since `last_updated`"""
+        result = await self.collection.delete_one({"_id": sha256, "updated_at": last_updated})
+        return result.deleted_count > 0
@@ -1,6 +1,8 @@
-from typing import Optional, List, Dict, Any, TYPE_CHECKING
+from typing import Optional, List, Dict, Any, Union, TYPE_CHECKING
 from datetime import datetime, timedelta
+import math
 from bson import ObjectId
+from pymongo import UpdateOne
 
 if TYPE_CHECKING:
     from app.schemas.item import ItemFilter
@@ -9,9 +11,62 @@ if TYPE_CHECKING:
 from app.db.repositories.base import BaseRepository
 from app.core.exceptions import ItemNotFoundException
 
+# Sorting by the display string would be lexical ("10" < "9")
+SORT_FIELD_ALIASES = {"current_stock": "stock_qty"}
+
+
+def parse_stock_qty(value: Any) -> Optional[Union[int, float]]:
+    """Numeric value of a current_stock string ("12", "1,200", "2.5"); None when not a number"""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        try:
+            number = float(str(value).strip().replace(",", ""))
+        except ValueError:
+            return None
+    if not math.isfinite(number):
+        return None
+    return int(number) if number.is_integer() else number
+
+
+# Accepted warranty_expiry formats; the Excel import writes '%Y-%m-%d'
+WARRANTY_DATE_FORMATS = ("%Y-%m-%d", "%d/%m/%Y", "%d.%m.%Y", "%Y-%m-%dT%H:%M:%S", "%Y-%m-%d %H:%M:%S")
+
+
+def parse_warranty_date(value: Any) -> Optional[datetime]:
+    """Date of a warranty_expiry string (midnight, naive UTC); None when not a date"""
+    if isinstance(value, datetime):
+        return value.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=None)
+    if not isinstance(value, str) or not value.strip():
+        return None
+    for date_format in WARRANTY_DATE_FORMATS:
+        try:
+            return datetime.strptime(value.strip(), date_format).replace(hour=0, minute=0, second=0)
+        except ValueError:
+            continue
+    return None
+
+
+# Display field -> (typed copy, parser). The typed copies are indexed for range queries.
+DERIVED_FIELDS = {
+    "current_stock": ("stock_qty", parse_stock_qty),
+    "warranty_expiry": ("warranty_expiry_date", parse_warranty_date),
+}
+
 
 class ItemsRepository(BaseRepository):
 
+    @staticmethod
+    def _with_derived_fields(data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Copy of data with the typed copies (stock_qty, warranty_expiry_date) of its display fields.
+        The caller's dict is left untouched - services log and publish it as the change set.
+        """
+        derived = {target: parse(data[source]) for source, (target, parse) in DERIVED_FIELDS.items() if source in data}
+        return {**data, **derived}
+
     def _serialize_item(self, item: Dict[str, Any]) -> Dict[str, Any]:
         if item and "_id" in item:
             item["_id"] = str(item["_id"])
@@ -57,14 +112,17 @@ class ItemsRepository(BaseRepository):
         from app.db.utils.query_builder import MongoQueryBuilder
 
         query = MongoQueryBuilder.build_search_query(filter_params)
+        # Exact / prefix filters need the collation of the inventory indexes
+        collation = MongoQueryBuilder.collation(filter_params)
 
-        total = await self.count(query)
+        total = await self.collection.count_documents(query, collation=collation)
 
-        cursor = self.collection.find(query)
+        cursor = self.collection.find(query, collation=collation)
 
         if filter_params.sort_by:
             direction = 1 if filter_params.sort_order == "asc" else -1
-            cursor = cursor.sort(filter_params.sort_by, direction)
+            sort_field = SORT_FIELD_ALIASES.get(filter_params.sort_by, filter_params.sort_by)
+            cursor = cursor.sort(sort_field, direction)
         else:
             cursor = cursor.sort("updated_at", -1)
 
@@ -85,13 +143,14 @@ class ItemsRepository(BaseRepository):
         return items
 
     async def create(self, data: Dict[str, Any]) -> Dict[str, Any]:
-        result = await self.collection.insert_one(data)
-        data["_id"] = str(result.inserted_id)
-        return data
+        document = self._with_derived_fields(data)
+        result = await self.collection.insert_one(document)
+        document["_id"] = str(result.inserted_id)
+        return document
 
     async def update(self, item_id: str, data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         object_id = self._validate_object_id(item_id)
-        await self.collection.update_one({"_id": object_id}, {"$set": data})
+        await self.collection.update_one({"_id": object_id}, {"$set": self._with_derived_fields(data)})
         updated_item = await self.collection.find_one({"_id": object_id})
         return self._serialize_item(updated_item) if updated_item else None
 
@@ -107,7 +166,7 @@ class ItemsRepository(BaseRepository):
         
         result = await self.collection.update_many(
             {"_id": {"$in": object_ids}},
-            {"$set": update_data}
+            {"$set": self._with_derived_fields(update_data)}
         )
 
         return items_before, result.modified_count
@@ -127,6 +186,64 @@ class ItemsRepository(BaseRepository):
         result = await self.collection.delete_one({"_id": object_id})
         return result.deleted_count > 0
 
+    async def update_many(self, query: Dict[str, Any], data: Dict[str, Any]) -> int:
+        return await super().update_many(query, self._with_derived_fields(data))
+
+    async def backfill_derived_fields(self, batch_size: int = 1000) -> Dict[str, int]:
+        """
+        Migration: set the typed copies of DERIVED_FIELDS on every item, in _id
+        order and in batches. Safe to re-run and to run while items are being edited.
+        """
+        projection = {field: 1 for pair in DERIVED_FIELDS.items() for field in (pair[0], pair[1][0])}
+        scanned = updated = 0
+        last_id = None
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id is not None else {}
+            batch = await self.collection.find(query, projection).sort("_id", 1).limit(batch_size).to_list(length=batch_size)
+            if not batch:
+                break
+
+            operations = []
+            for item in batch:
+                changes = {}
+                for source, (target, parse) in DERIVED_FIELDS.items():
+                    value = parse(item.get(source))
+                    if target not in item or item[target] != value:
+                        changes[target] = value
+                if not changes:
+                    continue
+                # Skip the item if a display field was changed since it was read
+                condition = {"_id": item["_id"], **{source: item.get(source) for source in DERIVED_FIELDS}}
+                operations.append(UpdateOne(condition, {"$set": changes}))
+            if operations:
+                result = await self.collection.bulk_write(operations, ordered=False)
+                updated += result.modified_count
+
+            scanned += len(batch)
+            last_id = batch[-1]["_id"]
+
+        return {"scanned": scanned, "updated": updated}
+
+    async def get_expiring_warranties(
+            self,
+            start: datetime,
+            end: datetime,
+            page: int = 1,
+            limit: int = 30
+    ) -> tuple[List[Dict[str, Any]], int]:
+        """פריטים שתוקף האחריות שלהם מסתיים בטווח [start, end]"""
+        query = {"warranty_expiry_date": {"$gte": start, "$lte": end}}
+
+        total = await self.count(query)
+
+        cursor = self.collection.find(query).sort([("warranty_expiry_date", 1), ("_id", 1)]).skip((page - 1) * limit).limit(limit)
+        items = await cursor.to_list(length=limit)
+
+        for item in items:
+            item["_id"] = str(item["_id"])
+
+        return items, total
+
     async def get_stale_items(
             self,
             days: int = 30,
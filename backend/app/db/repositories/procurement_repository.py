@@ -1,30 +1,49 @@
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from bson import ObjectId
+from pymongo import UpdateOne
 
+from app.db.instrumentation import instrument
 from app.db.mongodb import MongoDB
+from app.db.utils.procurement_query import ProcurementQuery, PROCUREMENT_COLLATION, ORDER_SORT
 
 
 class ProcurementRepository:
     """Repository for procurement operations"""
     
     def __init__(self):
-        self.collection = MongoDB.get_collection("procurement_orders")
+        self.collection = instrument(MongoDB.get_collection("procurement_orders"))
     
     async def create_order(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
         """Create new procurement order"""
-        order_doc = {
-            **order_data,
-            "files": [],
-            "created_at": datetime.utcnow(),
-            "updated_at": datetime.utcnow()
-        }
+        order_doc = self._new_order_doc(order_data)
         
         result = await self.collection.insert_one(order_doc)
         order_doc["_id"] = result.inserted_id
         
         return self._format_order(order_doc)
     
+    async def create_orders(self, orders_data: List[Dict[str, Any]]) -> List[str]:
+        """Create many procurement orders in one insert. Returns their IDs."""
+        if not orders_data:
+            return []
+        result = await self.collection.insert_many([self._new_order_doc(data) for data in orders_data])
+        return [str(inserted_id) for inserted_id in result.inserted_ids]
+    
+    def _new_order_doc(self, order_data: Dict[str, Any]) -> Dict[str, Any]:
+        now = datetime.utcnow()
+        return {
+            **order_data,
+            "files": [],
+            "status_history": [{
+                "status": order_data.get("status"),
+                "changed_at": now,
+                "changed_by": order_data.get("created_by")
+            }],
+            "created_at": now,
+            "updated_at": now
+        }
+    
     async def get_orders(
         self,
         skip: int = 0,
@@ -32,29 +51,33 @@ class ProcurementRepository:
         catalog_number: Optional[str] = None,
         manufacturer: Optional[str] = None,
         status_in: Optional[List[str]] = None,
-        status_ne: Optional[str] = None
-    ) -> tuple[List[Dict[str, Any]], int]:
-        """Get all procurement orders with pagination and filters"""
-        # Build filter
-        filter_query = {}
-        if catalog_number:
-            filter_query["catalog_number"] = {"$regex": catalog_number, "$options": "i"}
-        if manufacturer:
-            filter_query["manufacturer"] = {"$regex": manufacturer, "$options": "i"}
-        
-        if status_in:
-            filter_query["status"] = {"$in": status_in}
-        elif status_ne:
-            filter_query["status"] = {"$ne": status_ne}
-            
-        print(f"DEBUG REPO: filter_query={filter_query}, status_in={status_in}, status_ne={status_ne}")
+        status_ne: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        after: Optional[str] = None,
+        include_total: bool = True
+    ) -> tuple[List[Dict[str, Any]], Optional[int]]:
+        """
+        Get procurement orders, newest first, with filters.
+        Pages by skip, or by keyset when `after` (a cursor from encode_cursor) is given.
+        """
+        query = ProcurementQuery(
+            catalog_number=catalog_number,
+            manufacturer=manufacturer,
+            status_in=status_in,
+            status_ne=status_ne,
+            date_from=date_from,
+            date_to=date_to
+        )
         
-        # Get total count
-        total = await self.collection.count_documents(filter_query)
+        total = None
+        if include_total:
+            total = await self.collection.count_documents(query.build(), collation=PROCUREMENT_COLLATION)
         
-        # Get orders
-        cursor = self.collection.find(filter_query).sort("order_date", -1).skip(skip).limit(limit)
-        orders = await cursor.to_list(length=limit)
+        cursor = self.collection.find(query.build(after), collation=PROCUREMENT_COLLATION).sort(ORDER_SORT)
+        if not after:
+            cursor = cursor.skip(skip)
+        orders = await cursor.limit(limit).to_list(length=limit)
         
         return [self._format_order(order) for order in orders], total
     
@@ -66,14 +89,22 @@ class ProcurementRepository:
         except Exception:
             return None
     
-    async def update_order(self, order_id: str, update_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Update procurement order"""
+    async def update_order(
+        self,
+        order_id: str,
+        update_data: Dict[str, Any],
+        status_change: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Update procurement order; `status_change` is appended to status_history"""
         try:
             update_data["updated_at"] = datetime.utcnow()
+            update = {"$set": update_data}
+            if status_change:
+                update["$push"] = {"status_history": status_change}
             
             result = await self.collection.find_one_and_update(
                 {"_id": ObjectId(order_id)},
-                {"$set": update_data},
+                update,
                 return_document=True
             )
             
@@ -81,6 +112,33 @@ class ProcurementRepository:
         except Exception:
             return None
     
+    async def get_orders_by_ids(self, order_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Orders by ID (without files / status history). Unknown or invalid IDs are left out."""
+        object_ids = [ObjectId(order_id) for order_id in order_ids if ObjectId.is_valid(order_id)]
+        cursor = self.collection.find({"_id": {"$in": object_ids}}, {"files": 0, "status_history": 0})
+        orders = {}
+        async for doc in cursor:
+            order = self._format_order(doc)
+            orders[order["id"]] = order
+        return orders
+    
+    async def bulk_update_orders(self, updates: List[tuple[str, Dict[str, Any], Optional[Dict[str, Any]]]]) -> int:
+        """
+        Apply (order_id, update_data, status_change) triples in one bulk_write.
+        Returns the number of modified orders.
+        """
+        if not updates:
+            return 0
+        now = datetime.utcnow()
+        operations = []
+        for order_id, update_data, status_change in updates:
+            update = {"$set": {**update_data, "updated_at": now}}
+            if status_change:
+                update["$push"] = {"status_history": status_change}
+            operations.append(UpdateOne({"_id": ObjectId(order_id)}, update))
+        result = await self.collection.bulk_write(operations, ordered=False)
+        return result.modified_count
+    
     async def delete_order(self, order_id: str) -> bool:
         """Delete procurement order"""
         try:
@@ -122,16 +180,103 @@ class ProcurementRepository:
             return None
     
     async def get_file_metadata(self, order_id: str, file_id: str) -> Optional[Dict[str, Any]]:
-        """Get specific file metadata from order"""
-        order = await self.get_order_by_id(order_id)
-        if not order:
+        """Get specific file metadata from order (only that sub-document is fetched)"""
+        try:
+            order = await self.collection.find_one(
+                {"_id": ObjectId(order_id), "files.file_id": file_id},
+                {"_id": 0, "files": {"$elemMatch": {"file_id": file_id}}}
+            )
+        except Exception:
             return None
         
-        for file in order.get("files", []):
-            if file["file_id"] == file_id:
-                return file
-        
-        return None
+        if not order or not order.get("files"):
+            return None
+        return order["files"][0]
+    
+    async def get_stats(self) -> Dict[str, Any]:
+        """Counts and amounts by status, manufacturer and month, plus lead times - one $facet pass"""
+        def first_change_to(status: str) -> Dict[str, Any]:
+            return {"$min": {"$map": {
+                "input": {"$filter": {
+                    "input": {"$ifNull": ["$status_history", []]},
+                    "cond": {"$eq": ["$$this.status", status]}
+                }},
+                "in": "$$this.changed_at"
+            }}}
+
+        def totals_by(key: Any) -> List[Dict[str, Any]]:
+            return [{"$group": {"_id": key, "count": {"$sum": 1}, "amount": {"$sum": "$amount"}}}]
+
+        pipeline = [
+            {"$facet": {
+                "totals": totals_by(None),
+                "by_status": totals_by("$status") + [{"$sort": {"count": -1}}],
+                "by_manufacturer": totals_by("$manufacturer") + [{"$sort": {"amount": -1}}],
+                "by_month": totals_by({"$dateToString": {"format": "%Y-%m", "date": "$order_date"}})
+                    + [{"$sort": {"_id": 1}}],
+                "lead_time": [
+                    {"$match": {"status_history.status": "received"}},
+                    {"$project": {
+                        "days": {"$divide": [
+                            {"$subtract": [
+                                first_change_to("received"),
+                                {"$ifNull": [first_change_to("waiting_emf"), "$created_at"]}
+                            ]},
+                            24 * 60 * 60 * 1000
+                        ]}
+                    }},
+                    {"$group": {
+                        "_id": None,
+                        "orders": {"$sum": 1},
+                        "avg_days": {"$avg": "$days"},
+                        "min_days": {"$min": "$days"},
+                        "max_days": {"$max": "$days"}
+                    }}
+                ]
+            }}
+        ]
+        result = await self.collection.aggregate(pipeline).to_list(length=1)
+        facets = result[0] if result else {}
+
+        def buckets(name: str) -> List[Dict[str, Any]]:
+            return [
+                {"key": doc["_id"] or "", "count": doc["count"], "amount": doc["amount"]}
+                for doc in facets.get(name, [])
+            ]
+
+        totals = (facets.get("totals") or [{}])[0]
+        lead_time = (facets.get("lead_time") or [{}])[0]
+        lead_time.pop("_id", None)
+        return {
+            "total_orders": totals.get("count", 0),
+            "total_amount": totals.get("amount", 0),
+            "by_status": buckets("by_status"),
+            "by_manufacturer": buckets("by_manufacturer"),
+            "by_month": buckets("by_month"),
+            "lead_time": {"orders": 0, **lead_time}
+        }
+
+    async def count_blob_references(self) -> Dict[str, int]:
+        """sha256 -> number of file entries referencing that blob"""
+        pipeline = [
+            {"$match": {"files.sha256": {"$type": "string"}}},
+            {"$unwind": "$files"},
+            {"$match": {"files.sha256": {"$type": "string"}}},
+            {"$group": {"_id": "$files.sha256", "count": {"$sum": 1}}}
+        ]
+        return {doc["_id"]: doc["count"] async for doc in self.collection.aggregate(pipeline)}
+
+    async def get_file_locations(self) -> set[str]:
+        """Every s3_key / local_path referenced by a file entry"""
+        pipeline = [
+            {"$match": {"files.0": {"$exists": True}}},
+            {"$unwind": "$files"},
+            {"$project": {"_id": 0, "s3_key": "$files.s3_key", "local_path": "$files.local_path"}}
+        ]
+        locations = set()
+        async for doc in self.collection.aggregate(pipeline):
+            locations.update(value for value in (doc.get("s3_key"), doc.get("local_path")) if value)
+        return locations
     
     def _format_order(self, order: Dict[str, Any]) -> Dict[str, Any]:
         """Format order document for response"""
@@ -0,0 +1,238 @@
+"""
+Repository for the inventory / procurement reconciliation report.
+
+The report is materialized into 'procurement-reconciliation' (one document per
+catalog number) by a single aggregation over procurement_orders with a $lookup
+into inventory, written with $merge.
+
+Catalog numbers are matched case-insensitively (PROCUREMENT_COLLATION), so a
+row's _id is the lower-cased catalog number and the results collection has
+PROCUREMENT_COLLATION as its default collation: $merge requires its 'on' index
+to share the aggregation's collation, and the stale-row delete must match
+catalog numbers the way the aggregation grouped them.
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+
+from app.db.indexes import INDEXES
+from app.db.instrumentation import instrument
+from app.db.mongodb import MongoDB
+from app.db.utils.procurement_query import PROCUREMENT_COLLATION, prefix_range
+
+# Orders still on their way
+OPEN_STATUSES = ["waiting_emf", "waiting_bom", "ordered"]
+
+
+def _number(expression: Any) -> Dict[str, Any]:
+    """Numeric value of a field that may hold a string ('5') or be missing"""
+    return {"$convert": {"input": expression, "to": "double", "onError": 0, "onNull": 0}}
+
+
+class ReconciliationRepository:
+    """Builds and reads the reconciliation report."""
+
+    STATE_ID = "state"
+
+    def __init__(
+        self,
+        results_collection_name: str = "procurement-reconciliation",
+        state_collection_name: str = "procurement-reconciliation-state"
+    ):
+        self.orders_collection = instrument(MongoDB.get_collection("procurement_orders"))
+        self.items_collection = instrument(MongoDB.get_collection("inventory"))
+        self.results_collection = instrument(MongoDB.get_collection(results_collection_name))
+        self.state_collection = instrument(MongoDB.get_collection(state_collection_name))
+        self._results_indexes = INDEXES.get(results_collection_name, [])
+        self._results_collated = False
+
+    async def ensure_results_collection(self) -> bool:
+        """
+        Make sure the results collection has PROCUREMENT_COLLATION as its default collation.
+        A collection created without it is dropped and created again with its indexes.
+
+        Returns:
+            True when the collection was (re)created - its rows must be rebuilt in full
+        """
+        if self._results_collated:
+            return False
+        collation = (await self.results_collection.options()).get("collation") or {}
+        if all(collation.get(key) == value for key, value in PROCUREMENT_COLLATION.items()):
+            self._results_collated = True
+            return False
+
+        await self.results_collection.drop()
+        try:
+            await self.results_collection.database.create_collection(
+                self.results_collection.name, collation=PROCUREMENT_COLLATION
+            )
+        except CollectionInvalid:
+            pass  # Created concurrently
+        for keys, options in self._results_indexes:
+            await self.results_collection.create_index(keys, **options)
+        self._results_collated = True
+        return True
+
+    def _pipeline(self, catalog_numbers: Optional[List[str]], computed_at: datetime) -> List[Dict[str, Any]]:
+        match: Dict[str, Any] = {"catalog_number": {"$type": "string"}}
+        if catalog_numbers is not None:
+            match = {"catalog_number": {"$in": catalog_numbers}}
+
+        def quantity_if(condition: Dict[str, Any]) -> Dict[str, Any]:
+            return {"$sum": {"$cond": [condition, "$quantity", 0]}}
+
+        return [
+            {"$match": match},
+            {"$group": {
+                # Same key for every spelling the collation groups together
+                "_id": {"$toLower": "$catalog_number"},
+                "catalog_number": {"$first": "$catalog_number"},
+                "manufacturer": {"$last": "$manufacturer"},
+                "ordered_qty": quantity_if({"$in": ["$status", OPEN_STATUSES]}),
+                "received_qty": quantity_if({"$eq": ["$status", "received"]}),
+                "open_orders": {"$sum": {"$cond": [{"$in": ["$status", OPEN_STATUSES]}, 1, 0]}},
+                "last_order_date": {"$max": "$order_date"}
+            }},
+            # Equality $lookup (localField/foreignField) uses the inventory catalog_number index
+            {"$lookup": {
+                "from": self.items_collection.name,
+                "localField": "catalog_number",
+                "foreignField": "catalog_number",
+                "pipeline": [
+                    # Allocations are copied on every item of a (catalog, location) - count them once
+                    {"$group": {
+                        "_id": "$location",
+                        "on_hand": {"$sum": {"$ifNull": ["$stock_qty", _number("$current_stock")]}},
+                        "allocations": {"$first": {"$ifNull": ["$project_allocations", {}]}},
+                        "items": {"$sum": 1}
+                    }},
+                    {"$group": {
+                        "_id": None,
+                        "on_hand": {"$sum": "$on_hand"},
+                        "reserved": {"$sum": {"$sum": {"$map": {
+                            "input": {"$objectToArray": "$allocations"},
+                            "in": _number("$$this.v")
+                        }}}},
+                        "items": {"$sum": "$items"},
+                        "locations": {"$sum": 1}
+                    }}
+                ],
+                "as": "stock"
+            }},
+            {"$set": {"stock": {"$ifNull": [{"$first": "$stock"}, {}]}}},
+            {"$set": {
+                "on_hand_qty": {"$ifNull": ["$stock.on_hand", 0]},
+                "reserved_qty": {"$ifNull": ["$stock.reserved", 0]},
+                "inventory_items": {"$ifNull": ["$stock.items", 0]},
+                "inventory_locations": {"$ifNull": ["$stock.locations", 0]},
+                "computed_at": computed_at
+            }},
+            {"$set": {
+                "available_qty": {"$subtract": ["$on_hand_qty", "$reserved_qty"]},
+                # Received but not (yet) entered into inventory
+                "missing_qty": {"$max": [0, {"$subtract": ["$received_qty", "$on_hand_qty"]}]}
+            }},
+            {"$set": {
+                "state": {"$switch": {
+                    "branches": [
+                        {"case": {"$gt": ["$missing_qty", 0]}, "then": "missing"},
+                        {"case": {"$gt": ["$ordered_qty", 0]}, "then": "on_order"}
+                    ],
+                    "default": "ok"
+                }}
+            }},
+            {"$unset": "stock"},
+            {"$merge": {
+                "into": self.results_collection.name,
+                "on": "_id",
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }}
+        ]
+
+    async def rebuild(self, catalog_numbers: Optional[List[str]], computed_at: datetime) -> int:
+        """
+        Recompute the rows of `catalog_numbers` (None = all catalog numbers).
+        Rows of those catalog numbers that no longer have orders are removed.
+
+        Returns:
+            Number of rows in the report after the run
+        """
+        # Collated like the catalog_number indexes of both collections
+        await self.orders_collection.aggregate(
+            self._pipeline(catalog_numbers, computed_at), collation=PROCUREMENT_COLLATION
+        ).to_list(length=None)
+
+        stale: Dict[str, Any] = {"computed_at": {"$lt": computed_at}}
+        if catalog_numbers is not None:
+            stale["_id"] = {"$in": [value.lower() for value in catalog_numbers]}
+        await self.results_collection.delete_many(stale, collation=PROCUREMENT_COLLATION)
+        return await self.results_collection.estimated_document_count()
+
+    async def changed_catalog_numbers(self, since: datetime) -> List[str]:
+        """Catalog numbers of orders and items written after `since`"""
+        changed = set()
+        for collection in (self.orders_collection, self.items_collection):
+            changed.update(await collection.distinct("catalog_number", {"updated_at": {"$gt": since}}))
+        return [value for value in changed if isinstance(value, str)]
+
+    async def get_page(
+        self,
+        skip: int = 0,
+        limit: int = 50,
+        state: Optional[str] = None,
+        catalog_number: Optional[str] = None
+    ) -> tuple[List[Dict[str, Any]], int]:
+        query: Dict[str, Any] = {}
+        if state:
+            query["state"] = state
+        if catalog_number:
+            query["_id"] = prefix_range(catalog_number)
+
+        total = await self.results_collection.count_documents(query)
+        cursor = (
+            self.results_collection.find(query, {"_id": 0})
+            .sort([("missing_qty", -1), ("ordered_qty", -1), ("_id", 1)])
+            .skip(skip)
+            .limit(limit)
+        )
+        return await cursor.to_list(length=limit), total
+
+    # ========== Job state ==========
+
+    async def acquire_lease(self, owner: str, seconds: int) -> bool:
+        """Take (or extend) the run lease so only one replica rebuilds at a time"""
+        now = datetime.utcnow()
+        try:
+            await self.state_collection.find_one_and_update(
+                {"_id": self.STATE_ID, "$or": [{"locked_until": {"$lt": now}}, {"owner": owner}]},
+                {"$set": {"owner": owner, "locked_until": now + timedelta(seconds=seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            return True
+        except DuplicateKeyError:
+            return False  # Held by another replica
+
+    async def release_lease(self, owner: str) -> None:
+        await self.state_collection.update_one(
+            {"_id": self.STATE_ID, "owner": owner},
+            {"$set": {"locked_until": datetime.utcnow()}}
+        )
+
+    async def get_state(self) -> Dict[str, Any]:
+        return await self.state_collection.find_one({"_id": self.STATE_ID}, {"_id": 0}) or {}
+
+    async def save_run(self, watermark: datetime, full: bool, rows: int, duration_ms: float) -> None:
+        update = {
+            "watermark": watermark,
+            "last_run_at": datetime.utcnow(),
+            "last_run_full": full,
+            "last_run_ms": duration_ms,
+            "rows": rows
+        }
+        if full:
+            update["last_full_run_at"] = update["last_run_at"]
+        await self.state_collection.update_one({"_id": self.STATE_ID}, {"$set": update}, upsert=True)
@@ -0,0 +1,106 @@
+"""
+Index-friendly filters for the procurement orders list.
+
+- catalog_number / manufacturer match as case-insensitive *prefixes*: a range
+  [value, value + U+FFFF) under PROCUREMENT_COLLATION, which the collated
+  indexes in app/db/indexes.py can serve (an unanchored $regex cannot)
+- status_ne is rewritten to $in over the remaining statuses, so the
+  (status, order_date) index is used as a merge of sorted ranges
+- Keyset pagination: ORDER_SORT is total (order_date, _id) and a cursor
+  encodes the last row of the previous page
+- Dates are compared as stored: naive UTC (timezone-aware bounds are converted)
+"""
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+import base64
+import json
+
+from bson import ObjectId
+
+from app.core.exceptions import BadRequestException
+from app.schemas.procurement import ProcurementStatus
+
+# Case-insensitive, accent-sensitive. Queries and indexes must use the same collation.
+PROCUREMENT_COLLATION = {"locale": "en", "strength": 2}
+
+ORDER_SORT = [("order_date", -1), ("_id", -1)]
+
+# Sorts after every other character under ICU collation
+_PREFIX_END = "\uffff"
+
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC; normalize timezone-aware input to match."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def prefix_range(value: str) -> Dict[str, str]:
+    return {"$gte": value, "$lt": value + _PREFIX_END}
+
+
+def encode_cursor(order: Dict[str, Any]) -> str:
+    """Cursor pointing after a formatted order (needs 'order_date' and 'id')"""
+    payload = json.dumps([order["order_date"].isoformat(), order["id"]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, ObjectId]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        order_date, order_id = json.loads(base64.urlsafe_b64decode(padded))
+        return _to_naive_utc(datetime.fromisoformat(order_date)), ObjectId(order_id)
+    except Exception:
+        raise BadRequestException("סמן עמוד לא תקין")
+
+
+class ProcurementQuery:
+    """Filter for the procurement orders list"""
+
+    def __init__(
+        self,
+        catalog_number: Optional[str] = None,
+        manufacturer: Optional[str] = None,
+        status_in: Optional[List[str]] = None,
+        status_ne: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None
+    ):
+        self.catalog_number = catalog_number
+        self.manufacturer = manufacturer
+        self.status_in = status_in
+        self.status_ne = status_ne
+        self.date_from = _to_naive_utc(date_from) if date_from else None
+        self.date_to = _to_naive_utc(date_to) if date_to else None
+
+    def build(self, after: Optional[str] = None) -> Dict[str, Any]:
+        """Mongo filter; `after` is a cursor from encode_cursor"""
+        query: Dict[str, Any] = {}
+        if self.catalog_number:
+            query["catalog_number"] = prefix_range(self.catalog_number)
+        if self.manufacturer:
+            query["manufacturer"] = prefix_range(self.manufacturer)
+
+        if self.status_in:
+            query["status"] = {"$in": self.status_in}
+        elif self.status_ne:
+            query["status"] = {"$in": [s.value for s in ProcurementStatus if s.value != self.status_ne]}
+
+        order_date: Dict[str, Any] = {}
+        if self.date_from:
+            order_date["$gte"] = self.date_from
+        if self.date_to:
+            order_date["$lt"] = self.date_to
+
+        if after:
+            last_date, last_id = decode_cursor(after)
+            # $lte bounds the index scan, $or breaks ties on _id
+            if "$lt" not in order_date or last_date < order_date["$lt"]:
+                order_date.pop("$lt", None)
+                order_date["$lte"] = last_date
+            query["$or"] = [{"order_date": {"$lt": last_date}}, {"_id": {"$lt": last_id}}]
+
+        if order_date:
+            query["order_date"] = order_date
+        return query
@@ -1,7 +1,70 @@
+"""
+Mongo filters for the items list.
+
+Identifier fields (MATCH_FIELDS) take a small match syntax:
+
+- "abc" / "*abc"  contains, ignoring case (the default, as typed in the column
+  filters) - the only form sent as $regex
+- "abc*"  prefix match, ignoring case
+- "=abc"  exact match, ignoring case
+
+Exact and prefix matches are equality / range predicates evaluated under
+ITEMS_COLLATION, so the collated inventory indexes in app/db/indexes.py serve
+them. Queries with such filters must run with ITEMS_COLLATION (see
+MongoQueryBuilder.collation); others run without one so that the default
+updated_at sort keeps using its plain index.
+"""
+from enum import Enum
 from typing import Dict, Any, Optional
+import re
+
 from app.schemas.item import ItemFilter
+from app.db.utils.procurement_query import PROCUREMENT_COLLATION, prefix_range
+
+# Case-insensitive; shared with procurement so one inventory catalog_number index serves both
+ITEMS_COLLATION = PROCUREMENT_COLLATION
+
+# Fields filtered with the exact / prefix / contains syntax
+MATCH_FIELDS = ("catalog_number", "serial", "manufacturer", "location", "target_site")
+
+
+class MatchMode(str, Enum):
+    EXACT = "exact"
+    PREFIX = "prefix"
+    CONTAINS = "contains"
+
+
+def parse_match(value: str) -> tuple[MatchMode, str]:
+    """Split a filter value into its match mode and the text to match"""
+    if value.startswith("="):
+        return MatchMode.EXACT, value[1:]
+    if value.endswith("*") and not value.startswith("*"):
+        return MatchMode.PREFIX, value.rstrip("*")
+    return MatchMode.CONTAINS, value.strip("*")
+
+
+def match_condition(value: str) -> Optional[Any]:
+    """Mongo condition for a MATCH_FIELDS filter value; None when there is nothing to match"""
+    mode, text = parse_match(value)
+    if not text:
+        return None
+    if mode == MatchMode.EXACT:
+        return text
+    if mode == MatchMode.PREFIX:
+        return prefix_range(text)
+    return {"$regex": re.escape(text), "$options": "i"}
+
 
 class MongoQueryBuilder:
+    @staticmethod
+    def collation(filter_params: ItemFilter) -> Optional[Dict[str, Any]]:
+        """Collation to run build_search_query's filter with"""
+        for field in MATCH_FIELDS:
+            value = getattr(filter_params, field)
+            if value and parse_match(value)[0] != MatchMode.CONTAINS:
+                return ITEMS_COLLATION
+        return None
+
     @staticmethod
     def build_search_query(filter_params: ItemFilter) -> Dict[str, Any]:
         query = {}
@@ -20,20 +83,23 @@ class MongoQueryBuilder:
                 {"notes": search_regex},
                 {"current_stock": search_regex},
                 # Add reserved_stock if still relevant or kept for compat
-                {"reserved_stock": search_regex}, 
+                {"reserved_stock": search_regex},
             ]
 
-        # Specific Field Filters
+        # Identifier filters: exact / prefix / contains
+        for field in MATCH_FIELDS:
+            value = getattr(filter_params, field)
+            if value:
+                condition = match_condition(value)
+                if condition is not None:
+                    query[field] = condition
+
+        # Free-text filters
         specific_filters = {
-            "catalog_number": filter_params.catalog_number,
-            "serial": filter_params.serial,
-            "manufacturer": filter_params.manufacturer,
             "description": filter_params.description,
-            "location": filter_params.location,
             "current_stock": filter_params.current_stock,
             "warranty_expiry": filter_params.warranty_expiry,
             "purpose": filter_params.purpose,
-            "target_site": filter_params.target_site,
             "notes": filter_params.notes
         }
 
@@ -41,6 +107,14 @@ class MongoQueryBuilder:
             if value:
                 query[field] = {"$regex": value, "$options": "i"}
 
+        stock_range = {}
+        if filter_params.stock_min is not None:
+            stock_range["$gte"] = filter_params.stock_min
+        if filter_params.stock_max is not None:
+            stock_range["$lte"] = filter_params.stock_max
+        if stock_range:
+            query["stock_qty"] = stock_range
+
         # Special handling for project_allocations (mapped to reserved_stock string for search)
         # Special handling for project_allocations
         if filter_params.project_allocations:
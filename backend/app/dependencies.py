@@ -1,41 +1,95 @@
-from fastapi import Depends
+from fastapi import Depends, Request
 
 from app.db.mongodb import MongoDB
 from app.db.repositories.items import ItemsRepository
+from app.db.repositories.procurement_repository import ProcurementRepository
 from app.services.item_service import ItemService
 # LogService removed
 from app.services.excel_service import ExcelService
 from app.services.auth_service import AuthService
 from app.services.analytics_service import AnalyticsService
 from app.services.audit_service import AuditService
+from app.services.user_service import UserService
+from app.services.group_service import GroupService
+from app.services.procurement_service import ProcurementService
+from app.services.s3_service import S3Service
+from app.services.blob_store import BlobStore
+from app.services.storage_cleanup import StorageCleanupQueue
+from app.services.reconciliation_service import ReconciliationService
+
+
+class ServiceContainer:
+    """
+    Services and repositories shared by all requests of this process.
+    Built once in the app lifespan, after MongoDB.connect().
+    """
+
+    def __init__(self):
+        # Repositories
+        self.items_repository = ItemsRepository(MongoDB.get_collection("inventory"))
+        self.procurement_repository = ProcurementRepository()
+
+        # Services
+        self.audit_service = AuditService()
+        self.s3_service = S3Service()
+        self.user_service = UserService()
+        self.group_service = GroupService()
+        self.item_service = ItemService(self.items_repository, self.audit_service)
+        self.excel_service = ExcelService(self.items_repository, self.audit_service)
+        self.analytics_service = AnalyticsService(self.items_repository, self.audit_service)
+        self.auth_service = AuthService(self.user_service, self.group_service)
+        self.storage_cleanup = StorageCleanupQueue(self.s3_service)
+        self.blob_store = BlobStore(
+            self.s3_service,
+            procurement_repository=self.procurement_repository,
+            cleanup_queue=self.storage_cleanup
+        )
+        self.procurement_service = ProcurementService(
+            self.procurement_repository, self.s3_service, self.audit_service, self.blob_store
+        )
+        self.reconciliation_service = ReconciliationService()
+
+
+def get_container(request: Request) -> ServiceContainer:
+    container = getattr(request.app.state, "container", None)
+    if container is None:
+        # App served without its lifespan (e.g. httpx ASGITransport in tests)
+        container = ServiceContainer()
+    return container
+
 
 # Repositories
-def get_items_repository() -> ItemsRepository:
-    collection = MongoDB.get_collection("inventory")
-    return ItemsRepository(collection)
+def get_items_repository(container: ServiceContainer = Depends(get_container)) -> ItemsRepository:
+    return container.items_repository
 
 # LogService removed
 
-def get_audit_service() -> AuditService:
-    return AuditService()
-
-def get_item_service(
-    items_repo: ItemsRepository = Depends(get_items_repository),
-    audit_service: AuditService = Depends(get_audit_service)
-) -> ItemService:
-    return ItemService(items_repo, audit_service)
-
-def get_excel_service(
-    items_repo: ItemsRepository = Depends(get_items_repository),
-    audit_service: AuditService = Depends(get_audit_service)
-) -> ExcelService:
-    return ExcelService(items_repo, audit_service)
-
-def get_auth_service() -> AuthService:
-    return AuthService()
-
-def get_analytics_service(
-    items_repo: ItemsRepository = Depends(get_items_repository),
-    audit_service: AuditService = Depends(get_audit_service)
-) -> AnalyticsService:
-    return AnalyticsService(items_repo, audit_service)
+def get_audit_service(container: ServiceContainer = Depends(get_container)) -> AuditService:
+    return container.audit_service
+
+def get_item_service(container: ServiceContainer = Depends(get_container)) -> ItemService:
+    return container.item_service
+
+def get_excel_service(container: ServiceContainer = Depends(get_container)) -> ExcelService:
+    return container.excel_service
+
+def get_auth_service(container: ServiceContainer = Depends(get_container)) -> AuthService:
+    return container.auth_service
+
+def get_analytics_service(container: ServiceContainer = Depends(get_container)) -> AnalyticsService:
+    return container.analytics_service
+
+def get_user_service(container: ServiceContainer = Depends(get_container)) -> UserService:
+    return container.user_service
+
+def get_group_service(container: ServiceContainer = Depends(get_container)) -> GroupService:
+    return container.group_service
+
+def get_blob_store(container: ServiceContainer = Depends(get_container)) -> BlobStore:
+    return container.blob_store
+
+def get_procurement_service(container: ServiceContainer = Depends(get_container)) -> ProcurementService:
+    return container.procurement_service
+
+def get_reconciliation_service(container: ServiceContainer = Depends(get_container)) -> ReconciliationService:
+    return container.reconciliation_service
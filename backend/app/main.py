@@ -1,12 +1,28 @@
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.middleware.gzip import GZipMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
+from contextlib import asynccontextmanager
+import hmac
 import logging
 import time
 
 from app.config import settings
 from app.db.mongodb import MongoDB
+from app.db.indexes import ensure_collections, ensure_indexes
+from app.db.change_streams import change_listener
+from app.core.events import event_bus
+from app.core import metrics
+from app.core.compression import SelectiveGZipMiddleware
+from app.core.loop_diagnostics import blocking_detector
+from app.core.password import shutdown_password_pool
+from app.core.rate_limit import on_user_event
+from app.services.group_service import group_directory
+from app.services.procurement_service import on_procurement_event
+from app.services.auth_service import AuthService, REVOKED_TOKENS_COLLECTION
+from app.services.activity_rollup import hourly_activity_buffer
+from app.services.item_events import item_event_broker
+from app.services.reconciliation_service import SOURCE_COLLECTIONS
+from app.dependencies import ServiceContainer
 from app.routes.api import api_router
 
 # Configure logging
@@ -16,7 +32,71 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup / shutdown of process-wide resources."""
+    try:
+        # Connect to MongoDB
+        await MongoDB.connect()
+        await ensure_collections()
+        await ensure_indexes()
+        hourly_activity_buffer.start()
+        metrics.loop_lag_monitor.start()
+        if settings.LOOP_DIAGNOSTICS_ENABLED:
+            blocking_detector.enable()
+        metrics.activity_rollup_pending.set_function(lambda: len(hourly_activity_buffer))
+
+        # Token revocations made on any replica
+        await AuthService.load_revoked_tokens()
+        event_bus.subscribe(REVOKED_TOKENS_COLLECTION, AuthService.on_revoked_token_event)
+        event_bus.subscribe("users", on_user_event)
+        event_bus.subscribe("groups", group_directory.on_change_event)
+        event_bus.subscribe("procurement_orders", on_procurement_event)
+        event_bus.subscribe("inventory", item_event_broker.on_change_event)
+
+        # Publish writes from every replica to in-process subscribers
+        if settings.CHANGE_STREAMS_ENABLED:
+            await change_listener.start()
+        
+        # Initialize first admin from env vars
+        from app.db.init_admin import init_admin
+        await init_admin()
+
+        # Services and repositories shared by all requests
+        app.state.container = ServiceContainer()
+        app.state.container.storage_cleanup.start()
+        storage_cleanup = app.state.container.storage_cleanup
+        metrics.storage_cleanup_pending.set_function(lambda: len(storage_cleanup))
+        reconciliation_service = app.state.container.reconciliation_service
+        for collection_name in SOURCE_COLLECTIONS:
+            event_bus.subscribe(collection_name, reconciliation_service.on_change_event)
+        reconciliation_service.start()
+        
+        # Verify MongoDB connection
+        collection = MongoDB.get_collection("inventory")
+        count = await collection.count_documents({})
+        logger.info(f"✅ MongoDB connected successfully. Total items: {count}")
+        
+    except Exception as e:
+        logger.error(f"❌ Startup error: {e}")
+        raise
+
+    yield
+
+    # Shutdown
+    await app.state.container.reconciliation_service.stop()
+    await app.state.container.storage_cleanup.stop()
+    await change_listener.stop()
+    await hourly_activity_buffer.stop()
+    await metrics.loop_lag_monitor.stop()
+    blocking_detector.disable()
+    await MongoDB.disconnect()
+    shutdown_password_pool()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="מערכת ניהול מלאי",
     description="מערכת מתקדמת לניהול מלאי מחסן עם אפשרויות חיפוש, עריכה ויבוא מאקסל",
     version="2.0.0"
@@ -31,8 +111,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Compression Middleware - compress responses > 1KB
-app.add_middleware(GZipMiddleware, minimum_size=1000)
+# Compression Middleware - compress responses > 1KB. Stored attachments are sent
+# as-is, keeping sendfile, Content-Length and byte ranges intact.
+app.add_middleware(
+    SelectiveGZipMiddleware,
+    exclude_paths=[r"/api/procurement/orders/[^/]+/files/[^/]+"],
+    minimum_size=1000
+)
+
+
+def _observe_request(request: Request, status: int, seconds: float) -> None:
+    # Route template, not the raw path, keeps the label set bounded
+    route = request.scope.get("route")
+    metrics.observe_request(request.method, getattr(route, "path", "unmatched"), status, seconds)
 
 
 @app.middleware("http")
@@ -45,44 +136,20 @@ async def add_private_network_header(request: Request, call_next):
 
 @app.middleware("http")
 async def add_process_time_header(request: Request, call_next):
-    """Add response time header for monitoring."""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+    """Add response time header and record the request latency metric."""
+    start_time = time.perf_counter()
+    try:
+        response = await call_next(request)
+    except Exception:
+        _observe_request(request, 500, time.perf_counter() - start_time)
+        raise
+    process_time = time.perf_counter() - start_time
+    _observe_request(request, response.status_code, process_time)
     response.headers["X-Process-Time"] = str(process_time)
     logger.debug(f"{request.method} {request.url.path} - {process_time:.3f}s")
     return response
 
 
-# Startup Event
-@app.on_event("startup")
-async def startup_db_client():
-    """Initialize database connection."""
-    try:
-        # Connect to MongoDB
-        await MongoDB.connect()
-        
-        # Initialize first admin from env vars
-        from app.db.init_admin import init_admin
-        await init_admin()
-        
-        # Verify MongoDB connection
-        collection = MongoDB.get_collection("inventory")
-        count = await collection.count_documents({})
-        logger.info(f"✅ MongoDB connected successfully. Total items: {count}")
-        
-    except Exception as e:
-        logger.error(f"❌ Startup error: {e}")
-        raise
-
-
-# Shutdown Event
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    """Close database connection."""
-    await MongoDB.disconnect()
-
-
 # Include API routes
 app.include_router(api_router)
 
@@ -97,6 +164,20 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    """Prometheus metrics of this replica (bearer METRICS_TOKEN; 404 while unset)."""
+    if not settings.METRICS_TOKEN:
+        return Response(status_code=404)
+    expected = f"Bearer {settings.METRICS_TOKEN}"
+    if not hmac.compare_digest(request.headers.get("authorization", "").encode(), expected.encode()):
+        return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    body = metrics.render()
+    if body is None:
+        return Response("prometheus_client is not installed", status_code=503, media_type="text/plain")
+    return Response(body, media_type=metrics.CONTENT_TYPE_LATEST)
+
+
 @app.get("/health")
 async def health_check():
     """
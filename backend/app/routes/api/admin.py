@@ -1,22 +1,19 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Query, Request
 from typing import List
 
 from app.schemas.user import UserCreate, UserUpdate, UserResponse, UsersListResponse, DeleteRequest
 from app.services.user_service import UserService
 from app.services.audit_service import AuditService
+from app.dependencies import get_user_service, get_audit_service
 from app.core.security import get_current_user, require_admin
+from app.db.instrumentation import query_profiler
+from app.core.loop_diagnostics import blocking_detector
+from app.core.metrics import loop_lag_monitor
+from app.schemas.diagnostics import SlowQueriesResponse, SlowQueryOrder, BlockingCallsResponse
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
 
-def get_user_service():
-    return UserService()
-
-
-def get_audit_service():
-    return AuditService()
-
-
 @router.get("/users", response_model=UsersListResponse)
 async def get_users(
     current_user: dict = Depends(require_admin),
@@ -117,3 +114,45 @@ async def get_user_stats(
     """Get user statistics for admin dashboard"""
     return await user_service.get_user_stats()
 
+
+@router.get("/slow-queries", response_model=SlowQueriesResponse)
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    order_by: SlowQueryOrder = SlowQueryOrder.TOTAL_MS,
+    current_user: dict = Depends(require_admin)
+):
+    """Slowest Mongo query shapes of this replica with sampled plans (admin only)"""
+    return {
+        "slow_ms": query_profiler.slow_ms,
+        "shapes": query_profiler.top(limit, order_by.value)
+    }
+
+
+@router.delete("/slow-queries")
+async def reset_slow_queries(current_user: dict = Depends(require_admin)):
+    """Clear the collected query statistics of this replica (admin only)"""
+    query_profiler.reset()
+    return {"message": "Query statistics cleared"}
+
+
+@router.get("/blocking-calls", response_model=BlockingCallsResponse)
+async def get_blocking_calls(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(require_admin)
+):
+    """Event loop lag and the call sites that blocked the loop on this replica (admin only)"""
+    return {
+        "enabled": blocking_detector.enabled,
+        "unsupported_loop": blocking_detector.unsupported_loop,
+        "threshold_ms": blocking_detector.threshold_ms,
+        "loop_lag_ms": loop_lag_monitor.last_lag * 1000,
+        "max_block_ms": blocking_detector.max_block_ms,
+        "sites": blocking_detector.top(limit)
+    }
+
+
+@router.delete("/blocking-calls")
+async def reset_blocking_calls(current_user: dict = Depends(require_admin)):
+    """Clear the collected blocking call sites of this replica (admin only)"""
+    blocking_detector.reset()
+    return {"message": "Blocking call statistics cleared"}
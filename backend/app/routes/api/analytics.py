@@ -1,6 +1,9 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from datetime import datetime
 from app.services.analytics_service import AnalyticsService
-from app.core.security import get_current_user
+from app.schemas.analytics import ActivityBucketSize, ActivityGroupBy
+from app.core.security import get_current_user, require_admin
 from app.dependencies import get_analytics_service
 
 router = APIRouter(prefix="/analytics", tags=["Analytics"])
@@ -20,6 +23,33 @@ async def get_activity_stats(
 ):
     return await service.get_activity_stats(days)
 
+@router.get("/activity/daily")
+async def get_daily_activity(
+    days: int = Query(7, ge=1, le=365),
+    current_user: dict = Depends(get_current_user),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    return await service.get_daily_activity(days)
+
+@router.get("/activity/series")
+async def get_activity_series(
+    bucket: ActivityBucketSize = Query(ActivityBucketSize.DAY, description="Bucket size"),
+    group_by: ActivityGroupBy = Query(ActivityGroupBy.ACTION, description="Split series by"),
+    start_date: Optional[datetime] = Query(None, description="Range start (UTC)"),
+    end_date: Optional[datetime] = Query(None, description="Range end (UTC)"),
+    current_user: dict = Depends(get_current_user),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    return await service.get_activity_series(bucket, group_by, start_date, end_date)
+
+@router.post("/activity/rebuild")
+async def rebuild_activity_rollup(
+    current_user: dict = Depends(require_admin),
+    service: AnalyticsService = Depends(get_analytics_service)
+):
+    """Migration tool: rebuild the daily activity rollup from the raw audit logs"""
+    return await service.rebuild_activity_rollup()
+
 @router.get("/item/{catalog_number}")
 async def get_item_stats(
     catalog_number: str,
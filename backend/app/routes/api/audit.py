@@ -8,15 +8,12 @@ from datetime import datetime
 
 from app.schemas.audit import AuditLogsListResponse, AuditAction, AuditLogCreate
 from app.services.audit_service import AuditService
+from app.dependencies import get_audit_service
 from app.core.security import require_admin, get_current_user
 
 router = APIRouter(prefix="/audit", tags=["Audit"])
 
 
-def get_audit_service():
-    return AuditService()
-
-
 @router.get("/logs", response_model=AuditLogsListResponse)
 async def get_audit_logs(
     page: int = Query(1, ge=1, description="Page number"),
@@ -1,27 +1,26 @@
-from fastapi import APIRouter, Response, Depends
+from fastapi import APIRouter, Response, Depends, Request
+from typing import Optional
 
 from app.schemas.auth import LoginRequest, Token, DomainLoginRequest
 from app.schemas.user import PasswordChange
 from app.services.auth_service import AuthService
 from app.services.user_service import UserService
-from app.dependencies import get_auth_service
-from app.core.security import get_current_user
+from app.dependencies import get_auth_service, get_user_service
+from app.core.security import get_current_user, get_request_token, oauth2_scheme
+from app.core.rate_limit import client_ip
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
 
-def get_user_service():
-    return UserService()
-
-
 @router.post("/login", response_model=Token)
 async def login(
+    request: Request,
     login_data: LoginRequest,
     response: Response,
     auth_service: AuthService = Depends(get_auth_service)
 ):
     """התחברות למערכת"""
-    return await auth_service.login(login_data, response)
+    return await auth_service.login(login_data, response, client_ip(request))
 
 
 @router.post("/domain-login", response_model=Token)
@@ -36,12 +35,14 @@ async def domain_login(
 
 @router.post("/logout")
 async def logout(
+    request: Request,
     response: Response,
+    token: Optional[str] = Depends(oauth2_scheme),
     current_user: dict = Depends(get_current_user),
     auth_service: AuthService = Depends(get_auth_service)
 ):
     """התנתקות מהמערכת"""
-    return await auth_service.logout(response)
+    return await auth_service.logout(response, get_request_token(request, token))
 
 
 @router.get("/me")
@@ -2,19 +2,12 @@ from fastapi import APIRouter, Depends
 
 from app.schemas.group import GroupCreate, GroupUpdate, GroupResponse, GroupsListResponse, DeleteRequest
 from app.services.group_service import GroupService
-from app.services.audit_service import AuditService
-
-def get_audit_service():
-    return AuditService()
+from app.dependencies import get_group_service, get_audit_service
 from app.core.security import require_admin
 
 router = APIRouter(prefix="/admin/groups", tags=["Admin - Groups"])
 
 
-def get_group_service():
-    return GroupService()
-
-
 @router.get("", response_model=GroupsListResponse)
 async def get_groups(
     current_user: dict = Depends(require_admin),
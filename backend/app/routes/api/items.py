@@ -1,12 +1,16 @@
-from fastapi import APIRouter, Depends, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import Optional, List
+import asyncio
 
 from app.schemas.item import ItemCreate, ItemUpdate, BulkUpdate, ItemsListResponse, ItemFilter
 from app.schemas.auth import DeleteRequest
 from app.services.item_service import ItemService
+from app.services.item_events import item_event_broker
 from app.dependencies import get_item_service
 from app.core.security import get_current_user, require_admin
 from app.core.exceptions import DeleteConfirmationException
+from app.config import settings
 
 router = APIRouter(prefix="/items", tags=["Items"])
 
@@ -21,6 +25,45 @@ async def get_items(
     return await item_service.get_items(filter_params)
 
 
+@router.get("/events")
+async def item_events(
+        request: Request,
+        ids: Optional[List[str]] = Query(None, description="Only changes to these item IDs"),
+        fields: Optional[List[str]] = Query(None, description="Only changes to these fields"),
+        current_user: dict = Depends(get_current_user)
+):
+    """
+    פיד חי של שינויים בפריטים (Server-Sent Events).
+    Each event carries {type, id, changes}; on 'resync' the client should re-query.
+    Covers writes made by every replica. Delivery is at-least-once, and a change
+    with empty `changes` means the item changed in unknown fields: re-fetch it.
+    """
+    subscription = item_event_broker.subscribe(ids=ids, fields=fields)
+
+    async def event_stream():
+        try:
+            yield "retry: 5000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event_id, change = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        timeout=settings.ITEM_EVENTS_HEARTBEAT_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    # Keeps proxies from closing an idle connection
+                    yield ": heartbeat\n\n"
+                    continue
+                yield f"id: {event_id}\nevent: {change.type.value}\ndata: {change.model_dump_json()}\n\n"
+        finally:
+            item_event_broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/stale", response_model=ItemsListResponse)
 async def get_stale_items(
         days: int = Query(30, ge=1),
@@ -33,6 +76,18 @@ async def get_stale_items(
     return await item_service.get_stale_items(days=days, page=page, limit=limit)
 
 
+@router.get("/warranty-expiring", response_model=ItemsListResponse)
+async def get_expiring_warranties(
+        days: int = Query(90, ge=0, le=3650),
+        page: int = Query(1, ge=1),
+        limit: int = Query(30, ge=1, le=1000),
+        current_user: dict = Depends(get_current_user),
+        item_service: ItemService = Depends(get_item_service)
+):
+    """קבלת פריטים שתוקף האחריות שלהם מסתיים ב-X הימים הקרובים (ברירת מחדל: 90 יום)"""
+    return await item_service.get_expiring_warranties(days=days, page=page, limit=limit)
+
+
 @router.post("")
 async def create_item(
         item: ItemCreate,
@@ -82,6 +137,15 @@ async def fix_reserved_stock(
     return await item_service.fix_all_reserved_stock()
 
 
+@router.post("/backfill-derived-fields")
+async def backfill_derived_fields(
+        current_user: dict = Depends(require_admin),
+        item_service: ItemService = Depends(get_item_service)
+):
+    """Migration tool: set stock_qty / warranty_expiry_date of all items from current_stock / warranty_expiry"""
+    return await item_service.backfill_derived_fields()
+
+
 @router.delete("/{item_id}")
 async def delete_item(
         item_id: str,
@@ -1,26 +1,32 @@
 from fastapi import APIRouter, Depends, UploadFile, File, Query, Request
-from fastapi.responses import StreamingResponse
-from io import BytesIO
+from fastapi.responses import StreamingResponse, FileResponse, Response
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
 from typing import Optional, List
 
-from app.core.security import get_current_user
+from app.core.security import get_current_user, require_admin
+from app.dependencies import get_procurement_service, get_blob_store, get_reconciliation_service
+from app.services.blob_store import BlobStore
+from app.services.reconciliation_service import ReconciliationService
 from app.services.procurement_service import ProcurementService
 from app.schemas.procurement import (
     ProcurementOrderCreate,
     ProcurementOrderUpdate,
     ProcurementOrderResponse,
     ProcurementOrdersListResponse,
+    ProcurementStatsResponse,
+    ProcurementBulkUpdate,
+    ProcurementBulkCreate,
+    ProcurementBulkResponse,
+    ReconciliationState,
+    ReconciliationResponse,
+    ReconciliationRunResponse,
     FileUploadResponse
 )
 
 router = APIRouter(prefix="/procurement", tags=["procurement"])
 
 
-def get_procurement_service() -> ProcurementService:
-    """Dependency to get procurement service"""
-    return ProcurementService()
-
-
 @router.get("/orders", response_model=ProcurementOrdersListResponse)
 async def get_orders(
     page: int = Query(1, ge=1),
@@ -30,10 +36,13 @@ async def get_orders(
     # Use generic Query for list: ?status_in=a&status_in=b
     status_in: Optional[List[str]] = Query(None),
     status_ne: Optional[str] = None,
+    date_from: Optional[datetime] = None,
+    date_to: Optional[datetime] = None,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page (replaces page)"),
+    include_total: bool = True,
     current_user: dict = Depends(get_current_user),
     procurement_service: ProcurementService = Depends(get_procurement_service)
 ):
-    print(f"DEBUG ROUTE: status_in={status_in}, status_ne={status_ne}")
     """Get all procurement orders (all authenticated users)"""
     orders, total = await procurement_service.get_orders(
         page=page,
@@ -41,17 +50,59 @@ async def get_orders(
         catalog_number=catalog_number,
         manufacturer=manufacturer,
         status_in=status_in,
-        status_ne=status_ne
+        status_ne=status_ne,
+        date_from=date_from,
+        date_to=date_to,
+        cursor=cursor,
+        include_total=include_total
     )
     
     return {
         "orders": orders,
         "total": total,
         "page": page,
-        "page_size": page_size
+        "page_size": page_size,
+        "next_cursor": procurement_service.next_cursor(orders, page_size)
     }
 
 
+@router.get("/stats", response_model=ProcurementStatsResponse)
+async def get_stats(
+    current_user: dict = Depends(get_current_user),
+    procurement_service: ProcurementService = Depends(get_procurement_service)
+):
+    """Counts and spend by status / manufacturer / month, and lead times (all authenticated users)"""
+    return await procurement_service.get_stats()
+
+
+@router.get("/reconciliation", response_model=ReconciliationResponse)
+async def get_reconciliation(
+    page: int = Query(1, ge=1),
+    page_size: int = Query(50, ge=1, le=200),
+    state: Optional[ReconciliationState] = None,
+    catalog_number: Optional[str] = Query(None, description="catalog number prefix"),
+    current_user: dict = Depends(get_current_user),
+    reconciliation_service: ReconciliationService = Depends(get_reconciliation_service)
+):
+    """Ordered vs. on-hand vs. reserved per catalog number, as of the last run (all authenticated users)"""
+    return await reconciliation_service.get_report(
+        page=page,
+        page_size=page_size,
+        state=state.value if state else None,
+        catalog_number=catalog_number
+    )
+
+
+@router.post("/reconciliation/run", response_model=ReconciliationRunResponse)
+async def run_reconciliation(
+    full: bool = False,
+    current_user: dict = Depends(require_admin),
+    reconciliation_service: ReconciliationService = Depends(get_reconciliation_service)
+):
+    """Bring the reconciliation report up to date now (admin+ only)"""
+    return await reconciliation_service.run(full=full)
+
+
 @router.post("/orders", response_model=ProcurementOrderResponse)
 async def create_order(
     order_data: ProcurementOrderCreate,
@@ -72,6 +123,45 @@ async def create_order(
     )
 
 
+@router.post("/orders/bulk-update", response_model=ProcurementBulkResponse)
+async def bulk_update_orders(
+    bulk_update: ProcurementBulkUpdate,
+    current_user: dict = Depends(get_current_user),
+    procurement_service: ProcurementService = Depends(get_procurement_service)
+):
+    """Apply the same changes to many orders (admin+ only)"""
+    username = current_user.get("username") or current_user.get("sub")
+    role = current_user.get("role", "user")
+    
+    return await procurement_service.bulk_update_orders(bulk_update, user_role=role, username=username)
+
+
+@router.post("/orders/bulk-create", response_model=ProcurementBulkResponse)
+async def bulk_create_orders(
+    bulk_create: ProcurementBulkCreate,
+    current_user: dict = Depends(get_current_user),
+    procurement_service: ProcurementService = Depends(get_procurement_service)
+):
+    """Create many orders (admin+ only)"""
+    username = current_user.get("username") or current_user.get("sub")
+    role = current_user.get("role", "user")
+    
+    return await procurement_service.bulk_create_orders(bulk_create.orders, user_role=role, created_by=username)
+
+
+@router.post("/orders/import", response_model=ProcurementBulkResponse)
+async def import_orders(
+    file: UploadFile = File(...),
+    current_user: dict = Depends(get_current_user),
+    procurement_service: ProcurementService = Depends(get_procurement_service)
+):
+    """Create orders from a CSV / Excel file (admin+ only)"""
+    username = current_user.get("username") or current_user.get("sub")
+    role = current_user.get("role", "user")
+    
+    return await procurement_service.import_orders(file, user_role=role, created_by=username)
+
+
 @router.get("/orders/{order_id}", response_model=ProcurementOrderResponse)
 async def get_order(
     order_id: str,
@@ -136,26 +226,80 @@ async def upload_file(
 
 @router.get("/orders/{order_id}/files/{file_id}")
 async def download_file(
+    request: Request,
     order_id: str,
     file_id: str,
     current_user: dict = Depends(get_current_user),
     procurement_service: ProcurementService = Depends(get_procurement_service)
 ):
     """Download file from procurement order (all authenticated users)"""
-    file_content, filename, content_type = await procurement_service.download_file(
+    download, filename, content_type = await procurement_service.download_file(
         order_id=order_id,
-        file_id=file_id
+        file_id=file_id,
+        byte_range=request.headers.get("range"),
+        if_none_match=request.headers.get("if-none-match"),
+        if_modified_since=request.headers.get("if-modified-since")
     )
+
+    validators = {}
+    if download.etag:
+        validators["ETag"] = download.etag
+    if download.last_modified:
+        validators["Last-Modified"] = format_datetime(download.last_modified, usegmt=True)
+
+    # S3 evaluates the validators itself; the local check also covers S3 validators it did not match (weak ETags)
+    if download.not_modified or _not_modified(request, download.etag, download.last_modified):
+        # The chunk generator never started, so its finally would not run - close the body directly
+        download.close()
+        return Response(status_code=304, headers=validators)
+
+    # Local storage: sendfile, Range / If-Range handled by FileResponse
+    if download.path:
+        return FileResponse(
+            download.path,
+            media_type=content_type,
+            filename=filename,
+            stat_result=download.stat_result,
+            headers=validators
+        )
+
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"', **validators}
+    if download.supports_ranges:
+        headers["Accept-Ranges"] = "bytes"
+    if download.content_length is not None:
+        headers["Content-Length"] = str(download.content_length)
+    if download.content_range:
+        headers["Content-Range"] = download.content_range
     
     return StreamingResponse(
-        BytesIO(file_content),
+        download.chunks,
+        status_code=206 if download.content_range else 200,
         media_type=content_type,
-        headers={
-            "Content-Disposition": f'attachment; filename="{filename}"'
-        }
+        headers=headers
     )
 
 
+def _not_modified(request: Request, etag: Optional[str], last_modified: Optional[datetime]) -> bool:
+    """Conditional GET: If-None-Match takes precedence over If-Modified-Since"""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if not etag:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or etag.removeprefix("W/") in tags
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
 @router.delete("/orders/{order_id}/files/{file_id}")
 async def delete_file(
     order_id: str,
@@ -175,3 +319,13 @@ async def delete_file(
     )
     
     return {"message": "הקובץ נמחק בהצלחה"}
+
+
+@router.post("/maintenance/gc")
+async def collect_file_garbage(
+    grace_seconds: Optional[int] = Query(None, ge=0),
+    current_user: dict = Depends(require_admin),
+    blob_store: BlobStore = Depends(get_blob_store)
+):
+    """Repair file refcounts and delete unreferenced stored files (admin+ only)"""
+    return await blob_store.collect_garbage(grace_seconds)
@@ -0,0 +1,17 @@
+"""
+Analytics schemas.
+"""
+from enum import Enum
+
+
+class ActivityBucketSize(str, Enum):
+    """Time bucket for activity series."""
+    HOUR = "hour"
+    DAY = "day"
+
+
+class ActivityGroupBy(str, Enum):
+    """Dimension to split activity series by."""
+    ACTION = "action"
+    ACTOR = "actor"
+    RESOURCE_TYPE = "resource_type"
@@ -0,0 +1,72 @@
+"""
+Diagnostics schemas.
+"""
+from datetime import datetime
+from enum import Enum
+from typing import Any, List, Optional
+
+from pydantic import BaseModel
+
+
+class SlowQueryOrder(str, Enum):
+    """Ranking of slow query shapes."""
+    TOTAL_MS = "total_ms"
+    MAX_MS = "max_ms"
+    AVG_MS = "avg_ms"
+    SLOW_COUNT = "slow_count"
+
+
+class QueryPlanSummary(BaseModel):
+    """Sampled executionStats explain of a query shape"""
+    stages: List[str]
+    indexes: List[str]
+    collection_scan: bool
+    returned: int
+    keys_examined: int
+    docs_examined: int
+    keys_examined_per_returned: float
+    docs_examined_per_returned: float
+    execution_ms: Optional[int] = None
+    explained_at: datetime
+
+
+class SlowQueryShape(BaseModel):
+    """Timings of one query shape (values replaced by their types)"""
+    collection: str
+    operation: str
+    shape: Any
+    count: int
+    slow_count: int
+    total_ms: float
+    max_ms: float
+    avg_ms: float
+    plan: Optional[QueryPlanSummary] = None
+
+
+class SlowQueriesResponse(BaseModel):
+    """Slowest query shapes of this process"""
+    slow_ms: float
+    shapes: List[SlowQueryShape]
+
+
+class BlockingCallSite(BaseModel):
+    """Callbacks that held the event loop past the threshold at one call site"""
+    site: str
+    call: Optional[str] = None  # Innermost sampled frame when it is library code
+    sampled: bool
+    count: int
+    total_ms: float
+    max_ms: float
+    avg_ms: float
+    last_seen: datetime
+    stack: List[str]
+
+
+class BlockingCallsResponse(BaseModel):
+    """Event loop health of this process"""
+    enabled: bool
+    unsupported_loop: Optional[str] = None  # Set when enabling was refused (e.g. uvloop)
+    threshold_ms: float
+    loop_lag_ms: float
+    max_block_ms: float
+    sites: List[BlockingCallSite]
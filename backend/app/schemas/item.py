@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import Optional, Any
 from datetime import datetime
+from enum import Enum
 
 class ItemBase(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
@@ -56,6 +57,8 @@ class ItemFilter(BaseModel):
     description: Optional[str] = None
     location: Optional[str] = None
     current_stock: Optional[str] = None
+    stock_min: Optional[float] = None  # Range on the numeric stock_qty
+    stock_max: Optional[float] = None
     warranty_expiry: Optional[str] = None
     purpose: Optional[str] = None
     target_site: Optional[str] = None
@@ -72,3 +75,16 @@ class ItemsListResponse(BaseModel):
     page: int
     limit: int
     pages: int
+
+class ItemChangeType(str, Enum):
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+    # Many items changed at once - clients should re-query
+    RESYNC = "resync"
+
+class ItemChange(BaseModel):
+    """Item-level diff pushed on the live items feed"""
+    type: ItemChangeType
+    id: Optional[str] = None
+    changes: dict[str, Any] = Field(default_factory=dict)  # field -> new value
@@ -18,12 +18,20 @@ class ProcurementFileMetadata(BaseModel):
     filename: str
     file_type: str
     file_size: int
+    sha256: Optional[str] = None  # Hex digest, computed while uploading
     s3_key: Optional[str] = None
     local_path: Optional[str] = None
     uploaded_by: str
     uploaded_at: datetime
 
 
+class ProcurementStatusChange(BaseModel):
+    """Entry of an order's status history"""
+    status: ProcurementStatus
+    changed_at: datetime
+    changed_by: Optional[str] = None
+
+
 class ProcurementOrderBase(BaseModel):
     """Base procurement order schema"""
     catalog_number: str = Field(..., min_length=1, description="מק\"ט")
@@ -55,10 +63,35 @@ class ProcurementOrderUpdate(BaseModel):
     received_bom: Optional[bool] = None
 
 
+class ProcurementBulkUpdate(ProcurementOrderUpdate):
+    """Same changes applied to many orders"""
+    ids: List[str] = Field(..., min_length=1, max_length=1000)
+
+
+class ProcurementBulkCreate(BaseModel):
+    """Many new orders at once"""
+    orders: List[ProcurementOrderCreate] = Field(..., min_length=1, max_length=1000)
+
+
+class ProcurementBulkError(BaseModel):
+    """An order (by id, or by row for creates/imports) that was not applied"""
+    key: str
+    detail: str
+
+
+class ProcurementBulkResponse(BaseModel):
+    """Result of a bulk operation; valid orders are applied even when others fail"""
+    message: str
+    modified_count: int = 0
+    created_ids: List[str] = []
+    errors: List[ProcurementBulkError] = []
+
+
 class ProcurementOrderResponse(ProcurementOrderBase):
     """Schema for procurement order response"""
     id: str
     files: List[ProcurementFileMetadata] = []
+    status_history: List[ProcurementStatusChange] = []
     created_by: str
     created_at: datetime
     updated_at: datetime
@@ -70,9 +103,80 @@ class ProcurementOrderResponse(ProcurementOrderBase):
 class ProcurementOrdersListResponse(BaseModel):
     """Paginated list of procurement orders"""
     orders: List[ProcurementOrderResponse]
+    total: Optional[int] = None  # Omitted when include_total=false
+    page: int
+    page_size: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= for the next page
+
+
+class ProcurementStatsBucket(BaseModel):
+    """Orders and spend for one status / manufacturer / month (YYYY-MM)"""
+    key: str
+    count: int
+    amount: float
+
+
+class ProcurementLeadTime(BaseModel):
+    """Days from waiting_emf (or creation) until received, over received orders"""
+    orders: int
+    avg_days: Optional[float] = None
+    min_days: Optional[float] = None
+    max_days: Optional[float] = None
+
+
+class ProcurementStatsResponse(BaseModel):
+    """Procurement pipeline statistics"""
+    total_orders: int
+    total_amount: float
+    by_status: List[ProcurementStatsBucket]
+    by_manufacturer: List[ProcurementStatsBucket]
+    by_month: List[ProcurementStatsBucket]
+    lead_time: ProcurementLeadTime
+    generated_at: datetime
+
+
+class ReconciliationState(str, Enum):
+    """Reconciliation outcome for a catalog number"""
+    MISSING = "missing"  # Received more than is on hand
+    ON_ORDER = "on_order"
+    OK = "ok"
+
+
+class ReconciliationRow(BaseModel):
+    """Ordered vs. on-hand vs. reserved quantities of one catalog number"""
+    catalog_number: str
+    manufacturer: Optional[str] = None
+    ordered_qty: float
+    received_qty: float
+    open_orders: int
+    last_order_date: Optional[datetime] = None
+    on_hand_qty: float
+    reserved_qty: float
+    available_qty: float
+    missing_qty: float
+    inventory_items: int
+    inventory_locations: int
+    state: ReconciliationState
+    computed_at: datetime
+
+
+class ReconciliationResponse(BaseModel):
+    """Page of the reconciliation report"""
+    rows: List[ReconciliationRow]
     total: int
     page: int
     page_size: int
+    last_run_at: Optional[datetime] = None
+    last_run_full: Optional[bool] = None
+
+
+class ReconciliationRunResponse(BaseModel):
+    """Summary of a reconciliation run"""
+    skipped: bool
+    full: Optional[bool] = None
+    catalog_numbers: Optional[int] = None  # None on full runs
+    rows: Optional[int] = None
+    duration_ms: Optional[float] = None
 
 
 class FileUploadResponse(BaseModel):
@@ -0,0 +1,85 @@
+"""
+Incremental hourly rollup of audit activity.
+
+Audit writes are counted in-process per (hour, action, actor, resource_type)
+and flushed periodically as pre-aggregated measurements into the
+'warehouse-activity-hourly' time-series collection.
+"""
+from typing import Dict, Optional, Tuple
+from datetime import datetime
+from collections import defaultdict
+import asyncio
+import logging
+
+from app.config import settings
+from app.db.repositories.activity_repository import ActivityRepository, truncate_to_hour
+
+logger = logging.getLogger(__name__)
+
+BucketKey = Tuple[datetime, str, str, str]
+
+
+class HourlyActivityBuffer:
+    """Accumulates activity counters between flushes."""
+
+    def __init__(self, flush_interval: float):
+        self.flush_interval = flush_interval
+        self._counts: Dict[BucketKey, int] = defaultdict(int)
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def add(self, action: str, actor: str, resource_type: Optional[str], timestamp: datetime) -> None:
+        """Count one audit entry. Synchronous and allocation-light - called on every audit write."""
+        self._counts[(truncate_to_hour(timestamp), action, actor, resource_type or "general")] += 1
+
+    async def flush(self) -> int:
+        """Write the pending counters as measurements. Returns the number of measurements written."""
+        if not self._counts:
+            return 0
+
+        pending, self._counts = self._counts, defaultdict(int)
+        buckets = [
+            {
+                "hour": hour,
+                "meta": {"action": action, "actor": actor, "resource_type": resource_type},
+                "count": count
+            }
+            for (hour, action, actor, resource_type), count in pending.items()
+        ]
+
+        try:
+            await ActivityRepository().insert_hourly_buckets(buckets)
+        except Exception as e:
+            # Put the counters back so the next flush retries them
+            for key, count in pending.items():
+                self._counts[key] += count
+            logger.error(f"Failed to flush hourly activity rollup: {e}")
+            return 0
+
+        return len(buckets)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Start the periodic flush task."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the periodic flush task and flush what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+
+hourly_activity_buffer = HourlyActivityBuffer(settings.ACTIVITY_ROLLUP_FLUSH_SECONDS)
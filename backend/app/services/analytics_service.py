@@ -1,13 +1,36 @@
 from typing import Dict, List, Any, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import asyncio
 import logging
 
 from app.db.repositories.items import ItemsRepository
+from app.db.repositories.activity_repository import truncate_to_day
 from app.services.audit_service import AuditService
+from app.schemas.analytics import ActivityBucketSize, ActivityGroupBy
+from app.core.exceptions import BadRequestException
 
 logger = logging.getLogger(__name__)
 
+# Longest date range served per bucket size, keeps series queries bounded
+MAX_SERIES_RANGE = {
+    ActivityBucketSize.HOUR: timedelta(days=31),
+    ActivityBucketSize.DAY: timedelta(days=366),
+}
+
+# Audit actions counted under each activity category
+ACTIVITY_CATEGORIES = {
+    "created": ["item_create", "procurement_create", "user_create"],
+    "updated": ["item_update", "item_bulk_update", "procurement_update", "user_update", "password_change", "role_change"],
+    "deleted": ["item_delete", "item_bulk_delete", "procurement_delete", "user_delete"],
+}
+
+def _to_naive_utc(value: datetime) -> datetime:
+    """Stored timestamps are naive UTC; normalize timezone-aware input to match."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
 class AnalyticsService:
     """Service for analytics and dashboard statistics."""
     
@@ -29,6 +52,8 @@ class AnalyticsService:
         - Target site distribution
         - Manufacturer distribution
         - Location distribution
+        - Stock totals and stock per location (numeric stock_qty)
+        - Expired / soon-expiring warranties
         
         Returns:
             Dictionary containing all dashboard statistics
@@ -44,7 +69,10 @@ class AnalyticsService:
             non_serial_equipment,
             target_sites,
             manufacturers,
-            locations
+            locations,
+            stock_totals,
+            stock_by_location,
+            warranties
         ) = await asyncio.gather(
             self._calculate_project_distribution(),
             self.items_repo.count({}),
@@ -59,7 +87,10 @@ class AnalyticsService:
             }),
             self._calculate_target_site_distribution(),
             self._calculate_manufacturer_distribution(),
-            self._calculate_location_distribution()
+            self._calculate_location_distribution(),
+            self._calculate_stock_totals(),
+            self._calculate_stock_by_location(),
+            self._calculate_warranty_summary()
         )
 
         return {
@@ -70,7 +101,10 @@ class AnalyticsService:
             "non_serial_equipment": non_serial_equipment,
             "target_sites": target_sites,
             "manufacturers": manufacturers,
-            "locations": locations
+            "locations": locations,
+            "stock": stock_totals,
+            "stock_by_location": stock_by_location,
+            "warranties": warranties
         }
 
     async def get_activity_stats(self, days: int = 7) -> Dict[str, int]:
@@ -78,34 +112,103 @@ class AnalyticsService:
         מחזיר כמות פעולות (יצירה, עדכון, מחיקה) בטווח הימים האחרונים
         """
         start_date = datetime.utcnow() - timedelta(days=days)
-        repo = self.audit_service.repository.collection
-        
-        # Helper to build OR query for all wrappers
-        def build_action_query(actions):
-            wrappers = ["user_action", "item_action", "procurement_action", "general_action"]
-            conditions = []
-            for w in wrappers:
-                conditions.append({
-                    f"{w}.timestamp": {"$gte": start_date},
-                    f"{w}.action": {"$in": actions}
-                })
-            return {"$or": conditions}
-
-        created_query = build_action_query(["item_create", "procurement_create", "user_create"])
-        updated_query = build_action_query(["item_update", "item_bulk_update", "procurement_update", "user_update", "password_change", "role_change"])
-        deleted_query = build_action_query(["item_delete", "item_bulk_delete", "procurement_delete", "user_delete"])
-        
-        created = await repo.count_documents(created_query)
-        updated = await repo.count_documents(updated_query)
-        deleted = await repo.count_documents(deleted_query)
-        
+
+        # Single aggregation over the date window, grouped by category
+        counts = await self.audit_service.repository.count_by_category(start_date, ACTIVITY_CATEGORIES)
+
         return {
-            "created": created,
-            "updated": updated,
-            "deleted": deleted,
+            "created": counts["created"],
+            "updated": counts["updated"],
+            "deleted": counts["deleted"],
             "days": days
         }
 
+    async def get_daily_activity(self, days: int = 7) -> Dict[str, Any]:
+        """
+        מחזיר סדרה יומית של פעולות (יצירה, עדכון, מחיקה) מתוך טבלת הסיכום היומית.
+        Reads the pre-aggregated daily rollup instead of scanning the raw audit logs.
+        """
+        today = truncate_to_day(datetime.utcnow())
+        start_day = today - timedelta(days=days - 1)
+
+        category_by_action = {
+            action: category
+            for category, actions in ACTIVITY_CATEGORIES.items()
+            for action in actions
+        }
+
+        # Pre-fill every day in the window so the chart has no gaps
+        series = {}
+        for offset in range(days):
+            day = start_day + timedelta(days=offset)
+            series[day] = {"date": day.strftime('%Y-%m-%d'), "created": 0, "updated": 0, "deleted": 0}
+
+        rollups = await self.audit_service.activity_repository.get_daily_counts(start_day)
+        for doc in rollups:
+            category = category_by_action.get(doc["action"])
+            if category and doc["day"] in series:
+                series[doc["day"]][category] += doc["count"]
+
+        points = list(series.values())
+        return {
+            "series": points,
+            "totals": {
+                category: sum(point[category] for point in points)
+                for category in ACTIVITY_CATEGORIES
+            },
+            "days": days
+        }
+
+    async def get_activity_series(
+        self,
+        bucket: ActivityBucketSize = ActivityBucketSize.DAY,
+        group_by: ActivityGroupBy = ActivityGroupBy.ACTION,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[str, Any]:
+        """
+        מחזיר סדרת פעילות לפי שעה/יום, מפוצלת לפי פעולה, משתמש או סוג משאב.
+        Served from the hourly rollup; the date range is capped per bucket size.
+        """
+        end_date = _to_naive_utc(end_date) if end_date else datetime.utcnow()
+        start_date = _to_naive_utc(start_date) if start_date else None
+        if start_date is None:
+            start_date = end_date - (timedelta(days=1) if bucket == ActivityBucketSize.HOUR else timedelta(days=7))
+
+        if start_date >= end_date:
+            raise BadRequestException("תאריך ההתחלה חייב להיות לפני תאריך הסיום")
+        if end_date - start_date > MAX_SERIES_RANGE[bucket]:
+            raise BadRequestException(
+                f"טווח התאריכים המקסימלי עבור '{bucket.value}' הוא {MAX_SERIES_RANGE[bucket].days} ימים"
+            )
+
+        rows = await self.audit_service.activity_repository.get_hourly_series(
+            start_date, end_date, bucket.value, group_by.value
+        )
+
+        series: Dict[str, List[Dict[str, Any]]] = {}
+        for row in rows:
+            series.setdefault(row["key"] or "unknown", []).append(
+                {"time": row["bucket"].isoformat(), "count": row["count"]}
+            )
+
+        return {
+            "bucket": bucket.value,
+            "group_by": group_by.value,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "series": [
+                {"key": key, "total": sum(p["count"] for p in points), "points": points}
+                for key, points in sorted(series.items())
+            ]
+        }
+
+    async def rebuild_activity_rollup(self) -> Dict[str, str]:
+        """Migration tool: rebuild the daily activity rollup from the raw audit logs"""
+        target = self.audit_service.activity_repository.daily_collection.name
+        await self.audit_service.repository.rebuild_daily_rollup(target)
+        return {"message": "Activity rollup rebuilt"}
+
     async def get_item_project_stats(self, catalog_number: str) -> List[Dict[str, Any]]:
         """
         מחזיר התפלגות פרויקטים עבור מק"ט ספציפי
@@ -282,4 +385,67 @@ class AnalyticsService:
         
         return results
 
+    async def _calculate_stock_totals(self) -> Dict[str, Any]:
+        """
+        סך המלאי, פריטים במלאי ופריטים שאזלו - לפי stock_qty המספרי
+        """
+        pipeline = [
+            {"$match": {"stock_qty": {"$type": "number"}}},
+            {"$group": {
+                "_id": None,
+                "total_stock": {"$sum": "$stock_qty"},
+                "in_stock": {"$sum": {"$cond": [{"$gt": ["$stock_qty", 0]}, 1, 0]}},
+                "out_of_stock": {"$sum": {"$cond": [{"$lte": ["$stock_qty", 0]}, 1, 0]}}
+            }}
+        ]
+
+        docs = await self.items_repo.collection.aggregate(pipeline).to_list(length=1)
+        totals = docs[0] if docs else {}
+        return {
+            "total_stock": totals.get("total_stock", 0),
+            "in_stock": totals.get("in_stock", 0),
+            "out_of_stock": totals.get("out_of_stock", 0)
+        }
 
+    async def _calculate_stock_by_location(self) -> List[Dict[str, Any]]:
+        """
+        סך המלאי לפי מיקום
+        """
+        pipeline = [
+            {"$match": {"stock_qty": {"$gt": 0}, "location": {"$exists": True, "$ne": ""}}},
+            {"$group": {"_id": "$location", "total": {"$sum": "$stock_qty"}}},
+            {"$sort": {"total": -1}},
+            {"$limit": 15}
+        ]
+
+        cursor = self.items_repo.collection.aggregate(pipeline)
+        return [{"name": doc["_id"], "value": doc["total"]} async for doc in cursor]
+
+    async def _calculate_warranty_summary(self) -> Dict[str, Any]:
+        """
+        אחריות שפגה ואחריות שמסתיימת ב-30/90 הימים הקרובים.
+        Range counts on the warranty_expiry_date index.
+        """
+        today = truncate_to_day(datetime.utcnow())
+        in_30_days = today + timedelta(days=30)
+        in_90_days = today + timedelta(days=90)
+
+        expired, expiring_30, expiring_90, upcoming = await asyncio.gather(
+            self.items_repo.count({"warranty_expiry_date": {"$lt": today}}),
+            self.items_repo.count({"warranty_expiry_date": {"$gte": today, "$lte": in_30_days}}),
+            self.items_repo.count({"warranty_expiry_date": {"$gte": today, "$lte": in_90_days}}),
+            self.items_repo.collection.find(
+                {"warranty_expiry_date": {"$gte": today}},
+                {"catalog_number": 1, "serial": 1, "location": 1, "warranty_expiry": 1}
+            ).sort("warranty_expiry_date", 1).limit(5).to_list(length=5)
+        )
+
+        for item in upcoming:
+            item["_id"] = str(item["_id"])
+
+        return {
+            "expired": expired,
+            "expiring_30_days": expiring_30,
+            "expiring_90_days": expiring_90,
+            "upcoming": upcoming
+        }
@@ -3,9 +3,13 @@ Service for managing audit logs.
 """
 from typing import List, Optional
 from datetime import datetime
+from collections import Counter
 import logging
 
 from app.db.repositories.audit_repository import AuditRepository
+from app.db.repositories.activity_repository import ActivityRepository
+from app.services.activity_rollup import hourly_activity_buffer
+from app.core.metrics import audit_writes_in_flight, audit_logs_written
 from app.schemas.audit import (
     AuditLogCreate,
     AuditLogResponse,
@@ -22,6 +26,8 @@ class AuditService:
     def __init__(self):
         # Unified Repository for 'warehouse-audit-logs'
         self.repository = AuditRepository()
+        # Pre-aggregated activity counters, updated on every write
+        self.activity_repository = ActivityRepository()
     
     async def log_user_action(
         self,
@@ -55,7 +61,13 @@ class AuditService:
         )
         
         # Write to unified collection
-        log_id = await self.repository.create_audit_log(audit_data)
+        audit_writes_in_flight.inc()
+        try:
+            log_id = await self.repository.create_audit_log(audit_data)
+        finally:
+            audit_writes_in_flight.dec()
+        audit_logs_written.inc()
+        await self._record_activity(audit_data)
         
         logger.info(
             f"Audit log created: {action} by {actor} "
@@ -68,7 +80,46 @@ class AuditService:
     async def create_manual_log(self, log_data: AuditLogCreate) -> str:
         """Create a manual audit log entry (e.g. for UNDO actions)."""
         # Ensure timestamp is set if not provided (it's set in repo, but good practice)
-        return await self.repository.create_audit_log(log_data)
+        log_id = await self.repository.create_audit_log(log_data)
+        audit_logs_written.inc()
+        await self._record_activity(log_data)
+        return log_id
+
+    async def log_user_actions(self, entries: List[AuditLogCreate]) -> List[str]:
+        """Create many audit log entries (bulk operations) with one insert and one rollup update."""
+        if not entries:
+            return []
+        
+        audit_writes_in_flight.inc(len(entries))
+        try:
+            log_ids = await self.repository.create_audit_logs(entries)
+        finally:
+            audit_writes_in_flight.dec(len(entries))
+        audit_logs_written.inc(len(log_ids))
+        
+        timestamp = datetime.utcnow()
+        counts = Counter()
+        for entry in entries:
+            action = entry.action.value if hasattr(entry.action, "value") else entry.action
+            hourly_activity_buffer.add(action, entry.actor, entry.target_resource, timestamp)
+            counts[action] += 1
+        try:
+            await self.activity_repository.record_actions(counts, timestamp)
+        except Exception as e:
+            logger.error(f"Failed to update activity rollup for {dict(counts)}: {e}")
+        
+        logger.info(f"Audit logs created: {dict(counts)}")
+        return log_ids
+
+    async def _record_activity(self, audit_data: AuditLogCreate) -> None:
+        """Update activity rollups. A failed rollup must never fail the audited operation."""
+        action = audit_data.action.value if hasattr(audit_data.action, "value") else audit_data.action
+        timestamp = datetime.utcnow()
+        hourly_activity_buffer.add(action, audit_data.actor, audit_data.target_resource, timestamp)
+        try:
+            await self.activity_repository.record_action(action, timestamp)
+        except Exception as e:
+            logger.error(f"Failed to update activity rollup for {action}: {e}")
 
     async def get_audit_logs(
         self,
@@ -1,34 +1,71 @@
-from datetime import timedelta
+from datetime import datetime, timedelta
+from typing import Optional
 from fastapi import Response
+import calendar
+import logging
 
 from app.config import settings
-from app.core.security import create_access_token
+from app.db.mongodb import MongoDB
+from app.core.cache import LRUCache
+from app.core.events import ChangeEvent, ChangeOperation
+from app.core.security import create_access_token, revoke_token, revoke_fingerprint
 from app.core.exceptions import UnauthorizedException
-from app.core.password import verify_password
+from app.core.password import verify_password_async, hash_password_async, needs_rehash, dummy_verify_async
+from app.core.rate_limit import login_rate_limiter, unknown_usernames
 from app.schemas.auth import LoginRequest, DomainLoginRequest
 from app.services.group_service import GroupService
 from app.services.user_service import UserService
 
+logger = logging.getLogger(__name__)
+
+# Revoked tokens, shared by all replicas (TTL index on expires_at)
+REVOKED_TOKENS_COLLECTION = "revoked-tokens"
+
+# username -> ADFS group names
+_adfs_groups_cache = LRUCache(maxsize=settings.ADFS_GROUPS_CACHE_SIZE, ttl=settings.ADFS_GROUPS_CACHE_SECONDS)
+
 
 class AuthService:
-    def __init__(self):
-        self.user_service = UserService()
-        self.group_service = GroupService()
+    def __init__(
+        self,
+        user_service: Optional[UserService] = None,
+        group_service: Optional[GroupService] = None
+    ):
+        self.user_service = user_service or UserService()
+        self.group_service = group_service or GroupService()
 
-    async def login(self, login_data: LoginRequest, response: Response):
+    async def login(self, login_data: LoginRequest, response: Response, ip_address: Optional[str] = None):
         """התחברות למערכת"""
-        # Get user from MongoDB
-        user = await self.user_service.get_user_by_username(login_data.username)
-        
+        username = login_data.username
+
+        # Rate limits and lockout - before any lookup or bcrypt work
+        await login_rate_limiter.check(username, ip_address)
+
+        # Get user from MongoDB (skipped for usernames recently found not to exist)
+        user = None
+        if username not in unknown_usernames:
+            user = await self.user_service.get_user_by_username(username)
+            if not user:
+                unknown_usernames.set(username, True)
+
         if not user:
+            await dummy_verify_async(login_data.password)
+            await login_rate_limiter.record_failure(username)
             raise UnauthorizedException()
         
         if not user.get("is_active", True):
             raise UnauthorizedException("המשתמש אינו פעיל")
         
-        if not verify_password(login_data.password, user.get("password_hash", "")):
+        password_hash = user.get("password_hash", "")
+        if not await verify_password_async(login_data.password, password_hash):
+            await login_rate_limiter.record_failure(username)
             raise UnauthorizedException()
 
+        await login_rate_limiter.record_success(username)
+
+        if needs_rehash(password_hash):
+            await self._rehash_password(login_data.username, login_data.password, password_hash)
+
         # Create token with role
         access_token = create_access_token(
             data={
@@ -52,28 +89,28 @@ class AuthService:
 
         return {"access_token": access_token, "token_type": "bearer"}
 
+    async def _rehash_password(self, username: str, password: str, old_hash: str) -> None:
+        """Upgrade the stored hash to the current BCRYPT_ROUNDS. Never fails the login."""
+        try:
+            new_hash = await hash_password_async(password)
+            await self.user_service.update_password_hash(username, old_hash, new_hash)
+        except Exception as e:
+            logger.error(f"Failed to rehash password for {username}: {e}")
+
     async def domain_login(self, login_data: DomainLoginRequest, response: Response):
         """התחברות דומיין (ADFS)"""
         username = login_data.username
         
         # 1. קבלת קבוצות המשתמש מה-ADFS (לוגיקה חיצונית/STUB)
         # TODO: כאן אתה מממש את הלוגיקה שלך לקבלת הקבוצות של המשתמש מה-ADFS
-        user_adfs_groups = await self._get_user_groups_from_adfs_stub(username)
+        user_adfs_groups = await self._get_user_adfs_groups(username)
         
         if not user_adfs_groups:
              raise UnauthorizedException("לא נמצאו קבוצות למשתמש זה")
 
-        # 2. קבלת כל הקבוצות הקיימות במערכת
-        all_app_groups_result = await self.group_service.get_groups()
-        all_app_groups = all_app_groups_result.get("groups", [])
-        
-        # 3. בדיקת חיתוך (Intersection) - האם למשתמש יש קבוצה שקיימת במערכת
+        # 2-3. בדיקת חיתוך (Intersection) מול מפת הקבוצות שבזיכרון
         # נניח ששמות הקבוצות ב-DB זהים לשמות ב-ADFS
-        valid_group = None
-        for group in all_app_groups:
-             if group.get("name") in user_adfs_groups:
-                 valid_group = group
-                 break
+        valid_group = await self.group_service.resolve_group(user_adfs_groups)
         
         if not valid_group:
              raise UnauthorizedException("אין לך הרשאות גישה למערכת (לא נמצאה קבוצה מתאימה)")
@@ -106,6 +143,15 @@ class AuthService:
 
         return {"access_token": access_token, "token_type": "bearer"}
 
+    async def _get_user_adfs_groups(self, username: str) -> list[str]:
+        """ADFS groups of a user, cached per username for ADFS_GROUPS_CACHE_SECONDS"""
+        groups = _adfs_groups_cache.get(username)
+        if groups is None:
+            groups = await self._get_user_groups_from_adfs_stub(username)
+            if groups:
+                _adfs_groups_cache.set(username, groups)
+        return groups
+
     async def _get_user_groups_from_adfs_stub(self, username: str) -> list[str]:
         """
         פונקציית עזר מדמה קבלת קבוצות.
@@ -116,8 +162,48 @@ class AuthService:
         print(f"Fetching groups for user: {username}")
         return ["Users", "Admins", "WarehouseTeam"] # דוגמה לקבוצות שחוזרות
 
-    async def logout(self, response: Response):
+    async def logout(self, response: Response, token: Optional[str] = None):
         """התנתקות"""
         response.delete_cookie(key="access_token")
+        if token:
+            await self._revoke(token)
         return {"message": "התנתקת בהצלחה"}
 
+    async def _revoke(self, token: str) -> None:
+        """Revoke locally and publish to the other replicas through the shared collection"""
+        revoked = revoke_token(token)
+        if revoked is None:
+            return
+        fingerprint, exp = revoked
+        now = datetime.utcnow()
+        try:
+            await MongoDB.get_collection(REVOKED_TOKENS_COLLECTION).update_one(
+                {"_id": fingerprint},
+                {"$set": {
+                    "expires_at": datetime.utcfromtimestamp(exp),
+                    "created_at": now,
+                    "updated_at": now
+                }},
+                upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Failed to persist token revocation: {e}")
+
+    @staticmethod
+    async def load_revoked_tokens() -> int:
+        """Load revocations made before this process started"""
+        count = 0
+        cursor = MongoDB.get_collection(REVOKED_TOKENS_COLLECTION).find(
+            {"expires_at": {"$gt": datetime.utcnow()}}
+        )
+        async for doc in cursor:
+            revoke_fingerprint(doc["_id"], calendar.timegm(doc["expires_at"].utctimetuple()))
+            count += 1
+        return count
+
+    @staticmethod
+    def on_revoked_token_event(event: ChangeEvent) -> None:
+        """Change listener handler - a token was revoked on another replica"""
+        if event.operation in (ChangeOperation.INSERT, ChangeOperation.UPDATE, ChangeOperation.REPLACE) and event.document_id:
+            revoke_fingerprint(event.document_id)
+
@@ -0,0 +1,143 @@
+"""
+Content-addressed storage for procurement attachments.
+
+Every upload is hashed (sha256) while it streams to storage. The first upload
+of some content becomes the blob; later uploads of the same bytes drop their
+staged copy and only add a reference, so each distinct file is stored once.
+The stored object is deleted when its last reference goes away.
+
+File entries uploaded before deduplication have no sha256 and keep owning
+their storage object directly.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Optional, Dict, Any, List
+import asyncio
+import logging
+
+from app.config import settings
+from app.db.repositories.blob_repository import BlobRepository
+from app.db.repositories.procurement_repository import ProcurementRepository
+from app.services.s3_service import S3Service
+from app.services.storage_cleanup import StorageCleanupQueue
+
+logger = logging.getLogger(__name__)
+
+
+def _location(doc: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    return {"s3_key": doc.get("s3_key"), "local_path": doc.get("local_path")}
+
+
+class BlobStore:
+    """Reference-counted blobs on top of S3Service"""
+
+    def __init__(
+        self,
+        s3_service: Optional[S3Service] = None,
+        repository: Optional[BlobRepository] = None,
+        procurement_repository: Optional[ProcurementRepository] = None,
+        cleanup_queue: Optional[StorageCleanupQueue] = None
+    ):
+        self.s3_service = s3_service or S3Service()
+        self.repository = repository or BlobRepository()
+        self.procurement_repository = procurement_repository or ProcurementRepository()
+        self.cleanup_queue = cleanup_queue or StorageCleanupQueue(self.s3_service)
+
+    async def store(self, upload_result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Take a reference on a freshly uploaded file.
+
+        Returns:
+            dict with the 's3_key' / 'local_path' to record and 'deduplicated'
+        """
+        sha256 = upload_result.get("sha256")
+        staged = _location(upload_result)
+        if not sha256:
+            return {**staged, "deduplicated": False}
+
+        blob = await self.repository.acquire(sha256, staged, upload_result.get("file_size", 0))
+        location = _location(blob)
+        deduplicated = location != staged
+        if deduplicated:
+            # Same content already stored - the staged copy is redundant
+            await self.s3_service.delete_file(**staged)
+            logger.info(f"Deduplicated upload {sha256[:12]} -> {location}")
+        return {**location, "deduplicated": deduplicated}
+
+    async def release(self, file_metadata: Dict[str, Any]) -> bool:
+        """
+        Drop the reference held by a file entry (call after the entry was removed).
+
+        Returns:
+            True if the stored object was deleted
+        """
+        sha256 = file_metadata.get("sha256")
+        if not sha256:
+            return await self.s3_service.delete_file(**_location(file_metadata))
+
+        blob = await self.repository.release(sha256)
+        if not blob:
+            return False
+        return await self.s3_service.delete_file(**_location(blob))
+
+    async def release_many(self, files: List[Dict[str, Any]]) -> int:
+        """
+        Drop the references of many file entries and queue the freed storage for
+        background deletion. Returns once the references are dropped.
+
+        Returns:
+            Number of stored objects queued for deletion
+        """
+        locations = await asyncio.gather(*(self._release_reference(file) for file in files))
+        freed = [location for location in locations if location]
+        self.cleanup_queue.enqueue(freed)
+        return len(freed)
+
+    async def _release_reference(self, file_metadata: Dict[str, Any]) -> Optional[Dict[str, Optional[str]]]:
+        """Storage location that became unreferenced, if any"""
+        if not file_metadata.get("sha256"):
+            return _location(file_metadata)
+        blob = await self.repository.release(file_metadata["sha256"])
+        return _location(blob) if blob else None
+
+    async def collect_garbage(self, grace_seconds: Optional[int] = None) -> Dict[str, int]:
+        """
+        Repair refcounts against the file entries and remove unreferenced storage.
+
+        Blobs and stored objects touched within the grace period are skipped, so
+        uploads and deletes in flight are never raced.
+        """
+        grace = timedelta(seconds=settings.BLOB_GC_GRACE_SECONDS if grace_seconds is None else grace_seconds)
+        cutoff = datetime.utcnow() - grace
+        stats = {"refcounts_fixed": 0, "blobs_deleted": 0, "missing_blobs": 0, "orphans_deleted": 0}
+
+        references = await self.procurement_repository.count_blob_references()
+        known = set()
+        blob_locations = set()
+        async for blob in self.repository.iter_blobs():
+            known.add(blob["_id"])
+            blob_locations.update(value for value in _location(blob).values() if value)
+            if blob["updated_at"] >= cutoff:
+                continue
+            refcount = references.get(blob["_id"], 0)
+            if refcount == 0:
+                if await self.repository.delete_unreferenced(blob["_id"], blob["updated_at"]):
+                    await self.s3_service.delete_file(**_location(blob))
+                    stats["blobs_deleted"] += 1
+            elif refcount != blob["refcount"]:
+                if await self.repository.set_refcount(blob["_id"], refcount, blob["updated_at"]):
+                    stats["refcounts_fixed"] += 1
+
+        for sha256 in references.keys() - known:
+            logger.error(f"Procurement files reference missing blob {sha256}")
+            stats["missing_blobs"] += 1
+
+        # Stored objects nobody points at (e.g. a crash between upload and metadata write)
+        referenced = blob_locations | await self.procurement_repository.get_file_locations()
+        stored = await self.s3_service.list_files(older_than=cutoff.replace(tzinfo=timezone.utc))
+        for location in stored:
+            if not referenced.intersection(location.values()):
+                if await self.s3_service.delete_file(**location):
+                    stats["orphans_deleted"] += 1
+
+        logger.info(f"Blob GC finished: {stats}")
+        return stats
@@ -7,9 +7,11 @@ import io
 
 from app.db.repositories.items import ItemsRepository
 from app.services.audit_service import AuditService
+from app.services.item_events import item_event_broker
 from app.schemas.audit import AuditAction
 from app.core.exceptions import ExcelFileException
 from app.core.excel_parser import ExcelParser
+from app.core.metrics import timed_job, count_rows
 from app.schemas.item import ItemFilter
 
 
@@ -18,6 +20,7 @@ class ExcelService:
         self.items_repo = items_repo
         self.audit_service = audit_service
 
+    @timed_job("items_import")
     async def import_excel(self, file: UploadFile, user: str):
         """
         יבוא מלאי ראשי
@@ -68,6 +71,7 @@ class ExcelService:
                             update_data['updated_at'] = datetime.utcnow()
 
                             await self.items_repo.update(str(existing_item["_id"]), update_data)
+                            item_event_broker.item_updated(existing_item["_id"], update_data)
                             updated_count += 1
 
                             await self.audit_service.log_user_action(
@@ -88,6 +92,7 @@ class ExcelService:
                         record["created_at"] = datetime.utcnow()
                         record["updated_at"] = datetime.utcnow()
                         created_item = await self.items_repo.create(record)
+                        item_event_broker.item_created(created_item)
                         added_count += 1
 
                         await self.audit_service.log_user_action(
@@ -124,6 +129,7 @@ class ExcelService:
                                 'updated_at': datetime.utcnow()
                             }
                             await self.items_repo.update(str(existing_item["_id"]), update_data)
+                            item_event_broker.item_updated(existing_item["_id"], update_data)
                             updated_count += 1
 
                             await self.audit_service.log_user_action(
@@ -143,6 +149,7 @@ class ExcelService:
                         record["created_at"] = datetime.utcnow()
                         record["updated_at"] = datetime.utcnow()
                         created_item = await self.items_repo.create(record)
+                        item_event_broker.item_created(created_item)
                         added_count += 1
 
                         await self.audit_service.log_user_action(
@@ -171,6 +178,11 @@ class ExcelService:
                 changes={"total_rows": len(records), "added": added_count, "updated": updated_count}
             )
 
+        count_rows("items_import", "added", added_count)
+        count_rows("items_import", "updated", updated_count)
+        count_rows("items_import", "skipped", skipped_count)
+        count_rows("items_import", "error", len(errors))
+
         return {
             "message": "יבוא הושלם בהצלחה",
             "added": added_count,
@@ -180,6 +192,7 @@ class ExcelService:
             "errors": errors
         }
 
+    @timed_job("items_export")
     async def export_excel(
             self,
             search: Optional[str] = None,
@@ -224,8 +237,10 @@ class ExcelService:
             clean_items.append(clean_item)
 
         # Delegate generation to Parser
+        count_rows("items_export", "exported", len(clean_items))
         return ExcelParser.generate_inventory_excel(clean_items)
 
+    @timed_job("allocations_import")
     async def import_project_excel(self, file: UploadFile, user: str):
         """
         יבוא קובץ הקצאות
@@ -293,6 +308,11 @@ class ExcelService:
                     changes={"reserved_stock": reserved_value_str, "modified_count": modified_count}
                 )
 
+        # Allocations are updated by (catalog, location) - clients must re-query
+        if updated_count > 0:
+            item_event_broker.resync()
+
+        count_rows("allocations_import", "updated", updated_count)
         return {
             "message": f"העדכון הושלם. עודכנו {updated_count} פריטים.",
             "updated": updated_count,
@@ -1,12 +1,77 @@
-from typing import List
+from typing import Dict, Iterable, List, Optional
 from datetime import datetime
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+import asyncio
 
 from app.db.mongodb import MongoDB
 from app.schemas.group import GroupCreate, GroupUpdate
+from app.core.events import ChangeEvent
 from app.core.exceptions import NotFoundException, BadRequestException
 
 
+class GroupDirectory:
+    """
+    In-process name -> group map used to resolve domain logins.
+    Loaded on first use, kept current by the GroupService write paths and
+    dropped on change events (writes from other replicas). Deletes are not
+    seen by the polling fallback, so a match is confirmed in Mongo by _id
+    before it is returned.
+    """
+
+    def __init__(self):
+        self._groups: Optional[Dict[str, dict]] = None
+        self._order: Dict[str, int] = {}
+        self._lock = asyncio.Lock()
+
+    async def _ensure_loaded(self, collection) -> Dict[str, dict]:
+        groups = self._groups
+        if groups is not None:
+            return groups
+        async with self._lock:
+            if self._groups is None:
+                loaded = {}
+                async for group in collection.find():
+                    group["id"] = str(group.pop("_id"))
+                    loaded[group["name"]] = group
+                self._order = {name: i for i, name in enumerate(loaded)}
+                self._groups = loaded
+            return self._groups
+
+    async def resolve(self, collection, names: Iterable[str]) -> Optional[dict]:
+        """First group (in collection order) whose name is in `names` and that still exists"""
+        groups = await self._ensure_loaded(collection)
+        matches = groups.keys() & set(names)
+        for name in sorted(matches, key=lambda name: self._order.get(name, len(self._order))):
+            group = groups[name]
+            if await collection.find_one({"_id": ObjectId(group["id"]), "name": name}, {"_id": 1}):
+                return group
+            self.remove(name)  # Deleted or renamed on another replica
+        return None
+
+    def put(self, group: dict, old_name: Optional[str] = None) -> None:
+        if self._groups is None:
+            return
+        if old_name and old_name != group["name"]:
+            self._groups.pop(old_name, None)
+        self._order.setdefault(group["name"], len(self._order))
+        self._groups[group["name"]] = group
+
+    def remove(self, name: str) -> None:
+        if self._groups is not None:
+            self._groups.pop(name, None)
+
+    def invalidate(self) -> None:
+        self._groups = None
+
+    def on_change_event(self, event: ChangeEvent) -> None:
+        """Change listener handler for the groups collection"""
+        self.invalidate()
+
+
+group_directory = GroupDirectory()
+
+
 class GroupService:
     """Service for managing groups - groups have no password and are always 'user' role"""
     
@@ -34,6 +99,10 @@ class GroupService:
         group["id"] = str(group.pop("_id"))
         return group
     
+    async def resolve_group(self, names: Iterable[str]) -> Optional[dict]:
+        """Find the group matching one of the given names (domain login)"""
+        return await group_directory.resolve(self._get_collection(), names)
+
     async def get_group_by_name(self, name: str) -> dict:
         """Get group by name"""
         collection = self._get_collection()
@@ -65,9 +134,13 @@ class GroupService:
             "updated_at": datetime.utcnow()
         }
         
-        result = await collection.insert_one(group_doc)
+        try:
+            result = await collection.insert_one(group_doc)
+        except DuplicateKeyError:
+            raise BadRequestException("שם קבוצה כבר קיים")
         group_doc["id"] = str(result.inserted_id)
         group_doc.pop("_id", None)
+        group_directory.put(dict(group_doc))
 
         if audit_service:
             from app.schemas.audit import AuditAction
@@ -121,10 +194,13 @@ class GroupService:
             update_dict["is_active"] = update_data.is_active
             changes["is_active"] = {"old": existing.get("is_active"), "new": update_data.is_active}
         
-        await collection.update_one(
-            {"_id": ObjectId(group_id)},
-            {"$set": update_dict}
-        )
+        try:
+            await collection.update_one(
+                {"_id": ObjectId(group_id)},
+                {"$set": update_dict}
+            )
+        except DuplicateKeyError:
+            raise BadRequestException("שם קבוצה כבר קיים")
 
         if audit_service and changes:
             from app.schemas.audit import AuditAction
@@ -138,7 +214,9 @@ class GroupService:
                 changes=changes
             )
         
-        return await self.get_group_by_id(group_id)
+        group = await self.get_group_by_id(group_id)
+        group_directory.put(dict(group), old_name=existing.get("name"))
+        return group
     
     async def delete_group(
         self, 
@@ -156,6 +234,7 @@ class GroupService:
             raise NotFoundException("קבוצה לא נמצאה")
         
         await collection.delete_one({"_id": ObjectId(group_id)})
+        group_directory.remove(existing.get("name"))
 
         if audit_service:
             from app.schemas.audit import AuditAction
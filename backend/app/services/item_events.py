@@ -0,0 +1,137 @@
+"""
+Live feed of item changes.
+
+The item write paths (ItemService, ExcelService) publish compact diffs here;
+every open GET /api/items/events connection holds a bounded queue fed by
+the broker, filtered per connection.
+
+Writes made by other replicas arrive through the event bus ("inventory"
+change events, see on_change_event). This replica's own writes are seen
+there too, so delivery is at-least-once and clients apply changes
+idempotently. Changes without field values (inserts, replaces, polled
+updates) are sent with empty `changes`: the client re-fetches that item.
+"""
+from typing import Any, Dict, Iterable, List, Optional, Set
+import asyncio
+import itertools
+import logging
+
+from app.config import settings
+from app.core.events import ChangeEvent, ChangeOperation
+from app.schemas.item import ItemChange, ItemChangeType
+
+logger = logging.getLogger(__name__)
+
+# Fields never sent on the feed
+HIDDEN_FIELDS = {"_id", "id"}
+
+
+class ItemEventSubscription:
+    """A single feed connection: its filter and its bounded queue."""
+
+    def __init__(self, queue_size: int, ids: Optional[Set[str]] = None, fields: Optional[Set[str]] = None):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.ids = ids or None
+        self.fields = fields or None
+
+    def select(self, change: ItemChange) -> Optional[ItemChange]:
+        """Apply this connection's filter. Returns None when the change is not wanted."""
+        if change.type == ItemChangeType.RESYNC:
+            return change
+        if self.ids is not None and change.id not in self.ids:
+            return None
+        if self.fields is None or change.type == ItemChangeType.DELETED:
+            return change
+
+        changes = {k: v for k, v in change.changes.items() if k in self.fields}
+        # An update without values (fields unknown) is kept so the client re-fetches the item
+        if not changes and change.changes and change.type == ItemChangeType.UPDATED:
+            return None
+        return ItemChange(type=change.type, id=change.id, changes=changes)
+
+    def offer(self, event_id: int, change: ItemChange) -> None:
+        """
+        Enqueue without blocking the writer. A consumer that falls behind has
+        its backlog replaced by a single resync event.
+        """
+        try:
+            self.queue.put_nowait((event_id, change))
+        except asyncio.QueueFull:
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait((event_id, ItemChange(type=ItemChangeType.RESYNC)))
+
+
+class ItemEventBroker:
+    """Fans item changes out to the open feed connections of this process."""
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscriptions: List[ItemEventSubscription] = []
+        self._sequence = itertools.count(1)
+
+    def subscribe(self, ids: Optional[Iterable[str]] = None, fields: Optional[Iterable[str]] = None) -> ItemEventSubscription:
+        subscription = ItemEventSubscription(
+            self.queue_size,
+            ids=set(ids) if ids else None,
+            fields=set(fields) if fields else None
+        )
+        self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: ItemEventSubscription) -> None:
+        if subscription in self._subscriptions:
+            self._subscriptions.remove(subscription)
+
+    @property
+    def connection_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, changes: Iterable[ItemChange]) -> None:
+        """Deliver changes to every matching connection. Never blocks the caller."""
+        if not self._subscriptions:
+            return
+        for change in changes:
+            event_id = next(self._sequence)
+            for subscription in self._subscriptions:
+                selected = subscription.select(change)
+                if selected is not None:
+                    subscription.offer(event_id, selected)
+
+    # --- Helpers for the write paths ---
+
+    def item_created(self, item: Dict[str, Any]) -> None:
+        self.publish([ItemChange(type=ItemChangeType.CREATED, id=str(item.get("_id")), changes=_visible(item))])
+
+    def item_updated(self, item_id: str, changes: Dict[str, Any]) -> None:
+        self.publish([ItemChange(type=ItemChangeType.UPDATED, id=str(item_id), changes=_visible(changes))])
+
+    def items_updated(self, item_ids: Iterable[str], changes: Dict[str, Any]) -> None:
+        visible = _visible(changes)
+        self.publish(ItemChange(type=ItemChangeType.UPDATED, id=str(item_id), changes=visible) for item_id in item_ids)
+
+    def items_deleted(self, item_ids: Iterable[str]) -> None:
+        self.publish(ItemChange(type=ItemChangeType.DELETED, id=str(item_id)) for item_id in item_ids)
+
+    def resync(self) -> None:
+        self.publish([ItemChange(type=ItemChangeType.RESYNC)])
+
+    def on_change_event(self, event: ChangeEvent) -> None:
+        """Event bus handler for the inventory collection (writes from every replica)"""
+        if event.operation == ChangeOperation.RESYNC or event.document_id is None:
+            self.resync()
+        elif event.operation == ChangeOperation.DELETE:
+            self.items_deleted([event.document_id])
+        elif event.operation == ChangeOperation.INSERT:
+            self.publish([ItemChange(type=ItemChangeType.CREATED, id=event.document_id)])
+        else:
+            changes = dict(event.updated_fields or {})
+            changes.update(dict.fromkeys(event.removed_fields or []))
+            self.item_updated(event.document_id, changes)
+
+
+def _visible(data: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in data.items() if k not in HIDDEN_FIELDS}
+
+
+item_event_broker = ItemEventBroker(settings.ITEM_EVENTS_QUEUE_SIZE)
@@ -1,8 +1,9 @@
 from typing import Optional, List, Dict, Any, TYPE_CHECKING
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app.db.repositories.items import ItemsRepository
 from app.services.audit_service import AuditService
+from app.services.item_events import item_event_broker
 from app.schemas.audit import AuditAction
 from app.schemas.item import ItemCreate, ItemUpdate, BulkUpdate
 
@@ -45,6 +46,19 @@ class ItemService:
             "pages": pages
         }
 
+    async def get_expiring_warranties(self, days: int = 90, page: int = 1, limit: int = 30):
+        """פריטים שתוקף האחריות שלהם מסתיים ב-X הימים הקרובים"""
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        items, total = await self.items_repo.get_expiring_warranties(today, today + timedelta(days=days), page, limit)
+        pages = (total + limit - 1) // limit
+        return {
+            "items": items,
+            "total": total,
+            "page": page,
+            "limit": limit,
+            "pages": pages
+        }
+
     async def create_item(self, item_data: ItemCreate, user: Dict[str, Any], undo_log_id: Optional[str] = None, is_undo: bool = False):
         item_dict = item_data.dict(by_alias=False)
         item_dict["created_at"] = datetime.utcnow()
@@ -53,6 +67,7 @@ class ItemService:
         self._sync_reserved_stock(item_dict)
 
         created_item = await self.items_repo.create(item_dict)
+        item_event_broker.item_created(created_item)
 
         # Skip logging if this is an undo operation (log created separately)
         if not is_undo:
@@ -73,6 +88,7 @@ class ItemService:
              self._sync_reserved_stock(update_data)
 
         updated_item = await self.items_repo.update(item_id, update_data)
+        item_event_broker.item_updated(item_id, update_data)
 
         # Skip logging if this is an undo operation (log created separately)
         if not is_undo:
@@ -105,6 +121,7 @@ class ItemService:
             update.ids,
             update_data
         )
+        item_event_broker.items_updated([item["_id"] for item in items_before], update_data)
 
         for item in items_before:
             # Construct changes dict for logging
@@ -125,6 +142,7 @@ class ItemService:
     async def delete_item(self, item_id: str, user: Dict[str, Any], reason: str):
         item = await self.items_repo.get_by_id_or_raise(item_id)
         await self.items_repo.delete(item_id)
+        item_event_broker.items_deleted([item_id])
 
         await self._log_deletion(user, item, f"סיבת מחיקה: {reason}")
             
@@ -132,6 +150,7 @@ class ItemService:
 
     async def bulk_delete_items(self, item_ids: List[str], user: Dict[str, Any], reason: str):
         items_before, deleted_count = await self.items_repo.bulk_delete_by_ids(item_ids)
+        item_event_broker.items_deleted([item["_id"] for item in items_before])
 
         for item in items_before:
             await self._log_deletion(user, item, f"מחיקה מרובה - סיבה: {reason}")
@@ -143,6 +162,7 @@ class ItemService:
 
     async def delete_all_items(self, user: Dict[str, Any], reason: str):
         deleted_count = await self.items_repo.delete_many({})
+        item_event_broker.resync()
 
         # Log via audit service (using BULK_DELETE as approximation for DELETE_ALL)
         await self.audit_service.log_user_action(
@@ -176,10 +196,18 @@ class ItemService:
                     {"_id": item["_id"]},
                     {"$set": {"reserved_stock": reserved_stock_str}}
                 )
+                item_event_broker.item_updated(str(item["_id"]), {"reserved_stock": reserved_stock_str})
                 count += 1
         
         return {"message": f"Fixed reserved_stock for {count} items"}
 
+    async def backfill_derived_fields(self):
+        """Migration tool: set stock_qty and warranty_expiry_date of all items from their display fields"""
+        result = await self.items_repo.backfill_derived_fields()
+        if result["updated"]:
+            item_event_broker.resync()
+        return {"message": f"Backfilled typed fields for {result['updated']} items", **result}
+
 
     # --- Private Helpers ---
 
@@ -1,16 +1,27 @@
 from datetime import datetime
 from typing import Optional, List, Dict, Any
 from fastapi import HTTPException, UploadFile
+from pydantic import ValidationError
+import asyncio
 import uuid
 import logging
 
+from app.config import settings
+from app.core.cache import LRUCache
+from app.core.events import ChangeEvent, ChangeOperation
 from app.db.repositories.procurement_repository import ProcurementRepository
-from app.services.s3_service import S3Service
+from app.db.utils.procurement_query import encode_cursor
+from app.services.s3_service import S3Service, FileDownload, FileTooLargeError
+from app.services.blob_store import BlobStore
 from app.services.audit_service import AuditService
-from app.schemas.audit import AuditAction
+from app.core.excel_parser import ExcelParser
+from app.core.exceptions import ExcelFileException
+from app.core.metrics import timed_job, count_rows
+from app.schemas.audit import AuditAction, AuditLogCreate
 from app.schemas.procurement import (
     ProcurementOrderCreate,
     ProcurementOrderUpdate,
+    ProcurementBulkUpdate,
     ProcurementFileMetadata,
     ProcurementStatus
 )
@@ -26,14 +37,43 @@ ALLOWED_EXTENSIONS = {
 # Max file size: 10MB
 MAX_FILE_SIZE = 10 * 1024 * 1024
 
+# Max orders per bulk request / import file
+MAX_BULK_ORDERS = 1000
+
+# Result of the stats aggregation; dropped on every order mutation
+_stats_cache = LRUCache(maxsize=1, ttl=settings.PROCUREMENT_STATS_CACHE_SECONDS)
+
+# Order fields that do not affect the stats
+_NON_STATS_FIELDS = ("files", "updated_at")
+
+
+def invalidate_procurement_stats() -> None:
+    _stats_cache.clear()
+
+
+def on_procurement_event(event: ChangeEvent) -> None:
+    """Change listener handler - an order may have changed on another replica"""
+    if event.operation == ChangeOperation.UPDATE and event.updated_fields is not None:
+        changed = list(event.updated_fields) + (event.removed_fields or [])
+        if all(field.split(".")[0] in _NON_STATS_FIELDS for field in changed):
+            return
+    invalidate_procurement_stats()
+
 
 class ProcurementService:
     """Service for procurement business logic"""
     
-    def __init__(self):
-        self.repository = ProcurementRepository()
-        self.s3_service = S3Service()
-        self.audit_service = AuditService()
+    def __init__(
+        self,
+        repository: Optional[ProcurementRepository] = None,
+        s3_service: Optional[S3Service] = None,
+        audit_service: Optional[AuditService] = None,
+        blob_store: Optional[BlobStore] = None
+    ):
+        self.repository = repository or ProcurementRepository()
+        self.s3_service = s3_service or S3Service()
+        self.audit_service = audit_service or AuditService()
+        self.blob_store = blob_store or BlobStore(self.s3_service, procurement_repository=self.repository)
     
     def can_edit_procurement(self, user_role: str) -> bool:
         """Check if user can edit procurement (admin or superadmin)"""
@@ -53,19 +93,10 @@ class ProcurementService:
             order_dict["status"] = ProcurementStatus.WAITING_FOR_EMF
         
         # Business Logic Validation
-        if order_dict.get("status") == ProcurementStatus.ORDERED:
-            order_dict["received_emf"] = True
-            order_dict["received_bom"] = True
-            
-        if order_dict.get("received_emf") and order_dict.get("status") == ProcurementStatus.WAITING_FOR_EMF:
-            from fastapi import HTTPException
-            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-EMF' כאשר סומן שהתקבל EMF")
-            
-        if order_dict.get("received_bom") and order_dict.get("status") == ProcurementStatus.WAITING_FOR_BOM:
-            from fastapi import HTTPException
-            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-BOM' כאשר סומן שהתקבל BOM")
+        self._apply_status_rules(order_dict)
 
         created_order = await self.repository.create_order(order_dict)
+        invalidate_procurement_stats()
         
         # Audit Log
         try:
@@ -89,9 +120,13 @@ class ProcurementService:
         catalog_number: Optional[str] = None,
         manufacturer: Optional[str] = None,
         status_in: Optional[List[str]] = None,
-        status_ne: Optional[str] = None
-    ) -> tuple[List[dict], int]:
-        """Get all procurement orders with pagination"""
+        status_ne: Optional[str] = None,
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
+    ) -> tuple[List[dict], Optional[int]]:
+        """Get procurement orders by page number, or after a cursor (keyset)"""
         skip = (page - 1) * page_size
         return await self.repository.get_orders(
             skip=skip,
@@ -99,9 +134,28 @@ class ProcurementService:
             catalog_number=catalog_number,
             manufacturer=manufacturer,
             status_in=status_in,
-            status_ne=status_ne
+            status_ne=status_ne,
+            date_from=date_from,
+            date_to=date_to,
+            after=cursor,
+            include_total=include_total
         )
     
+    def next_cursor(self, orders: List[dict], page_size: int) -> Optional[str]:
+        """Cursor for the page after `orders` (None on the last page)"""
+        if len(orders) < page_size:
+            return None
+        return encode_cursor(orders[-1])
+    
+    async def get_stats(self) -> dict:
+        """Pipeline statistics, cached for PROCUREMENT_STATS_CACHE_SECONDS or until an order changes"""
+        stats = _stats_cache.get("stats")
+        if stats is None:
+            stats = await self.repository.get_stats()
+            stats["generated_at"] = datetime.utcnow()
+            _stats_cache.set("stats", stats)
+        return stats
+    
     async def get_order_by_id(self, order_id: str) -> dict:
         """Get procurement order by ID"""
         order = await self.repository.get_order_by_id(order_id)
@@ -126,45 +180,18 @@ class ProcurementService:
         # Update only provided fields
         update_dict = update_data.model_dump(exclude_unset=True)
         
-        # Prepare updated values for validation
-        # We need to merge existing values with updates to check the final state
-        current_status = update_dict.get("status", existing_order.get("status"))
-        # Note: received_emf/bom might be booleans in update_dict or existing_order
-        current_received_emf = update_dict.get("received_emf") if "received_emf" in update_dict else existing_order.get("received_emf")
-        current_received_bom = update_dict.get("received_bom") if "received_bom" in update_dict else existing_order.get("received_bom")
-
-        # Business Logic Logic
-        if current_status == ProcurementStatus.ORDERED:
-            update_dict["received_emf"] = True
-            update_dict["received_bom"] = True
-            # Update local variables for subsequent checks (though not strictly needed if we return here/continue)
-            current_received_emf = True
-            current_received_bom = True
-            
-        if current_received_emf and current_status == ProcurementStatus.WAITING_FOR_EMF:
-            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-EMF' כאשר סומן שהתקבל EMF")
-            
-        if current_received_bom and current_status == ProcurementStatus.WAITING_FOR_BOM:
-            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-BOM' כאשר סומן שהתקבל BOM")
+        # Business Logic Validation (against the merged final state)
+        self._apply_status_rules(update_dict, existing_order)
 
         # Calculate changes for audit
-        changes = {}
-        for key, value in update_dict.items():
-            old_val = existing_order.get(key)
-            # Handle Enum serialization
-            new_val = value.value if hasattr(value, 'value') else value
-            # Handle Date serialization
-            if isinstance(old_val, datetime):
-                old_val = old_val.isoformat()
-            if isinstance(new_val, datetime):
-                new_val = new_val.isoformat()
-                
-            if old_val != new_val:
-                changes[key] = {"old": old_val, "new": new_val}
+        changes = self._diff(existing_order, update_dict)
+        
+        status_change = self._status_change(existing_order, update_dict, username)
         
-        updated_order = await self.repository.update_order(order_id, update_dict)
+        updated_order = await self.repository.update_order(order_id, update_dict, status_change)
         if not updated_order:
             raise HTTPException(status_code=404, detail="הזמנה לא נמצאה")
+        invalidate_procurement_stats()
         
         # Audit Log
         if changes:
@@ -182,25 +209,171 @@ class ProcurementService:
         
         return updated_order
     
+    async def bulk_update_orders(
+        self,
+        bulk_update: ProcurementBulkUpdate,
+        user_role: str,
+        username: str = "unknown"
+    ) -> dict:
+        """
+        Apply the same changes to many orders: one read, rules checked in memory,
+        one bulk_write and one audit insert. Orders failing the rules are reported, not applied.
+        """
+        if not self.can_edit_procurement(user_role):
+            raise HTTPException(status_code=403, detail="אין לך הרשאה לערוך הזמנות")
+        
+        requested = bulk_update.model_dump(exclude={"ids"}, exclude_unset=True)
+        if not requested:
+            return {"message": "אין שדות לעדכון", "modified_count": 0}
+        
+        order_ids = list(dict.fromkeys(bulk_update.ids))
+        existing_orders = await self.repository.get_orders_by_ids(order_ids)
+        
+        updates, audit_entries, errors = [], [], []
+        for order_id in order_ids:
+            existing_order = existing_orders.get(order_id)
+            if not existing_order:
+                errors.append({"key": order_id, "detail": "הזמנה לא נמצאה"})
+                continue
+            
+            update_dict = dict(requested)
+            try:
+                self._apply_status_rules(update_dict, existing_order)
+            except HTTPException as e:
+                errors.append({"key": order_id, "detail": e.detail})
+                continue
+            
+            changes = self._diff(existing_order, update_dict)
+            if not changes:
+                continue
+            updates.append((order_id, update_dict, self._status_change(existing_order, update_dict, username)))
+            audit_entries.append(self._audit_entry(
+                AuditAction.PROCUREMENT_UPDATE, username, user_role, order_id, changes=changes
+            ))
+        
+        modified_count = await self.repository.bulk_update_orders(updates)
+        if updates:
+            invalidate_procurement_stats()
+        await self._log_audit_batch(audit_entries)
+        
+        return {
+            "message": f"עודכנו {modified_count} הזמנות",
+            "modified_count": modified_count,
+            "errors": errors
+        }
+    
+    async def bulk_create_orders(
+        self,
+        orders: List[ProcurementOrderCreate],
+        user_role: str,
+        created_by: str
+    ) -> dict:
+        """Create many orders with one insert and one audit insert. Invalid rows are reported, not created."""
+        if not self.can_edit_procurement(user_role):
+            raise HTTPException(status_code=403, detail="אין לך הרשאה ליצור הזמנות")
+        return await self._create_valid_orders(list(enumerate(orders, start=1)), [], user_role, created_by)
+    
+    @timed_job("procurement_import")
+    async def import_orders(self, file: UploadFile, user_role: str, created_by: str) -> dict:
+        """Create orders from a CSV / Excel file (errors are keyed by line in the file)"""
+        if not self.can_edit_procurement(user_role):
+            raise HTTPException(status_code=403, detail="אין לך הרשאה ליצור הזמנות")
+        if not file.filename or not file.filename.lower().endswith(('.csv', '.xlsx', '.xls')):
+            raise ExcelFileException("פורמט קובץ לא נתמך")
+        
+        contents = await file.read()
+        # pandas parsing is CPU-bound - keep it off the event loop
+        records = await asyncio.to_thread(ExcelParser.parse_procurement_orders, contents, file.filename)
+        if not records:
+            raise ExcelFileException("הקובץ ריק")
+        if len(records) > MAX_BULK_ORDERS:
+            raise ExcelFileException(f"ניתן לייבא עד {MAX_BULK_ORDERS} הזמנות בקובץ")
+        
+        orders, errors = [], []
+        for record in records:
+            row = record.pop("_row")
+            try:
+                orders.append((row, ProcurementOrderCreate(**record)))
+            except ValidationError as e:
+                fields = ", ".join(str(error["loc"][0]) for error in e.errors() if error["loc"])
+                errors.append({"key": str(row), "detail": f"ערכים לא תקינים: {fields}"})
+        
+        result = await self._create_valid_orders(orders, errors, user_role, created_by)
+        count_rows("procurement_import", "added", len(result["created_ids"]))
+        count_rows("procurement_import", "error", len(result["errors"]))
+        return result
+    
+    async def _create_valid_orders(
+        self,
+        orders: List[tuple[int, ProcurementOrderCreate]],
+        errors: List[dict],
+        user_role: str,
+        created_by: str
+    ) -> dict:
+        valid_rows = []
+        for row, order_data in orders:
+            order_dict = order_data.model_dump()
+            order_dict["created_by"] = created_by
+            try:
+                self._apply_status_rules(order_dict)
+            except HTTPException as e:
+                errors.append({"key": str(row), "detail": e.detail})
+                continue
+            valid_rows.append(order_dict)
+        
+        created_ids = await self.repository.create_orders(valid_rows)
+        if created_ids:
+            invalidate_procurement_stats()
+        await self._log_audit_batch([
+            self._audit_entry(AuditAction.PROCUREMENT_CREATE, created_by, user_role, order_id, changes=order_dict)
+            for order_id, order_dict in zip(created_ids, valid_rows)
+        ])
+        
+        return {
+            "message": f"נוצרו {len(created_ids)} הזמנות",
+            "created_ids": created_ids,
+            "errors": errors
+        }
+    
+    @staticmethod
+    def _audit_entry(
+        action: AuditAction,
+        actor: str,
+        actor_role: str,
+        order_id: str,
+        changes: Optional[dict] = None
+    ) -> AuditLogCreate:
+        return AuditLogCreate(
+            action=action,
+            actor=actor,
+            actor_role=actor_role,
+            target_resource="procurement_order",
+            resource_id=order_id,
+            changes=changes
+        )
+    
+    async def _log_audit_batch(self, entries: List[AuditLogCreate]) -> None:
+        try:
+            await self.audit_service.log_user_actions(entries)
+        except Exception as e:
+            logger.error(f"Failed to log audit for {len(entries)} procurement orders: {e}")
+    
     async def delete_order(self, order_id: str, user_role: str, username: str = "unknown") -> bool:
         """Delete procurement order and all associated files"""
         if not self.can_edit_procurement(user_role):
             raise HTTPException(status_code=403, detail="אין לך הרשאה למחוק הזמנות")
         
-        # Get order to delete files
+        # Get order to release its files
         order = await self.get_order_by_id(order_id)
         
-        # Delete all files
-        for file in order.get("files", []):
-            await self.s3_service.delete_file(
-                s3_key=file.get("s3_key"),
-                local_path=file.get("local_path")
-            )
-        
         # Delete order
         success = await self.repository.delete_order(order_id)
         if not success:
             raise HTTPException(status_code=404, detail="הזמנה לא נמצאה")
+        invalidate_procurement_stats()
+        
+        # Release all files; unreferenced storage is deleted in the background
+        await self.blob_store.release_many(order.get("files", []))
         
         # Audit Log
         try:
@@ -234,34 +407,33 @@ class ProcurementService:
         # Validate file
         self._validate_file(file)
         
-        # Read file content
-        file_content = await file.read()
+        # Reject early when the size is already known
+        if isinstance(file.size, int) and file.size > MAX_FILE_SIZE:
+            raise self._file_too_large()
         
-        # Check file size
-        if len(file_content) > MAX_FILE_SIZE:
-            raise HTTPException(
-                status_code=400,
-                detail=f"גודל הקובץ חורג מהמקסימום המותר ({MAX_FILE_SIZE / 1024 / 1024}MB)"
+        # Stream to S3 or local storage in chunks; size is enforced while copying
+        try:
+            upload_result = await self.s3_service.upload_file(
+                file_content=file.file,
+                filename=file.filename,
+                content_type=file.content_type or 'application/octet-stream',
+                max_size=MAX_FILE_SIZE
             )
+        except FileTooLargeError:
+            raise self._file_too_large()
         
-        # Reset file pointer for upload
-        await file.seek(0)
-        
-        # Upload to S3 or local storage
-        upload_result = await self.s3_service.upload_file(
-            file_content=file.file,
-            filename=file.filename,
-            content_type=file.content_type or 'application/octet-stream'
-        )
+        # Content already stored -> reference the existing blob
+        stored = await self.blob_store.store(upload_result)
         
         # Create file metadata
         file_metadata = {
             "file_id": upload_result["file_id"],
             "filename": file.filename,
             "file_type": file.content_type or 'application/octet-stream',
-            "file_size": len(file_content),
-            "s3_key": upload_result.get("s3_key"),
-            "local_path": upload_result.get("local_path"),
+            "file_size": upload_result.get("file_size", 0),
+            "sha256": upload_result.get("sha256"),
+            "s3_key": stored["s3_key"],
+            "local_path": stored["local_path"],
             "uploaded_by": uploaded_by,
             "uploaded_at": datetime.utcnow()
         }
@@ -269,11 +441,8 @@ class ProcurementService:
         # Add to order
         updated_order = await self.repository.add_file_to_order(order_id, file_metadata)
         if not updated_order:
-            # Cleanup uploaded file
-            await self.s3_service.delete_file(
-                s3_key=upload_result.get("s3_key"),
-                local_path=upload_result.get("local_path")
-            )
+            # Drop the reference taken above
+            await self.blob_store.release(file_metadata)
             raise HTTPException(status_code=404, detail="הזמנה לא נמצאה")
         
         # Audit Log
@@ -295,23 +464,33 @@ class ProcurementService:
             "message": "הקובץ הועלה בהצלחה"
         }
     
-    async def download_file(self, order_id: str, file_id: str) -> tuple[bytes, str, str]:
-        """Download file from procurement order"""
+    async def download_file(
+        self,
+        order_id: str,
+        file_id: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[str] = None
+    ) -> tuple[FileDownload, str, str]:
+        """Open file from procurement order for streaming"""
         # Get file metadata
         file_metadata = await self.repository.get_file_metadata(order_id, file_id)
         if not file_metadata:
             raise HTTPException(status_code=404, detail="קובץ לא נמצא")
         
         # Download file
-        file_content = await self.s3_service.download_file(
+        download = await self.s3_service.download_file(
             s3_key=file_metadata.get("s3_key"),
-            local_path=file_metadata.get("local_path")
+            local_path=file_metadata.get("local_path"),
+            byte_range=byte_range,
+            if_none_match=if_none_match,
+            if_modified_since=if_modified_since
         )
         
-        if not file_content:
+        if not download:
             raise HTTPException(status_code=404, detail="לא ניתן להוריד את הקובץ")
         
-        return file_content, file_metadata["filename"], file_metadata["file_type"]
+        return download, file_metadata["filename"], file_metadata["file_type"]
     
     async def delete_file(self, order_id: str, file_id: str, user_role: str, username: str = "unknown") -> bool:
         """Delete file from procurement order"""
@@ -323,17 +502,14 @@ class ProcurementService:
         if not file_metadata:
             raise HTTPException(status_code=404, detail="קובץ לא נמצא")
         
-        # Delete from storage
-        await self.s3_service.delete_file(
-            s3_key=file_metadata.get("s3_key"),
-            local_path=file_metadata.get("local_path")
-        )
-        
         # Remove from order
         updated_order = await self.repository.remove_file_from_order(order_id, file_id)
         if not updated_order:
             raise HTTPException(status_code=404, detail="הזמנה לא נמצאה")
         
+        # Delete from storage once no other file references the content
+        await self.blob_store.release(file_metadata)
+        
         # Audit Log
         try:
             await self.audit_service.log_user_action(
@@ -349,6 +525,57 @@ class ProcurementService:
             
         return True
     
+    @staticmethod
+    def _apply_status_rules(changes: Dict[str, Any], existing: Optional[Dict[str, Any]] = None) -> None:
+        """
+        EMF/BOM rules on the final state (`changes` over `existing`).
+        ORDERED implies both were received (set on `changes`). Raises HTTPException 400.
+        """
+        final = {**(existing or {}), **changes}
+        status = final.get("status")
+        
+        if status == ProcurementStatus.ORDERED:
+            changes["received_emf"] = True
+            changes["received_bom"] = True
+            return
+        
+        if final.get("received_emf") and status == ProcurementStatus.WAITING_FOR_EMF:
+            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-EMF' כאשר סומן שהתקבל EMF")
+        
+        if final.get("received_bom") and status == ProcurementStatus.WAITING_FOR_BOM:
+            raise HTTPException(status_code=400, detail="לא ניתן לבחור סטטוס 'מחכה ל-BOM' כאשר סומן שהתקבל BOM")
+    
+    @staticmethod
+    def _diff(existing: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+        """{field: {"old", "new"}} for values that actually change (JSON-safe for the audit log)"""
+        diff = {}
+        for key, value in changes.items():
+            old_val = existing.get(key)
+            # Handle Enum serialization
+            new_val = value.value if hasattr(value, 'value') else value
+            # Handle Date serialization
+            if isinstance(old_val, datetime):
+                old_val = old_val.isoformat()
+            if isinstance(new_val, datetime):
+                new_val = new_val.isoformat()
+                
+            if old_val != new_val:
+                diff[key] = {"old": old_val, "new": new_val}
+        return diff
+    
+    @staticmethod
+    def _status_change(existing: Dict[str, Any], changes: Dict[str, Any], username: str) -> Optional[Dict[str, Any]]:
+        """status_history entry when `changes` moves the order to another status"""
+        if "status" not in changes or changes["status"] == existing.get("status"):
+            return None
+        return {"status": changes["status"], "changed_at": datetime.utcnow(), "changed_by": username}
+    
+    def _file_too_large(self) -> HTTPException:
+        return HTTPException(
+            status_code=400,
+            detail=f"גודל הקובץ חורג מהמקסימום המותר ({MAX_FILE_SIZE / 1024 / 1024}MB)"
+        )
+
     def _validate_file(self, file: UploadFile):
         """Validate file type"""
         if not file.filename:
@@ -0,0 +1,167 @@
+"""
+Inventory / procurement reconciliation.
+
+For every catalog number: quantity still on order, received, on hand in
+inventory and reserved for projects, and how much was received but is missing
+from stock. The report is materialized by a background job:
+
+- Incremental runs recompute only catalog numbers of orders/items written
+  since the last run (by 'updated_at')
+- Deletes cannot be found that way, so a delete/resync change event, a missing
+  watermark or RECONCILIATION_FULL_REBUILD_SECONDS since the last full run
+  trigger a full rebuild
+- A lease in MongoDB keeps replicas from rebuilding at the same time
+"""
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+import asyncio
+import logging
+import os
+import socket
+import time
+
+from app.config import settings
+from app.core.cache import LRUCache
+from app.core.events import ChangeEvent, ChangeOperation
+from app.db.repositories.reconciliation_repository import ReconciliationRepository
+
+logger = logging.getLogger(__name__)
+
+# Writes stamped by other replicas' clocks may lag ours
+WATERMARK_SKEW = timedelta(seconds=60)
+LEASE_SECONDS = 600
+
+# Collections the report is computed from
+SOURCE_COLLECTIONS = ("inventory", "procurement_orders")
+
+
+class ReconciliationService:
+    """Runs and serves the reconciliation report."""
+
+    def __init__(
+        self,
+        repository: Optional[ReconciliationRepository] = None,
+        interval: float = settings.RECONCILIATION_INTERVAL_SECONDS,
+        full_rebuild_interval: float = settings.RECONCILIATION_FULL_REBUILD_SECONDS
+    ):
+        self.repository = repository or ReconciliationRepository()
+        self.interval = interval
+        self.full_rebuild_interval = timedelta(seconds=full_rebuild_interval)
+        self._owner = f"{socket.gethostname()}:{os.getpid()}"
+        self._full_needed = False
+        self._lock = asyncio.Lock()
+        self._cache = LRUCache(maxsize=256, ttl=settings.RECONCILIATION_CACHE_SECONDS)
+        self._task: Optional[asyncio.Task] = None
+
+    def on_change_event(self, event: ChangeEvent) -> None:
+        """Change listener handler for SOURCE_COLLECTIONS"""
+        if event.operation in (ChangeOperation.DELETE, ChangeOperation.RESYNC):
+            self._full_needed = True
+
+    async def run(self, full: bool = False) -> Dict[str, Any]:
+        """
+        Bring the report up to date.
+
+        Args:
+            full: Recompute every catalog number
+
+        Returns:
+            Run summary; 'skipped' when another replica holds the lease
+        """
+        async with self._lock:
+            if not await self.repository.acquire_lease(self._owner, LEASE_SECONDS):
+                return {"skipped": True}
+            try:
+                return await self._run_locked(full)
+            finally:
+                await self.repository.release_lease(self._owner)
+
+    async def _run_locked(self, full: bool) -> Dict[str, Any]:
+        started = datetime.utcnow()
+        clock = time.perf_counter()
+        recreated = await self.repository.ensure_results_collection()
+        state = await self.repository.get_state()
+        watermark = state.get("watermark")
+        last_full_run_at = state.get("last_full_run_at")
+
+        full = (
+            full
+            or recreated
+            or self._full_needed
+            or watermark is None
+            or last_full_run_at is None
+            or started - last_full_run_at >= self.full_rebuild_interval
+        )
+        self._full_needed = False
+
+        catalog_numbers = None
+        try:
+            if not full:
+                catalog_numbers = await self.repository.changed_catalog_numbers(watermark)
+            if catalog_numbers == []:
+                rows = state.get("rows", 0)
+            else:
+                rows = await self.repository.rebuild(catalog_numbers, started)
+        except Exception:
+            self._full_needed = self._full_needed or full
+            raise
+
+        duration_ms = round((time.perf_counter() - clock) * 1000, 1)
+        await self.repository.save_run(started - WATERMARK_SKEW, full, rows, duration_ms)
+        self._cache.clear()
+        return {
+            "skipped": False,
+            "full": full,
+            "catalog_numbers": None if catalog_numbers is None else len(catalog_numbers),
+            "rows": rows,
+            "duration_ms": duration_ms
+        }
+
+    async def get_report(
+        self,
+        page: int = 1,
+        page_size: int = 50,
+        state: Optional[str] = None,
+        catalog_number: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Page of the materialized report with the time of the last run"""
+        key = (page, page_size, state, catalog_number)
+        report = self._cache.get(key)
+        if report is None:
+            rows, total = await self.repository.get_page(
+                skip=(page - 1) * page_size, limit=page_size, state=state, catalog_number=catalog_number
+            )
+            run = await self.repository.get_state()
+            report = {
+                "rows": rows,
+                "total": total,
+                "page": page,
+                "page_size": page_size,
+                "last_run_at": run.get("last_run_at"),
+                "last_run_full": run.get("last_run_full")
+            }
+            self._cache.set(key, report)
+        return report
+
+    async def _run_periodically(self) -> None:
+        while True:
+            try:
+                await self.run()
+            except Exception as e:
+                logger.error(f"Reconciliation run failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """Start the periodic job (first run right away)."""
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run_periodically())
+
+    async def stop(self) -> None:
+        """Stop the periodic job."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
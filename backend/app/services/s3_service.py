@@ -1,16 +1,23 @@
 import os
 import uuid
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from pathlib import Path
-from typing import Optional, BinaryIO
+from typing import Any, AsyncIterator, List, Optional, BinaryIO
 import logging
 
 from app.config import settings
+from app.core.exceptions import RangeNotSatisfiableException
 
 logger = logging.getLogger(__name__)
 
 # Try to import boto3, but don't fail if not available
 try:
     import boto3
+    from boto3.s3.transfer import TransferConfig
     from botocore.exceptions import ClientError
     BOTO3_AVAILABLE = True
 except ImportError:
@@ -18,8 +25,93 @@ except ImportError:
     logger.warning("boto3 not installed. S3 features will use local storage fallback.")
 
 
+MB = 1024 * 1024
+
+# Maximum keys per S3 DeleteObjects request
+S3_DELETE_BATCH_SIZE = 1000
+
+
+class FileTooLargeError(Exception):
+    """Upload crossed the size limit"""
+
+    def __init__(self, max_size: int):
+        super().__init__(f"File exceeds {max_size} bytes")
+        self.max_size = max_size
+
+
+class MeteredReader:
+    """
+    Read-only file wrapper that counts and sha256-hashes bytes as they are read,
+    raising FileTooLargeError as soon as max_size is crossed.
+    Deliberately not seekable, so boto3 reads it once, sequentially.
+    """
+
+    def __init__(self, source: BinaryIO, max_size: Optional[int] = None):
+        self.source = source
+        self.max_size = max_size
+        self.size = 0
+        self._hash = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self.source.read(size)
+        self.size += len(chunk)
+        if self.max_size is not None and self.size > self.max_size:
+            raise FileTooLargeError(self.max_size)
+        self._hash.update(chunk)
+        return chunk
+
+    @property
+    def sha256(self) -> str:
+        return self._hash.hexdigest()
+
+
+def local_etag(stat_result: os.stat_result) -> str:
+    """ETag of a local file from its mtime and size (same scheme as Starlette's FileResponse)"""
+    etag_base = f"{stat_result.st_mtime}-{stat_result.st_size}"
+    return f'"{hashlib.md5(etag_base.encode(), usedforsecurity=False).hexdigest()}"'
+
+
+@dataclass
+class FileDownload:
+    """
+    A stored file, ready to be sent to the client.
+    S3 objects come as an async chunk iterator; local files as a path.
+    """
+    chunks: Optional[AsyncIterator[bytes]] = None
+    body: Optional[Any] = None  # S3 StreamingBody behind chunks
+    path: Optional[str] = None
+    stat_result: Optional[os.stat_result] = None
+    content_length: Optional[int] = None
+    content_range: Optional[str] = None  # Set for partial (206) responses
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    supports_ranges: bool = False
+    not_modified: bool = False  # S3 answered a conditional GET with 304, nothing to stream
+
+    def close(self) -> None:
+        """Release the S3 connection of a download that will not be streamed"""
+        if self.body is not None:
+            self.body.close()
+
+
+def _parse_http_date(value: Optional[str]) -> Optional[datetime]:
+    try:
+        parsed = parsedate_to_datetime(value) if value else None
+    except (TypeError, ValueError):
+        return None
+    if parsed is not None and parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
 class S3Service:
-    """Service for file storage with S3 and local fallback"""
+    """
+    Service for file storage with S3 and local fallback.
+
+    boto3 is blocking, so every S3 call runs in a worker thread. Uploads use
+    multipart above S3_MULTIPART_THRESHOLD_MB; downloads are streamed in
+    STORAGE_STREAM_CHUNK_SIZE chunks and support HTTP byte ranges.
+    """
     
     def __init__(self):
         self.use_s3 = getattr(settings, 'USE_S3', False) and BOTO3_AVAILABLE
@@ -31,7 +123,13 @@ class S3Service:
                     's3',
                     aws_access_key_id=getattr(settings, 'S3_ACCESS_KEY', ''),
                     aws_secret_access_key=getattr(settings, 'S3_SECRET_KEY', ''),
-                    region_name=getattr(settings, 'S3_REGION', 'us-east-1')
+                    region_name=getattr(settings, 'S3_REGION', 'us-east-1'),
+                    endpoint_url=settings.S3_ENDPOINT_URL or None
+                )
+                self.transfer_config = TransferConfig(
+                    multipart_threshold=settings.S3_MULTIPART_THRESHOLD_MB * MB,
+                    multipart_chunksize=settings.S3_MULTIPART_CHUNK_MB * MB,
+                    max_concurrency=settings.S3_MAX_CONCURRENCY
                 )
                 self.bucket_name = getattr(settings, 'S3_BUCKET_NAME', '')
                 logger.info(f"S3 service initialized with bucket: {self.bucket_name}")
@@ -48,98 +146,201 @@ class S3Service:
         self,
         file_content: BinaryIO,
         filename: str,
-        content_type: str
+        content_type: str,
+        max_size: Optional[int] = None
     ) -> dict:
         """
-        Upload file to S3 or local storage
+        Upload file to S3 or local storage, streaming it in chunks.
         
         Returns:
-            dict with 's3_key' or 'local_path' and 'file_id'
+            dict with 's3_key' or 'local_path', 'file_id', 'file_size' and 'sha256'
+
+        Raises:
+            FileTooLargeError: As soon as more than max_size bytes were read (nothing is kept)
         """
         file_id = str(uuid.uuid4())
         safe_filename = self._sanitize_filename(filename)
         
         if self.use_s3:
-            return await self._upload_to_s3(file_content, file_id, safe_filename, content_type)
+            return await self._upload_to_s3(file_content, file_id, safe_filename, content_type, max_size)
         else:
-            return await self._upload_to_local(file_content, file_id, safe_filename)
+            return await self._upload_to_local(file_content, file_id, safe_filename, max_size)
     
     async def _upload_to_s3(
         self,
         file_content: BinaryIO,
         file_id: str,
         filename: str,
-        content_type: str
+        content_type: str,
+        max_size: Optional[int] = None
     ) -> dict:
         """Upload file to S3"""
+        reader = MeteredReader(file_content, max_size)
         try:
             s3_key = f"procurement/{file_id}/{filename}"
             
-            self.s3_client.upload_fileobj(
-                file_content,
+            # A failed multipart upload (including FileTooLargeError) is aborted by boto3
+            await asyncio.to_thread(
+                self.s3_client.upload_fileobj,
+                reader,
                 self.bucket_name,
                 s3_key,
-                ExtraArgs={'ContentType': content_type}
+                ExtraArgs={'ContentType': content_type},
+                Config=self.transfer_config
             )
             
             logger.info(f"Uploaded file to S3: {s3_key}")
             return {
                 "file_id": file_id,
                 "s3_key": s3_key,
-                "local_path": None
+                "local_path": None,
+                "file_size": reader.size,
+                "sha256": reader.sha256
             }
+        except FileTooLargeError:
+            raise
         except Exception as e:
             logger.error(f"S3 upload failed: {e}")
+            if not file_content.seekable():
+                raise
             # Fallback to local storage
-            return await self._upload_to_local(file_content, file_id, filename)
+            file_content.seek(0)
+            return await self._upload_to_local(file_content, file_id, filename, max_size)
     
     async def _upload_to_local(
         self,
         file_content: BinaryIO,
         file_id: str,
-        filename: str
+        filename: str,
+        max_size: Optional[int] = None
     ) -> dict:
         """Upload file to local storage"""
         file_dir = self.local_storage_path / file_id
-        file_dir.mkdir(parents=True, exist_ok=True)
-        
         file_path = file_dir / filename
-        
-        with open(file_path, 'wb') as f:
-            f.write(file_content.read())
+        reader = MeteredReader(file_content, max_size)
+
+        await asyncio.to_thread(self._copy_to_path, reader, file_path)
         
         logger.info(f"Uploaded file to local storage: {file_path}")
         return {
             "file_id": file_id,
             "s3_key": None,
-            "local_path": str(file_path)
+            "local_path": str(file_path),
+            "file_size": reader.size,
+            "sha256": reader.sha256
         }
+
+    @staticmethod
+    def _copy_to_path(reader: "MeteredReader", file_path: Path) -> None:
+        """Chunked copy (runs in a worker thread). Removes the partial file on failure."""
+        file_path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            with open(file_path, 'wb') as f:
+                while chunk := reader.read(settings.STORAGE_STREAM_CHUNK_SIZE):
+                    f.write(chunk)
+        except BaseException:
+            file_path.unlink(missing_ok=True)
+            try:
+                file_path.parent.rmdir()
+            except OSError:
+                pass
+            raise
     
-    async def download_file(self, s3_key: Optional[str] = None, local_path: Optional[str] = None) -> Optional[bytes]:
-        """Download file from S3 or local storage"""
+    async def download_file(
+        self,
+        s3_key: Optional[str] = None,
+        local_path: Optional[str] = None,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[str] = None
+    ) -> Optional[FileDownload]:
+        """
+        Open a stored file for streaming.
+
+        Args:
+            byte_range: HTTP Range header value (e.g. "bytes=0-1023"), S3 only
+            if_none_match / if_modified_since: Conditional request headers, sent to S3 so that
+                an unchanged object comes back as not_modified without opening its body
+
+        Raises:
+            RangeNotSatisfiableException: If the range is outside the object
+        """
         if s3_key and self.use_s3:
-            return await self._download_from_s3(s3_key)
+            return await self._download_from_s3(s3_key, byte_range, if_none_match, if_modified_since)
         elif local_path:
             return await self._download_from_local(local_path)
         return None
     
-    async def _download_from_s3(self, s3_key: str) -> Optional[bytes]:
-        """Download file from S3"""
+    async def _download_from_s3(
+        self,
+        s3_key: str,
+        byte_range: Optional[str] = None,
+        if_none_match: Optional[str] = None,
+        if_modified_since: Optional[str] = None
+    ) -> Optional[FileDownload]:
+        """Stream file from S3 (ranged GET when byte_range is given, conditional GET when validators are)"""
+        params = {"Bucket": self.bucket_name, "Key": s3_key}
+        if byte_range:
+            params["Range"] = byte_range
+        # If-None-Match takes precedence over If-Modified-Since
+        modified_since = _parse_http_date(if_modified_since)
+        if if_none_match:
+            params["IfNoneMatch"] = if_none_match
+        elif modified_since:
+            params["IfModifiedSince"] = modified_since
         try:
-            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=s3_key)
-            return response['Body'].read()
+            response = await asyncio.to_thread(self.s3_client.get_object, **params)
         except ClientError as e:
+            metadata = e.response.get("ResponseMetadata", {})
+            if metadata.get("HTTPStatusCode") == 304:
+                headers = metadata.get("HTTPHeaders", {})
+                return FileDownload(
+                    etag=headers.get("etag"),
+                    last_modified=_parse_http_date(headers.get("last-modified")),
+                    supports_ranges=True,
+                    not_modified=True
+                )
+            if e.response.get("Error", {}).get("Code") == "InvalidRange":
+                raise RangeNotSatisfiableException()
             logger.error(f"S3 download failed: {e}")
             return None
+
+        return FileDownload(
+            chunks=self._iter_s3_body(response["Body"]),
+            body=response["Body"],
+            content_length=response.get("ContentLength"),
+            content_range=response.get("ContentRange") if byte_range else None,
+            etag=response.get("ETag"),
+            last_modified=response.get("LastModified"),
+            supports_ranges=True
+        )
+
+    async def _iter_s3_body(self, body) -> AsyncIterator[bytes]:
+        try:
+            while True:
+                chunk = await asyncio.to_thread(body.read, settings.STORAGE_STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
     
-    async def _download_from_local(self, local_path: str) -> Optional[bytes]:
-        """Download file from local storage"""
+    async def _download_from_local(self, local_path: str) -> Optional[FileDownload]:
+        """Describe a local file; the route sends it with FileResponse (sendfile, ranges)"""
         try:
-            with open(local_path, 'rb') as f:
-                return f.read()
-        except Exception as e:
+            stat_result = await asyncio.to_thread(os.stat, local_path)
+        except OSError as e:
             logger.error(f"Local download failed: {e}")
             return None
+
+        return FileDownload(
+            path=local_path,
+            stat_result=stat_result,
+            content_length=stat_result.st_size,
+            etag=local_etag(stat_result),
+            last_modified=datetime.fromtimestamp(stat_result.st_mtime, tz=timezone.utc),
+            supports_ranges=True
+        )
     
     async def delete_file(self, s3_key: Optional[str] = None, local_path: Optional[str] = None) -> bool:
         """Delete file from S3 or local storage"""
@@ -152,7 +353,7 @@ class S3Service:
     async def _delete_from_s3(self, s3_key: str) -> bool:
         """Delete file from S3"""
         try:
-            self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
+            await asyncio.to_thread(self.s3_client.delete_object, Bucket=self.bucket_name, Key=s3_key)
             logger.info(f"Deleted file from S3: {s3_key}")
             return True
         except ClientError as e:
@@ -162,20 +363,101 @@ class S3Service:
     async def _delete_from_local(self, local_path: str) -> bool:
         """Delete file from local storage"""
         try:
-            path = Path(local_path)
-            if path.exists():
-                path.unlink()
-                # Try to remove parent directory if empty
-                try:
-                    path.parent.rmdir()
-                except OSError:
-                    pass  # Directory not empty
+            if await asyncio.to_thread(self._unlink_local, local_path):
                 logger.info(f"Deleted file from local storage: {local_path}")
                 return True
         except Exception as e:
             logger.error(f"Local delete failed: {e}")
         return False
-    
+
+    @staticmethod
+    def _unlink_local(local_path: str) -> bool:
+        """Remove a file and its directory if empty (runs in a worker thread). False if missing."""
+        path = Path(local_path)
+        if not path.exists():
+            return False
+        path.unlink()
+        # Try to remove parent directory if empty
+        try:
+            path.parent.rmdir()
+        except OSError:
+            pass  # Directory not empty
+        return True
+
+    async def delete_files(self, locations: List[dict]) -> List[dict]:
+        """
+        Delete many stored files: S3 keys in delete_objects batches, local files concurrently.
+        Files that are already gone count as deleted.
+
+        Returns:
+            The locations that could not be deleted
+        """
+        s3_keys = [loc["s3_key"] for loc in locations if loc.get("s3_key") and self.use_s3]
+        local = [loc for loc in locations if not (loc.get("s3_key") and self.use_s3) and loc.get("local_path")]
+
+        batches = [s3_keys[i:i + S3_DELETE_BATCH_SIZE] for i in range(0, len(s3_keys), S3_DELETE_BATCH_SIZE)]
+        results = await asyncio.gather(
+            *(self._delete_s3_batch(batch) for batch in batches),
+            *(self._delete_local_quietly(loc["local_path"]) for loc in local)
+        )
+
+        failed = [{"s3_key": key, "local_path": None} for keys in results[:len(batches)] for key in keys]
+        failed += [loc for loc, ok in zip(local, results[len(batches):]) if not ok]
+        return failed
+
+    async def _delete_s3_batch(self, keys: List[str]) -> List[str]:
+        """One delete_objects call. Returns the keys that failed."""
+        try:
+            response = await asyncio.to_thread(
+                self.s3_client.delete_objects,
+                Bucket=self.bucket_name,
+                Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True}
+            )
+        except ClientError as e:
+            logger.error(f"S3 batch delete failed: {e}")
+            return keys
+        errors = response.get("Errors", [])
+        for error in errors:
+            logger.error(f"S3 delete failed for {error.get('Key')}: {error.get('Code')}")
+        logger.info(f"Deleted {len(keys) - len(errors)} files from S3")
+        return [error["Key"] for error in errors]
+
+    async def _delete_local_quietly(self, local_path: str) -> bool:
+        try:
+            await asyncio.to_thread(self._unlink_local, local_path)
+            return True
+        except Exception as e:
+            logger.error(f"Local delete failed: {e}")
+            return False
+
+    async def list_files(self, older_than: datetime) -> List[dict]:
+        """
+        Stored files last modified before `older_than` (timezone-aware).
+
+        Returns:
+            [{'s3_key': ...}] or [{'local_path': ...}] depending on the backend
+        """
+        if self.use_s3:
+            return await asyncio.to_thread(self._list_s3_files, older_than)
+        return await asyncio.to_thread(self._list_local_files, older_than)
+
+    def _list_s3_files(self, older_than: datetime) -> List[dict]:
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        return [
+            {"s3_key": obj["Key"]}
+            for page in paginator.paginate(Bucket=self.bucket_name, Prefix="procurement/")
+            for obj in page.get("Contents", [])
+            if obj["LastModified"] < older_than
+        ]
+
+    def _list_local_files(self, older_than: datetime) -> List[dict]:
+        cutoff = older_than.timestamp()
+        return [
+            {"local_path": str(path)}
+            for path in self.local_storage_path.rglob("*")
+            if path.is_file() and path.stat().st_mtime < cutoff
+        ]
+
     def _sanitize_filename(self, filename: str) -> str:
         """Sanitize filename to prevent path traversal"""
         # Remove any path components
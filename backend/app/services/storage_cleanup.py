@@ -0,0 +1,111 @@
+"""
+Deferred deletion of stored procurement files.
+
+Requests only drop the database references and hand the storage locations to
+this queue, so they return as soon as MongoDB is updated. A background task
+deletes the files in batches and retries failures; whatever still fails after
+STORAGE_CLEANUP_MAX_ATTEMPTS is left to the blob GC.
+"""
+from typing import Dict, List, Optional, Set
+import asyncio
+import logging
+
+from app.config import settings
+from app.services.s3_service import S3Service
+
+logger = logging.getLogger(__name__)
+
+
+def _key(location: dict) -> tuple:
+    return location.get("s3_key"), location.get("local_path")
+
+
+class StorageCleanupQueue:
+    """Pending storage deletions with retry."""
+
+    def __init__(
+        self,
+        s3_service: S3Service,
+        retry_interval: float = settings.STORAGE_CLEANUP_RETRY_SECONDS,
+        max_attempts: int = settings.STORAGE_CLEANUP_MAX_ATTEMPTS
+    ):
+        self.s3_service = s3_service
+        self.retry_interval = retry_interval
+        self.max_attempts = max_attempts
+        self._pending: List[dict] = []
+        self._attempts: Dict[tuple, int] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._one_shot: Set[asyncio.Task] = set()
+
+    def enqueue(self, locations: List[dict]) -> None:
+        """Schedule deletion. Never blocks and never raises."""
+        if not locations:
+            return
+        self._pending.extend(locations)
+        if self._task is not None:
+            self._wakeup.set()
+        else:
+            # No worker (app served without lifespan) - delete in a detached task
+            task = asyncio.create_task(self.drain())
+            self._one_shot.add(task)
+            task.add_done_callback(self._one_shot.discard)
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def drain(self) -> int:
+        """Try to delete everything pending now. Returns the number of files deleted."""
+        if not self._pending:
+            return 0
+
+        batch, self._pending = self._pending, []
+        try:
+            failed = await self.s3_service.delete_files(batch)
+        except Exception as e:
+            logger.error(f"Storage cleanup failed: {e}")
+            failed = batch
+
+        failed_keys = {_key(location) for location in failed}
+        for location in batch:
+            if _key(location) not in failed_keys:
+                self._attempts.pop(_key(location), None)
+
+        for location in failed:
+            attempts = self._attempts.get(_key(location), 0) + 1
+            if attempts >= self.max_attempts:
+                self._attempts.pop(_key(location), None)
+                logger.error(f"Giving up deleting stored file {location} after {attempts} attempts")
+            else:
+                self._attempts[_key(location)] = attempts
+                self._pending.append(location)
+
+        return len(batch) - len(failed)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.retry_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.drain()
+
+    def start(self) -> None:
+        """Start the background worker."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the worker and make a last attempt at what is pending."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._one_shot:
+            await asyncio.gather(*self._one_shot, return_exceptions=True)
+        await self.drain()
+
@@ -5,7 +5,8 @@ from fastapi import HTTPException
 import logging
 
 from app.db.mongodb import MongoDB
-from app.core.password import hash_password, verify_password
+from app.core.password import hash_password_async, verify_password_async
+from app.core.rate_limit import forget_unknown_username
 from app.schemas.user import UserCreate, UserUpdate, UserRole
 from app.schemas.audit import AuditAction
 from app.core.exceptions import NotFoundException, BadRequestException
@@ -123,7 +124,7 @@ class UserService:
         
         user_doc = {
             "username": user_data.username,
-            "password_hash": hash_password(user_data.password),
+            "password_hash": await hash_password_async(user_data.password),
             "role": user_data.role.value,
             "is_active": True,
             "created_by": created_by,
@@ -133,6 +134,7 @@ class UserService:
         }
         
         result = await collection.insert_one(user_doc)
+        forget_unknown_username(user_data.username)
         user_doc["id"] = str(result.inserted_id)
         user_doc.pop("_id", None)
         user_doc.pop("password_hash", None)
@@ -371,13 +373,13 @@ class UserService:
         if not user:
             raise NotFoundException("משתמש לא נמצא")
         
-        if not verify_password(current_password, user["password_hash"]):
+        if not await verify_password_async(current_password, user["password_hash"]):
             raise BadRequestException("סיסמה נוכחית שגויה")
         
         await collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": {
-                "password_hash": hash_password(new_password),
+                "password_hash": await hash_password_async(new_password),
                 "updated_at": datetime.utcnow()
             }}
         )
@@ -399,6 +401,18 @@ class UserService:
         
         return {"message": "סיסמה עודכנה בהצלחה"}
     
+    async def update_password_hash(self, username: str, old_hash: str, new_hash: str) -> bool:
+        """
+        Replace a password hash (cost factor upgrade).
+        Only applies if the stored hash is still old_hash, so a concurrent password change wins.
+        """
+        collection = self._get_collection()
+        result = await collection.update_one(
+            {"username": username, "password_hash": old_hash},
+            {"$set": {"password_hash": new_hash}}
+        )
+        return result.modified_count > 0
+
     async def update_last_login(self, username: str) -> None:
         """Update user's last login timestamp"""
         collection = self._get_collection()
@@ -440,7 +454,7 @@ class UserService:
         
         user_doc = {
             "username": username,
-            "password_hash": hash_password(password),
+            "password_hash": await hash_password_async(password),
             "role": UserRole.SUPERADMIN.value,
             "is_active": True,
             "created_by": "system",
@@ -450,6 +464,7 @@ class UserService:
         }
         
         await collection.insert_one(user_doc)
+        forget_unknown_username(username)
         logger.info(f"✅ Initial SuperAdmin user '{username}' created")
         return True
     
@@ -0,0 +1,69 @@
+"""
+Benchmark authenticated request throughput with and without the verified-token cache.
+
+Runs get_current_user / require_admin / require_superadmin behind a minimal
+FastAPI app through httpx's ASGI transport (no network, no MongoDB).
+
+    cd backend && python scripts/bench_auth.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Depends, FastAPI
+
+from app.core import security
+from app.core.cache import LRUCache
+from app.core.security import create_access_token, get_current_user, require_admin, require_superadmin
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/user")
+    async def user(current_user: dict = Depends(get_current_user)):
+        return {"ok": True}
+
+    @app.get("/admin")
+    async def admin(current_user: dict = Depends(require_admin)):
+        return {"ok": True}
+
+    @app.get("/superadmin")
+    async def superadmin(current_user: dict = Depends(require_superadmin)):
+        return {"ok": True}
+
+    return app
+
+
+async def run(path: str, token: str, total: int) -> float:
+    transport = httpx.ASGITransport(app=build_app())
+    headers = {"Authorization": f"Bearer {token}"}
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(total):
+            response = await client.get(path, headers=headers)
+            assert response.status_code == 200
+        return total / (time.perf_counter() - start)
+
+
+async def main(total: int) -> None:
+    token = create_access_token({"sub": "bench", "username": "bench", "role": "superadmin"})
+
+    for path in ("/user", "/admin", "/superadmin"):
+        results = {}
+        for label, size in (("no cache", 0), ("cache", 10000)):
+            security._verified_tokens = LRUCache(maxsize=size)
+            results[label] = await run(path, token, total)
+        print(f"{path:12} no cache: {results['no cache']:8.0f} req/s   cache: {results['cache']:8.0f} req/s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests))
@@ -0,0 +1,58 @@
+"""
+Simulate a login storm and report event loop lag and verification throughput.
+
+Compares verify_password called directly on the loop with verify_password_async
+(bounded bcrypt pool). No MongoDB needed.
+
+    cd backend && python scripts/bench_login_storm.py [--logins 50] [--rounds 12]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.password import hash_password, verify_password, verify_password_async
+
+
+async def blocking_verify(password: str, hashed: str) -> bool:
+    return verify_password(password, hashed)
+
+
+async def storm(verify, hashed: str, logins: int) -> tuple[float, float]:
+    """Returns (logins per second, worst event loop lag in ms)"""
+    worst = 0.0
+    stop = asyncio.Event()
+
+    async def ticker():
+        nonlocal worst
+        while not stop.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - start - 0.01)
+
+    tick_task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    await asyncio.gather(*(verify("secret", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await tick_task
+    return logins / elapsed, worst * 1000
+
+
+async def main(logins: int, rounds: int) -> None:
+    hashed = hash_password("secret", rounds=rounds)
+    for label, verify in (("on loop", blocking_verify), ("bcrypt pool", verify_password_async)):
+        rate, lag = await storm(verify, hashed, logins)
+        print(f"{label:12} {rate:7.1f} logins/s   worst loop lag: {lag:8.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.rounds))
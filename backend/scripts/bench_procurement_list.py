@@ -0,0 +1,151 @@
+"""
+Benchmark the procurement orders list on synthetic data.
+
+Seeds a scratch collection with N orders (default 500k), creates the
+procurement_orders indexes from app/db/indexes.py and compares the previous
+query shapes (unanchored $regex, $ne, skip paging) with ProcurementQuery
+(collated prefix ranges, $in statuses, keyset paging).
+
+Needs a MongoDB at MONGODB_URL. The scratch collection is dropped at the end
+unless --keep is given.
+
+    cd backend && python scripts/bench_procurement_list.py [--orders 500000] [--keep]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.config import settings
+from app.db.indexes import INDEXES
+from app.db.utils.procurement_query import ProcurementQuery, PROCUREMENT_COLLATION, ORDER_SORT, encode_cursor
+from app.schemas.procurement import ProcurementStatus
+
+COLLECTION = "bench_procurement_orders"
+PAGE_SIZE = 50
+MANUFACTURERS = ["Cisco", "Dell", "HP", "Juniper", "Lenovo", "Intel", "Supermicro", "Arista"]
+STATUSES = [s.value for s in ProcurementStatus]
+
+
+async def seed(collection, total: int) -> None:
+    await collection.drop()
+    start = datetime(2020, 1, 1)
+    batch = []
+    for i in range(total):
+        manufacturer = random.choice(MANUFACTURERS)
+        batch.append({
+            "catalog_number": f"{manufacturer[:3].upper()}-{random.randint(0, 99999):05d}",
+            "manufacturer": manufacturer,
+            "description": "synthetic",
+            "quantity": random.randint(1, 100),
+            "order_date": start + timedelta(minutes=random.randint(0, 5 * 365 * 24 * 60)),
+            "amount": round(random.uniform(10, 10000), 2),
+            "status": random.choice(STATUSES),
+            "files": [],
+        })
+        if len(batch) == 10000:
+            await collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await collection.insert_many(batch, ordered=False)
+    for keys, options in INDEXES["procurement_orders"]:
+        await collection.create_index(keys, **options)
+
+
+async def timed(label: str, func, repeat: int = 5) -> None:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    print(f"  {label:<44} median {timings[len(timings) // 2]:8.1f} ms")
+
+
+def legacy_filter(catalog_number=None, manufacturer=None, status_ne=None):
+    query = {}
+    if catalog_number:
+        query["catalog_number"] = {"$regex": catalog_number, "$options": "i"}
+    if manufacturer:
+        query["manufacturer"] = {"$regex": manufacturer, "$options": "i"}
+    if status_ne:
+        query["status"] = {"$ne": status_ne}
+    return query
+
+
+async def legacy_page(collection, page: int, **filters) -> None:
+    query = legacy_filter(**filters)
+    await collection.count_documents(query)
+    await collection.find(query).sort("order_date", -1).skip((page - 1) * PAGE_SIZE).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+
+async def new_page(collection, page: int, include_total: bool = True, after=None, **filters) -> list:
+    query = ProcurementQuery(**filters)
+    if include_total:
+        await collection.count_documents(query.build(), collation=PROCUREMENT_COLLATION)
+    cursor = collection.find(query.build(after), collation=PROCUREMENT_COLLATION).sort(ORDER_SORT)
+    if not after:
+        cursor = cursor.skip((page - 1) * PAGE_SIZE)
+    return await cursor.limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+
+async def keyset_cursor_at(collection, page: int, **filters):
+    """Cursor for `page`, found by walking pages without totals"""
+    after = None
+    for _ in range(page - 1):
+        orders = await new_page(collection, 1, include_total=False, after=after, **filters)
+        orders[-1]["id"] = str(orders[-1]["_id"])
+        after = encode_cursor(orders[-1])
+    return after
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=500_000)
+    parser.add_argument("--keep", action="store_true", help="keep the scratch collection")
+    parser.add_argument("--reuse", action="store_true", help="skip seeding (use a kept collection)")
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    collection = client[settings.DB_NAME][COLLECTION]
+    try:
+        if not args.reuse:
+            print(f"Seeding {args.orders} orders...")
+            start = time.perf_counter()
+            await seed(collection, args.orders)
+            print(f"Seeded in {time.perf_counter() - start:.1f}s")
+
+        scenarios = [
+            ("first page, no filter", {}),
+            ("catalog_number prefix 'CIS-12'", {"catalog_number": "CIS-12"}),
+            ("manufacturer 'juniper'", {"manufacturer": "juniper"}),
+            ("status_ne 'received'", {"status_ne": "received"}),
+        ]
+        for label, filters in scenarios:
+            print(label)
+            await timed("before: $regex/$ne + count", lambda: legacy_page(collection, 1, **filters))
+            await timed("after: collated range/$in + count", lambda: new_page(collection, 1, **filters))
+
+        print("status_in + date range (one quarter)")
+        ranged = {"status_in": ["ordered", "received"], "date_from": datetime(2022, 1, 1), "date_to": datetime(2022, 4, 1)}
+        await timed("after: (status, order_date) index + count", lambda: new_page(collection, 1, **ranged))
+
+        print("deep page (page 2000)")
+        after = await keyset_cursor_at(collection, 2000)
+        await timed("before: skip 99,950 + count", lambda: legacy_page(collection, 2000))
+        await timed("after: keyset cursor, no count", lambda: new_page(collection, 1, include_total=False, after=after))
+    finally:
+        if not args.keep:
+            await collection.drop()
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
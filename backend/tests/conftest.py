@@ -23,6 +23,8 @@ from app.config import settings
 from app.db.mongodb import MongoDB
 from app.main import app
 
+pytest_plugins = ["tests.plugins.blocking_calls"]
+
 
 # ========== Test Configuration ==========
 
@@ -35,6 +37,8 @@ TEST_COLLECTIONS = {
     "warehouse-audit-logs": f"{TEST_COLLECTION_PREFIX}warehouse_audit_logs",
     "users": f"{TEST_COLLECTION_PREFIX}users",
     "groups": f"{TEST_COLLECTION_PREFIX}groups",
+    "warehouse-activity-daily": f"{TEST_COLLECTION_PREFIX}warehouse_activity_daily",
+    "warehouse-activity-hourly": f"{TEST_COLLECTION_PREFIX}warehouse_activity_hourly",
 }
 
 
@@ -103,6 +107,22 @@ async def test_groups_collection(test_db) -> AsyncGenerator[AsyncIOMotorCollecti
     await collection.delete_many({})
 
 
+@pytest_asyncio.fixture(scope="function")
+async def test_activity_daily_collection(test_db) -> AsyncGenerator[AsyncIOMotorCollection, None]:
+    """Get daily activity rollup test collection, cleaned after each test."""
+    collection = test_db[TEST_COLLECTIONS["warehouse-activity-daily"]]
+    yield collection
+    await collection.delete_many({})
+
+
+@pytest_asyncio.fixture(scope="function")
+async def test_activity_hourly_collection(test_db) -> AsyncGenerator[AsyncIOMotorCollection, None]:
+    """Get hourly activity rollup test collection, cleaned after each test."""
+    collection = test_db[TEST_COLLECTIONS["warehouse-activity-hourly"]]
+    yield collection
+    await collection.delete_many({})
+
+
 # ========== Session Cleanup ==========
 
 @pytest_asyncio.fixture(scope="session", autouse=True)
@@ -153,6 +173,29 @@ def mock_mongodb(test_db, monkeypatch):
 
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def reset_login_rate_limiter():
+    """Login limiter and unknown-username cache are process-wide; start every test clean."""
+    from app.core.rate_limit import MemoryRateLimitBackend, login_rate_limiter, forget_unknown_username
+    login_rate_limiter.backend = MemoryRateLimitBackend()
+    forget_unknown_username()
+    yield
+
+
+@pytest.fixture(autouse=True)
+def reset_group_directory(monkeypatch):
+    """Fresh in-process group map per test (tests write groups directly to the collection)."""
+    from app.services import group_service
+    monkeypatch.setattr(group_service, "group_directory", group_service.GroupDirectory())
+
+
+@pytest.fixture(autouse=True)
+def reset_procurement_stats():
+    """Stats are cached per process; tests clean the collection directly."""
+    from app.services.procurement_service import invalidate_procurement_stats
+    invalidate_procurement_stats()
+
+
 # ========== Mock User Fixtures ==========
 
 @pytest.fixture
@@ -3,6 +3,7 @@ Integration tests for Admin API routes.
 """
 import pytest
 from app.schemas.user import UserRole
+from app.config import settings
 
 @pytest.mark.asyncio
 class TestAdminRoutes:
@@ -80,3 +81,30 @@ class TestAdminRoutes:
         response = await async_client.get("/api/admin/stats")
         assert response.status_code == 200
         assert "total_users" in response.json()
+
+    async def test_get_slow_queries_route(self, async_client):
+        """GET /api/admin/slow-queries - Slowest query shapes."""
+        response = await async_client.get("/api/admin/slow-queries?limit=5&order_by=max_ms")
+        assert response.status_code == 200
+        assert "shapes" in response.json()
+
+    async def test_metrics_route(self, async_client, monkeypatch):
+        """GET /metrics - Prometheus exposition behind METRICS_TOKEN, 503 without prometheus_client."""
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "scrape-token")
+        response = await async_client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+        assert response.status_code in (200, 503)
+
+        response = await async_client.get("/metrics", headers={"Authorization": "Bearer wrong"})
+        assert response.status_code == 401
+
+    async def test_metrics_route_disabled_without_token(self, async_client, monkeypatch):
+        """GET /metrics - Not served while METRICS_TOKEN is unset."""
+        monkeypatch.setattr(settings, "METRICS_TOKEN", "")
+        response = await async_client.get("/metrics")
+        assert response.status_code == 404
+
+    async def test_get_blocking_calls_route(self, async_client):
+        """GET /api/admin/blocking-calls - Event loop lag and blocking call sites."""
+        response = await async_client.get("/api/admin/blocking-calls")
+        assert response.status_code == 200
+        assert "sites" in response.json()
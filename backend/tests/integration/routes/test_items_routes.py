@@ -82,3 +82,9 @@ class TestItemsRoutes:
         response = await async_client.get("/api/items/stale")
         assert response.status_code == 200
         assert "items" in response.json()
+
+    async def test_get_expiring_warranties_route(self, async_client):
+        """GET /items/warranty-expiring - List items whose warranty ends soon."""
+        response = await async_client.get("/api/items/warranty-expiring?days=30")
+        assert response.status_code == 200
+        assert "items" in response.json()
@@ -3,6 +3,10 @@ Integration tests for Procurement API routes.
 """
 import pytest
 from datetime import datetime
+from unittest.mock import MagicMock
+
+from app.services.procurement_service import ProcurementService
+from app.services.s3_service import FileDownload
 
 @pytest.mark.asyncio
 class TestProcurementRoutes:
@@ -35,6 +39,15 @@ class TestProcurementRoutes:
         assert "orders" in data
         assert "total" in data
 
+    async def test_get_stats_route(self, async_client):
+        """GET /procurement/stats - Pipeline statistics."""
+        response = await async_client.get("/api/procurement/stats")
+        
+        assert response.status_code == 200
+        data = response.json()
+        for key in ("total_orders", "by_status", "by_manufacturer", "by_month", "lead_time"):
+            assert key in data
+
     async def test_update_order_route(self, async_client):
         """PUT /procurement/orders/{id} - Update order."""
         # Create
@@ -73,3 +86,63 @@ class TestProcurementRoutes:
         
         assert response.status_code == 200
         assert "נמחקה בהצלחה" in response.json()["message"]
+
+    async def test_download_local_file_range_and_conditional(self, async_client, monkeypatch, tmp_path):
+        """GET /procurement/orders/{id}/files/{file_id} - Range, ETag and 304 for local storage."""
+        monkeypatch.chdir(tmp_path)
+        order_data = {
+            "catalog_number": "API-FILE",
+            "manufacturer": "V",
+            "description": "D",
+            "quantity": 1,
+            "order_date": datetime.utcnow().isoformat(),
+            "amount": 10.0
+        }
+        created = await async_client.post("/api/procurement/orders", json=order_data)
+        order_id = created.json()["id"]
+
+        content = b"0123456789" * 100
+        uploaded = await async_client.post(
+            f"/api/procurement/orders/{order_id}/files",
+            files={"file": ("spec.pdf", content, "application/pdf")}
+        )
+        file_id = uploaded.json()["file_id"]
+        url = f"/api/procurement/orders/{order_id}/files/{file_id}"
+
+        full = await async_client.get(url)
+        assert full.status_code == 200
+        assert full.content == content
+        assert full.headers["accept-ranges"] == "bytes"
+        etag = full.headers["etag"]
+
+        partial = await async_client.get(url, headers={"Range": "bytes=10-19"})
+        assert partial.status_code == 206
+        assert partial.content == content[10:20]
+        assert partial.headers["content-range"] == f"bytes 10-19/{len(content)}"
+
+        cached = await async_client.get(url, headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.headers["etag"] == etag
+
+        cached = await async_client.get(url, headers={"If-Modified-Since": full.headers["last-modified"]})
+        assert cached.status_code == 304
+
+    async def test_download_s3_not_modified_closes_body(self, async_client, monkeypatch):
+        """GET /procurement/orders/{id}/files/{file_id} - a 304 releases the unread S3 body."""
+        body = MagicMock()
+
+        async def chunks():
+            yield b"never sent"
+
+        async def fake_download(self, order_id, file_id, **kwargs):
+            download = FileDownload(chunks=chunks(), body=body, etag='W/"abc"', supports_ranges=True)
+            return download, "spec.pdf", "application/pdf"
+
+        monkeypatch.setattr(ProcurementService, "download_file", fake_download)
+
+        response = await async_client.get(
+            "/api/procurement/orders/any/files/any", headers={"If-None-Match": '"abc"'}
+        )
+
+        assert response.status_code == 304
+        body.close.assert_called_once()
@@ -0,0 +1,55 @@
+"""
+Pytest plugin failing tests that block the event loop.
+
+Opt-in: run with --fail-on-blocking (or --fail-on-blocking=MS for a threshold
+other than LOOP_BLOCK_THRESHOLD_MS). Only the test call itself is checked,
+not fixture setup / teardown. Tests that block on purpose are marked
+@pytest.mark.allow_blocking.
+"""
+import pytest
+
+from app.config import settings
+from app.core.loop_diagnostics import BlockingCallDetector
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        "--fail-on-blocking", action="store", type=float, nargs="?", default=None,
+        const=settings.LOOP_BLOCK_THRESHOLD_MS, metavar="MS",
+        help="Fail tests whose event loop callbacks run longer than MS milliseconds"
+    )
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "allow_blocking: do not fail this test for blocking the event loop")
+    threshold_ms = config.getoption("--fail-on-blocking")
+    if threshold_ms is not None:
+        config.pluginmanager.register(BlockingCallsPlugin(threshold_ms), "blocking_calls")
+
+
+class BlockingCallsPlugin:
+    def __init__(self, threshold_ms: float):
+        self.detector = BlockingCallDetector(threshold_ms=threshold_ms)
+
+    def pytest_sessionstart(self, session):
+        self.detector.enable()
+
+    def pytest_sessionfinish(self, session):
+        self.detector.disable()
+
+    @pytest.hookimpl(wrapper=True)
+    def pytest_runtest_call(self, item):
+        self.detector.reset()
+        result = yield
+        sites = self.detector.top()
+        if sites and item.get_closest_marker("allow_blocking") is None:
+            lines = [
+                f"  {site['max_ms']:.0f}ms x{site['count']} at {site['site']}"
+                + (f" ({site['call']})" if site["call"] else "")
+                for site in sites
+            ]
+            pytest.fail(
+                f"Event loop blocked longer than {self.detector.threshold_ms:.0f}ms:\n" + "\n".join(lines),
+                pytrace=False
+            )
+        return result
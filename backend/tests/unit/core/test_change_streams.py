@@ -0,0 +1,96 @@
+"""
+Tests for the change listener and the in-process event bus.
+"""
+import pytest
+from datetime import datetime, timedelta
+
+from app.core.events import EventBus, ChangeEvent, ChangeOperation, ChangeSource, ALL_COLLECTIONS
+from app.db.change_streams import ChangeStreamListener
+
+
+class TestEventBus:
+    """Test suite for EventBus."""
+
+    @pytest.mark.asyncio
+    async def test_publish_to_sync_and_async_subscribers(self):
+        """Test events reach collection and wildcard subscribers."""
+        bus = EventBus()
+        received = []
+
+        async def async_handler(event):
+            received.append(("async", event.document_id))
+
+        bus.subscribe("inventory", lambda event: received.append(("sync", event.document_id)))
+        bus.subscribe(ALL_COLLECTIONS, async_handler)
+        bus.subscribe("users", lambda event: received.append(("users", event.document_id)))
+
+        await bus.publish(ChangeEvent(collection="inventory", operation=ChangeOperation.UPDATE, document_id="1"))
+
+        assert received == [("sync", "1"), ("async", "1")]
+
+    @pytest.mark.asyncio
+    async def test_failing_handler_does_not_block_others(self):
+        """Test a handler error is isolated."""
+        bus = EventBus()
+        received = []
+
+        def broken(event):
+            raise RuntimeError("boom")
+
+        bus.subscribe("groups", broken)
+        unsubscribe = bus.subscribe("groups", lambda event: received.append(event.operation))
+
+        await bus.publish(ChangeEvent(collection="groups", operation=ChangeOperation.DELETE))
+        unsubscribe()
+        await bus.publish(ChangeEvent(collection="groups", operation=ChangeOperation.DELETE))
+
+        assert received == [ChangeOperation.DELETE]
+
+
+class TestChangeStreamListener:
+    """Test suite for the polling fallback of ChangeStreamListener."""
+
+    @pytest.mark.asyncio
+    async def test_tokens_not_persisted_without_consumer(self, monkeypatch):
+        """Test a listener without a stable consumer name never reads or writes resume tokens."""
+        from app.db import change_streams
+
+        def no_collection(name):
+            raise AssertionError(f"{name} accessed")
+
+        monkeypatch.setattr(change_streams.MongoDB, "get_collection", no_collection)
+        listener = ChangeStreamListener(["items"], EventBus(), consumer=None, poll_interval=1)
+
+        assert await listener._load_token("items") is None
+        await listener._save_token("items", {"_data": "token"}, force=True)
+
+    @pytest.mark.asyncio
+    async def test_poll_once_publishes_updates(self, test_items_collection):
+        """Test polling publishes insert/update events and advances the watermark."""
+        bus = EventBus()
+        events = []
+        bus.subscribe("items", events.append)
+        listener = ChangeStreamListener(["items"], bus, consumer="test", poll_interval=1)
+
+        since = datetime.utcnow() - timedelta(minutes=1)
+        now = datetime.utcnow()
+        created = await test_items_collection.insert_one({"catalog_number": "NEW", "created_at": now, "updated_at": now})
+        updated = await test_items_collection.insert_one({
+            "catalog_number": "OLD",
+            "created_at": now - timedelta(days=3),
+            "updated_at": now + timedelta(seconds=1)
+        })
+        await test_items_collection.insert_one({"catalog_number": "UNCHANGED", "updated_at": since - timedelta(days=1)})
+
+        watermark = await listener.poll_once("items", since)
+
+        assert [(e.document_id, e.operation) for e in events] == [
+            (str(created.inserted_id), ChangeOperation.INSERT),
+            (str(updated.inserted_id), ChangeOperation.UPDATE),
+        ]
+        assert all(e.source == ChangeSource.POLLING for e in events)
+
+        # Nothing new since the watermark
+        events.clear()
+        await listener.poll_once("items", watermark)
+        assert events == []
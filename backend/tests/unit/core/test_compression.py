@@ -0,0 +1,40 @@
+"""
+Tests for SelectiveGZipMiddleware.
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from httpx import AsyncClient, ASGITransport
+
+from app.core.compression import SelectiveGZipMiddleware
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(SelectiveGZipMiddleware, exclude_paths=[r"/files/[^/]+"], minimum_size=10)
+
+    @app.get("/files/{name}")
+    async def download(name: str):
+        return PlainTextResponse("x" * 1000)
+
+    @app.get("/items")
+    async def items():
+        return PlainTextResponse("x" * 1000)
+
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+class TestSelectiveGZipMiddleware:
+    """Test suite for SelectiveGZipMiddleware."""
+
+    @pytest.mark.asyncio
+    async def test_compresses_other_paths(self, client):
+        response = await client.get("/items", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+
+    @pytest.mark.asyncio
+    async def test_excluded_path_is_untouched(self, client):
+        response = await client.get("/files/spec.pdf", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+        assert response.headers["content-length"] == "1000"
@@ -0,0 +1,42 @@
+"""
+Tests for the lifespan-built service container and its dependencies.
+"""
+import pytest
+from types import SimpleNamespace
+
+from app.dependencies import (
+    ServiceContainer, get_container, get_audit_service, get_procurement_service, get_auth_service
+)
+
+
+def _request(container=None):
+    state = SimpleNamespace()
+    if container is not None:
+        state.container = container
+    return SimpleNamespace(app=SimpleNamespace(state=state))
+
+
+class TestServiceContainer:
+    """Test suite for ServiceContainer wiring."""
+
+    def test_services_share_dependencies(self, mock_mongodb):
+        container = ServiceContainer()
+
+        assert container.item_service.audit_service is container.audit_service
+        assert container.procurement_service.audit_service is container.audit_service
+        assert container.procurement_service.s3_service is container.s3_service
+        assert container.auth_service.user_service is container.user_service
+        assert container.auth_service.group_service is container.group_service
+
+    def test_requests_reuse_lifespan_container(self, mock_mongodb):
+        container = ServiceContainer()
+        first = get_container(_request(container))
+        second = get_container(_request(container))
+
+        assert get_audit_service(first) is get_audit_service(second)
+        assert get_procurement_service(first) is container.procurement_service
+        assert get_auth_service(second) is container.auth_service
+
+    def test_fallback_without_lifespan(self, mock_mongodb):
+        container = get_container(_request())
+        assert isinstance(container, ServiceContainer)
@@ -0,0 +1,142 @@
+"""
+Tests for the repository query instrumentation.
+"""
+import pytest
+from datetime import datetime
+
+from app.db.instrumentation import QueryProfiler, InstrumentedCollection, query_shape, summarize_explain
+import app.db.instrumentation as instrumentation
+
+
+class FakeCollection:
+    name = "things"
+
+
+class TestQueryShape:
+    """Test suite for query shapes and explain summaries."""
+
+    def test_values_replaced_by_types(self):
+        """Test queries differing only in values share a shape."""
+        first = query_shape({"serial": "A", "stock_qty": {"$gte": 1}, "_id": {"$in": ["x", "y"]}})
+        second = query_shape({"serial": "B", "stock_qty": {"$gte": 7}, "_id": {"$in": ["z"]}})
+
+        assert first == second == {"serial": "str", "stock_qty": {"$gte": "int"}, "_id": {"$in": ["str"]}}
+
+    def test_summarize_collection_scan(self):
+        """Test plan stages and examination ratios are extracted."""
+        summary = summarize_explain({
+            "queryPlanner": {"winningPlan": {"stage": "SORT", "inputStage": {"stage": "COLLSCAN"}}},
+            "executionStats": {"nReturned": 2, "totalKeysExamined": 0, "totalDocsExamined": 1000, "executionTimeMillis": 40}
+        })
+
+        assert summary["stages"] == ["SORT", "COLLSCAN"]
+        assert summary["collection_scan"] is True
+        assert summary["docs_examined_per_returned"] == 500
+
+
+class TestQueryProfiler:
+    """Test suite for QueryProfiler."""
+
+    def test_only_slow_shapes_listed(self):
+        """Test top() lists shapes with slow operations, worst first."""
+        profiler = QueryProfiler(slow_ms=50, explain_sample_rate=0)
+        profiler.record(FakeCollection(), "find", {"filter": {"a": "str"}}, 10)
+        profiler.record(FakeCollection(), "find", {"filter": {"b": "str"}}, 60)
+        profiler.record(FakeCollection(), "find", {"filter": {"b": "str"}}, 20)
+        profiler.record(FakeCollection(), "count_documents", {"filter": {}}, 200)
+
+        top = profiler.top(limit=10)
+
+        assert [entry["operation"] for entry in top] == ["count_documents", "find"]
+        assert top[1]["count"] == 2
+        assert top[1]["slow_count"] == 1
+        assert top[1]["avg_ms"] == 40
+
+    def test_shapes_bounded(self):
+        """Test the least recently seen shapes are dropped."""
+        profiler = QueryProfiler(slow_ms=0, explain_sample_rate=0, max_shapes=2)
+        for field in ("a", "b", "c"):
+            profiler.record(FakeCollection(), "find", {"filter": {field: "str"}}, 1)
+
+        assert sorted(list(entry["shape"]["filter"])[0] for entry in profiler.top()) == ["b", "c"]
+
+
+class TestAggregateExplain:
+    """Test suite for explaining aggregates."""
+
+    @pytest.mark.asyncio
+    async def test_collation_passed_to_explain(self, monkeypatch):
+        """Test a collated aggregate is explained under the same collation."""
+        from unittest.mock import AsyncMock, MagicMock
+        profiler = QueryProfiler(slow_ms=0, explain_sample_rate=1)
+        monkeypatch.setattr(instrumentation, "query_profiler", profiler)
+        raw = MagicMock()
+        raw.name = "things"
+        raw.database.command = AsyncMock(return_value={"queryPlanner": {"winningPlan": {"stage": "IXSCAN"}}})
+        raw.aggregate.return_value.to_list = AsyncMock(return_value=[])
+        pipeline = [{"$match": {"catalog_number": "abc"}}]
+        collation = {"locale": "en", "strength": 2}
+
+        await InstrumentedCollection(raw).aggregate(pipeline, collation=collation).to_list(length=None)
+        await profiler.wait_for_explains()
+
+        raw.aggregate.assert_called_once_with(pipeline, collation=collation)
+        raw.database.command.assert_awaited_once_with(
+            "explain",
+            {"aggregate": "things", "pipeline": pipeline, "cursor": {}, "collation": collation},
+            verbosity="executionStats"
+        )
+
+
+class TestReport:
+    """Test suite for operation reporting."""
+
+    def test_metric_observed_with_profiler_disabled(self, monkeypatch):
+        """Test operation timings reach the metric while shapes are neither built nor stored."""
+        observed = []
+        profiler = QueryProfiler(slow_ms=0, explain_sample_rate=0)
+        profiler.enabled = False
+        monkeypatch.setattr(instrumentation, "query_profiler", profiler)
+        monkeypatch.setattr(
+            instrumentation.mongo_operation_seconds, "labels",
+            lambda *labels: type("Child", (), {"observe": lambda self, value: observed.append((labels, value))})()
+        )
+
+        def describe():
+            raise AssertionError("shape built while profiling is disabled")
+
+        instrumentation._report(FakeCollection(), "find", 250, describe)
+
+        assert observed == [(("things", "find"), 0.25)]
+        assert profiler.top() == []
+
+    def test_instrument_wraps_with_profiler_disabled(self, monkeypatch):
+        """Test collections are wrapped for metrics even when profiling is off."""
+        profiler = QueryProfiler()
+        profiler.enabled = False
+        monkeypatch.setattr(instrumentation, "query_profiler", profiler)
+
+        collection = instrumentation.instrument(FakeCollection())
+
+        assert isinstance(collection, InstrumentedCollection)
+        assert instrumentation.instrument(collection) is collection
+
+
+class TestInstrumentedCollection:
+    """Test suite for InstrumentedCollection against MongoDB."""
+
+    @pytest.mark.asyncio
+    async def test_slow_find_is_explained(self, test_items_collection, monkeypatch):
+        """Test a slow find is recorded with a sampled plan."""
+        profiler = QueryProfiler(slow_ms=0, explain_sample_rate=1)
+        monkeypatch.setattr(instrumentation, "query_profiler", profiler)
+        await test_items_collection.insert_many([{"serial": f"S-{i}", "updated_at": datetime.utcnow()} for i in range(3)])
+
+        collection = InstrumentedCollection(test_items_collection)
+        items = await collection.find({"serial": "S-1"}).sort("updated_at", -1).limit(5).to_list(length=5)
+        await profiler.wait_for_explains()
+
+        assert len(items) == 1
+        [entry] = [entry for entry in profiler.top() if entry["operation"] == "find"]
+        assert entry["shape"] == {"filter": {"serial": "str"}, "sort": [("updated_at", -1)]}
+        assert entry["plan"]["returned"] == 1
@@ -0,0 +1,84 @@
+"""
+Tests for BlockingCallDetector.
+Tests blocked callbacks are attributed to their call site.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.loop_diagnostics import BlockingCallDetector
+
+
+def blocking_helper():
+    time.sleep(0.1)
+
+
+@pytest.mark.allow_blocking
+class TestBlockingCallDetector:
+    """Test suite for BlockingCallDetector."""
+
+    @pytest.fixture
+    def detector(self):
+        detector = BlockingCallDetector(threshold_ms=30)
+        detector.enable()
+        yield detector
+        detector.disable()
+
+    @pytest.mark.asyncio
+    async def test_sampled_block_reports_call_site(self, detector):
+        """Test a long block is sampled with our call site and the blocking call."""
+        blocking_helper()
+        await asyncio.sleep(0)
+
+        sites = detector.top()
+        assert len(sites) == 1
+        assert sites[0]["sampled"] is True
+        assert "test_loop_diagnostics.py" in sites[0]["site"]
+        assert sites[0]["site"].endswith("in blocking_helper")
+        assert sites[0]["max_ms"] >= 100
+
+    @pytest.mark.asyncio
+    async def test_short_callbacks_ignored(self, detector):
+        """Test callbacks under the threshold are not recorded."""
+        for _ in range(10):
+            await asyncio.sleep(0)
+        assert detector.top() == []
+
+    @pytest.mark.asyncio
+    async def test_disable_restores_asyncio(self):
+        """Test disabling puts asyncio's Handle._run back."""
+        original = asyncio.Handle._run
+        detector = BlockingCallDetector(threshold_ms=30)
+        detector.enable()
+        assert asyncio.Handle._run is not original
+        detector.disable()
+        assert asyncio.Handle._run is original
+
+    def test_refuses_non_asyncio_loop(self):
+        """Test enabling under uvloop is refused and reported instead of silently recording nothing."""
+        uvloop = pytest.importorskip("uvloop")
+        original = asyncio.Handle._run
+        detector = BlockingCallDetector(threshold_ms=30)
+
+        async def enable():
+            detector.enable()
+
+        loop = uvloop.new_event_loop()
+        try:
+            loop.run_until_complete(enable())
+        finally:
+            loop.close()
+
+        assert detector.enabled is False
+        assert detector.unsupported_loop == "uvloop.Loop"
+        assert asyncio.Handle._run is original
+
+    def test_record_unsampled_uses_await_chain(self):
+        """Test a block missed by the watchdog is attributed without a blocking call."""
+        detector = BlockingCallDetector(threshold_ms=30)
+        detector.record([], 50.0, sampled=False, callback="<Handle cb()>")
+        site = detector.top()[0]
+        assert site["site"] == "<Handle cb()>"
+        assert site["call"] is None
+        assert detector.max_block_ms == 50.0
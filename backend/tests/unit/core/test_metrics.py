@@ -0,0 +1,53 @@
+"""
+Tests for app.core.metrics.
+Tests job timing and the event loop lag monitor; metrics are no-ops without prometheus_client.
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core import metrics
+
+
+class TestMetrics:
+    """Test suite for the metrics helpers."""
+
+    def test_track_job_reraises(self):
+        """Test a failing job is still timed and its error propagates."""
+        with pytest.raises(ValueError):
+            with metrics.track_job("test_job"):
+                raise ValueError("boom")
+
+    @pytest.mark.asyncio
+    async def test_timed_job_returns_result(self):
+        """Test the decorator keeps the wrapped coroutine's result and name."""
+        @metrics.timed_job("test_job")
+        async def job(value):
+            return value * 2
+
+        assert await job(21) == 42
+        assert job.__name__ == "job"
+
+    def test_render(self):
+        """Test the exposition includes the request histogram when prometheus_client is installed."""
+        metrics.observe_request("GET", "/api/items", 200, 0.01)
+        body = metrics.render()
+        if metrics.PROMETHEUS_AVAILABLE:
+            assert b"http_request_duration_seconds" in body
+        else:
+            assert body is None
+
+    @pytest.mark.asyncio
+    @pytest.mark.allow_blocking
+    async def test_loop_lag_monitor_detects_blocking(self):
+        """Test a blocking call shows up as event loop lag."""
+        monitor = metrics.LoopLagMonitor(interval=0.01)
+        monitor.start()
+        try:
+            await asyncio.sleep(0.02)
+            time.sleep(0.1)
+            await asyncio.sleep(0.005)
+        finally:
+            await monitor.stop()
+        assert monitor.last_lag > 0.05
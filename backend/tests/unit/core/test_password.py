@@ -0,0 +1,53 @@
+"""
+Tests for password hashing: async wrappers, rehash detection and event loop responsiveness.
+"""
+import asyncio
+import time
+import pytest
+
+from app.config import settings
+from app.core.password import (
+    hash_password, verify_password, needs_rehash,
+    hash_password_async, verify_password_async
+)
+
+
+class TestPassword:
+    """Test suite for app.core.password."""
+
+    def test_needs_rehash(self):
+        assert not needs_rehash(hash_password("p"))
+        assert needs_rehash(hash_password("p", rounds=4 if settings.BCRYPT_ROUNDS != 4 else 5))
+        assert not needs_rehash("not-a-bcrypt-hash")
+
+    @pytest.mark.asyncio
+    async def test_async_round_trip(self):
+        hashed = await hash_password_async("secret")
+        assert await verify_password_async("secret", hashed)
+        assert not await verify_password_async("wrong", hashed)
+        assert not await verify_password_async("secret", "garbage")
+
+    @pytest.mark.asyncio
+    async def test_login_storm_keeps_loop_responsive(self):
+        """Many concurrent verifications must not stall other coroutines."""
+        hashed = hash_password("secret", rounds=10)
+        logins = 24
+        gaps = []
+
+        async def ticker(stop: asyncio.Event):
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.005)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        stop = asyncio.Event()
+        tick_task = asyncio.create_task(ticker(stop))
+        results = await asyncio.gather(*(verify_password_async("secret", hashed) for _ in range(logins)))
+        stop.set()
+        await tick_task
+
+        assert all(results)
+        # A single blocking bcrypt call at cost 10 takes ~50ms+; the loop must never wait that long
+        assert max(gaps) < 0.04
@@ -0,0 +1,150 @@
+"""
+Tests for login rate limiting, lockout and the unknown-username cache.
+"""
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+import ipaddress
+
+from app.config import settings
+from app.core.exceptions import TooManyRequestsException, UnauthorizedException
+from app.core import rate_limit
+from app.core.rate_limit import (
+    LoginRateLimiter, MemoryRateLimitBackend, MongoRateLimitBackend, unknown_usernames, client_ip
+)
+from app.schemas.auth import LoginRequest
+from app.services.auth_service import AuthService
+
+
+class TestLoginRateLimiter:
+    """Test suite for LoginRateLimiter."""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend_class", [MemoryRateLimitBackend, MongoRateLimitBackend])
+    async def test_username_bucket(self, backend_class, mock_mongodb):
+        limiter = LoginRateLimiter(backend_class())
+        for _ in range(settings.LOGIN_USER_BUCKET_SIZE):
+            await limiter.check("victim", "10.0.0.1")
+
+        with pytest.raises(TooManyRequestsException) as exc:
+            await limiter.check("victim", "10.0.0.2")
+        assert int(exc.value.headers["Retry-After"]) >= 1
+
+        # Other usernames are unaffected
+        await limiter.check("someone-else", "10.0.0.1")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend_class", [MemoryRateLimitBackend, MongoRateLimitBackend])
+    async def test_ip_bucket(self, backend_class, mock_mongodb, monkeypatch):
+        monkeypatch.setattr(settings, "LOGIN_IP_RATE_LIMIT_ENABLED", True)
+        limiter = LoginRateLimiter(backend_class())
+        for i in range(settings.LOGIN_IP_BUCKET_SIZE):
+            await limiter.check(f"user{i}", "10.0.0.9")
+
+        with pytest.raises(TooManyRequestsException):
+            await limiter.check("fresh-user", "10.0.0.9")
+
+    @pytest.mark.asyncio
+    async def test_ip_bucket_disabled_by_default(self):
+        limiter = LoginRateLimiter(MemoryRateLimitBackend())
+        for i in range(settings.LOGIN_IP_BUCKET_SIZE + 1):
+            await limiter.check(f"user{i}", "10.0.0.9")
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend_class", [MemoryRateLimitBackend, MongoRateLimitBackend])
+    async def test_lockout_after_failures(self, backend_class, mock_mongodb):
+        limiter = LoginRateLimiter(backend_class())
+        for _ in range(settings.LOGIN_LOCKOUT_THRESHOLD):
+            await limiter.record_failure("victim")
+
+        with pytest.raises(TooManyRequestsException) as exc:
+            await limiter.check("victim")
+        assert int(exc.value.headers["Retry-After"]) > settings.LOGIN_LOCKOUT_SECONDS - 5
+
+    @pytest.mark.asyncio
+    async def test_success_resets_failures(self):
+        limiter = LoginRateLimiter(MemoryRateLimitBackend())
+        for _ in range(settings.LOGIN_LOCKOUT_THRESHOLD - 1):
+            await limiter.record_failure("victim")
+        await limiter.record_success("victim")
+        await limiter.record_failure("victim")
+
+        await limiter.check("victim")
+
+    @pytest.mark.asyncio
+    async def test_backend_failure_allows_attempt(self):
+        backend = MagicMock()
+        backend.locked_until = AsyncMock(side_effect=RuntimeError("down"))
+        await LoginRateLimiter(backend).check("victim", "10.0.0.1")
+
+
+class TestLoginShortCircuit:
+    """Test suite for the limiter and negative cache inside AuthService.login."""
+
+    @pytest.mark.asyncio
+    async def test_unknown_user_is_cached_and_still_hashes(self, mock_mongodb):
+        auth_service = AuthService()
+        auth_service.user_service.get_user_by_username = AsyncMock(return_value=None)
+        login_data = LoginRequest(username="ghost", password="x")
+
+        with patch("app.services.auth_service.dummy_verify_async", AsyncMock(return_value=False)) as dummy:
+            for _ in range(2):
+                with pytest.raises(UnauthorizedException):
+                    await auth_service.login(login_data, MagicMock())
+
+        auth_service.user_service.get_user_by_username.assert_awaited_once()
+        assert dummy.await_count == 2
+        assert "ghost" in unknown_usernames
+
+    @pytest.mark.asyncio
+    async def test_rate_limited_before_lookup_and_bcrypt(self, mock_mongodb):
+        auth_service = AuthService()
+        auth_service.user_service.get_user_by_username = AsyncMock(return_value=None)
+        login_data = LoginRequest(username="ghost", password="x")
+
+        with patch("app.services.auth_service.dummy_verify_async", AsyncMock(return_value=False)) as dummy:
+            for _ in range(settings.LOGIN_USER_BUCKET_SIZE):
+                with pytest.raises(UnauthorizedException):
+                    await auth_service.login(login_data, MagicMock(), "10.0.0.1")
+            with pytest.raises(TooManyRequestsException):
+                await auth_service.login(login_data, MagicMock(), "10.0.0.1")
+
+        assert dummy.await_count == settings.LOGIN_USER_BUCKET_SIZE
+
+    @pytest.mark.asyncio
+    async def test_created_user_leaves_negative_cache(self, mock_mongodb):
+        from app.schemas.user import UserCreate
+        from app.services.user_service import UserService
+        unknown_usernames.set("newbie", True)
+
+        await UserService().create_user(
+            UserCreate(username="newbie", password="secret123"),
+            created_by="admin",
+            creator_role="superadmin"
+        )
+
+        assert "newbie" not in unknown_usernames
+
+
+class TestClientIp:
+    """Test suite for client_ip."""
+
+    @staticmethod
+    def make_request(peer: str, forwarded: str = None):
+        request = MagicMock()
+        request.client.host = peer
+        request.headers = {"x-forwarded-for": forwarded} if forwarded else {}
+        return request
+
+    @pytest.fixture(autouse=True)
+    def trusted_router(self, monkeypatch):
+        monkeypatch.setattr(rate_limit, "_trusted_networks", [ipaddress.ip_network("10.128.0.0/14")])
+
+    def test_forwarded_for_from_trusted_proxy(self):
+        assert client_ip(self.make_request("10.128.2.1", "192.168.1.5")) == "192.168.1.5"
+
+    def test_spoofed_entries_are_ignored(self):
+        request = self.make_request("10.128.2.1", "1.2.3.4, 192.168.1.5, 10.128.3.3")
+        assert client_ip(request) == "192.168.1.5"
+
+    def test_untrusted_peer_header_is_ignored(self):
+        assert client_ip(self.make_request("192.168.1.5", "1.2.3.4")) == "192.168.1.5"
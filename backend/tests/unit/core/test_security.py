@@ -0,0 +1,139 @@
+"""
+Tests for token verification: the verified-token cache and revocation.
+"""
+import time
+import pytest
+from datetime import timedelta
+from unittest.mock import MagicMock, patch
+from fastapi import Response
+
+from app.core import security
+from app.core.cache import LRUCache, ExpiringSet
+from app.core.exceptions import UnauthorizedException
+from app.core.security import create_access_token, verify_token, revoke_token, token_fingerprint
+from app.services.auth_service import AuthService, REVOKED_TOKENS_COLLECTION
+
+
+@pytest.fixture(autouse=True)
+def clear_token_caches():
+    security._verified_tokens.clear()
+    security._revoked_tokens.clear()
+    yield
+    security._verified_tokens.clear()
+    security._revoked_tokens.clear()
+
+
+class TestLRUCache:
+    """Test suite for LRUCache."""
+
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+
+    def test_expired_entry_is_a_miss(self):
+        cache = LRUCache(maxsize=10)
+        cache.set("a", 1, expires_at=time.time() - 1)
+
+        assert cache.get("a") is None
+        assert len(cache) == 0
+
+    def test_zero_size_disables_cache(self):
+        cache = LRUCache(maxsize=0)
+        cache.set("a", 1)
+        assert "a" not in cache
+
+
+class TestExpiringSet:
+    """Test suite for ExpiringSet."""
+
+    def test_members_are_never_evicted_before_expiry(self):
+        revoked = ExpiringSet()
+        for i in range(5000):
+            revoked.add(i, time.time() + 60)
+
+        assert 0 in revoked
+        assert len(revoked) == 5000
+
+    def test_expired_members_are_pruned(self):
+        revoked = ExpiringSet()
+        revoked.add("old", time.time() - 1)
+        revoked.add("new", time.time() + 60)
+
+        assert "old" not in revoked
+        revoked.prune()
+        assert len(revoked) == 1
+
+
+class TestVerifyToken:
+    """Test suite for verify_token."""
+
+    def test_second_verification_skips_decode(self):
+        token = create_access_token({"sub": "tester", "role": "admin"})
+        assert verify_token(token)["sub"] == "tester"
+
+        with patch("app.core.security.jwt.decode") as decode:
+            payload = verify_token(token)
+
+        decode.assert_not_called()
+        assert payload["role"] == "admin"
+
+    def test_cached_payload_is_not_shared(self):
+        token = create_access_token({"sub": "tester"})
+        verify_token(token)["sub"] = "changed"
+        assert verify_token(token)["sub"] == "tester"
+
+    def test_expired_token_rejected(self):
+        token = create_access_token({"sub": "tester"}, expires_delta=timedelta(seconds=-1))
+        with pytest.raises(UnauthorizedException):
+            verify_token(token)
+        assert len(security._verified_tokens) == 0
+
+    def test_invalid_token_rejected(self):
+        with pytest.raises(UnauthorizedException):
+            verify_token("not-a-jwt")
+
+    def test_revoked_token_rejected_even_when_cached(self):
+        token = create_access_token({"sub": "tester"})
+        verify_token(token)
+
+        assert revoke_token(token) is not None
+        with pytest.raises(UnauthorizedException):
+            verify_token(token)
+
+
+class TestTokenRevocation:
+    """Test suite for logout revocation shared through MongoDB."""
+
+    @pytest.mark.asyncio
+    async def test_logout_persists_revocation(self, mock_mongodb):
+        token = create_access_token({"sub": "tester"})
+        verify_token(token)
+
+        await AuthService().logout(MagicMock(spec=Response), token)
+
+        with pytest.raises(UnauthorizedException):
+            verify_token(token)
+        stored = await mock_mongodb[f"test_{REVOKED_TOKENS_COLLECTION}"].find_one(
+            {"_id": token_fingerprint(token)}
+        )
+        assert stored is not None
+
+    @pytest.mark.asyncio
+    async def test_load_revoked_tokens(self, mock_mongodb):
+        token = create_access_token({"sub": "tester"})
+        await AuthService().logout(MagicMock(spec=Response), token)
+
+        # A fresh process knows nothing until it loads the shared collection
+        security._revoked_tokens.clear()
+        assert verify_token(token)["sub"] == "tester"
+
+        assert await AuthService.load_revoked_tokens() >= 1
+        with pytest.raises(UnauthorizedException):
+            verify_token(token)
@@ -7,7 +7,9 @@ import pytest_asyncio
 from datetime import datetime, timedelta
 from bson import ObjectId
 
+from app.db.indexes import INDEXES
 from app.db.repositories.items import ItemsRepository
+from app.db.utils.query_builder import MongoQueryBuilder
 from app.schemas.item import ItemFilter
 
 
@@ -309,3 +311,122 @@ class TestItemsRepository:
 
 
 
+
+    # ========== Numeric Stock Tests ==========
+
+    @pytest.mark.asyncio
+    async def test_stock_qty_synced_on_create_and_update(self, test_items_collection, sample_item_data):
+        """Test stock_qty follows current_stock on create, update and bulk update."""
+        repo = ItemsRepository(test_items_collection)
+        sample_item_data["current_stock"] = "1,200"
+        created = await repo.create(sample_item_data)
+        assert created["stock_qty"] == 1200
+
+        updated = await repo.update(created["_id"], {"current_stock": "2.5"})
+        assert updated["stock_qty"] == 2.5
+
+        update_data = {"current_stock": "n/a", "warranty_expiry": "2030-01-01"}
+        await repo.bulk_update_by_ids([created["_id"]], update_data)
+        item = await repo.get_by_id(created["_id"])
+        assert item["stock_qty"] is None
+        # The caller's change set (audit log, item events) keeps only the fields it set
+        assert "stock_qty" not in update_data and "warranty_expiry_date" not in update_data
+
+    @pytest.mark.asyncio
+    async def test_search_stock_range_and_numeric_sort(self, test_items_collection, sample_item_data):
+        """Test stock_min/stock_max filters and sorting by stock as numbers."""
+        repo = ItemsRepository(test_items_collection)
+        for stock in ["9", "10", "100", "2"]:
+            data = sample_item_data.copy()
+            data["current_stock"] = stock
+            await repo.create(data)
+
+        items, total = await repo.search(ItemFilter(stock_min=5, stock_max=50, sort_by="current_stock"))
+        assert total == 2
+        assert [item["current_stock"] for item in items] == ["9", "10"]
+
+    @pytest.mark.asyncio
+    async def test_backfill_derived_fields(self, test_items_collection):
+        """Test the backfill sets the typed fields on existing items in batches and is re-runnable."""
+        repo = ItemsRepository(test_items_collection)
+        await test_items_collection.insert_many(
+            [{"catalog_number": f"BF-{i}", "current_stock": str(i), "warranty_expiry": f"2030-01-0{i + 1}"} for i in range(5)]
+            + [{"catalog_number": "BF-X", "current_stock": "?"}]
+        )
+
+        result = await repo.backfill_derived_fields(batch_size=2)
+        assert result == {"scanned": 6, "updated": 6}
+        item = await test_items_collection.find_one({"catalog_number": "BF-3"})
+        assert item["stock_qty"] == 3
+        assert item["warranty_expiry_date"] == datetime(2030, 1, 4)
+
+        assert await repo.backfill_derived_fields(batch_size=2) == {"scanned": 6, "updated": 0}
+
+    # ========== Warranty Tests ==========
+
+    @pytest.mark.asyncio
+    async def test_warranty_date_synced(self, test_items_collection, sample_item_data):
+        """Test warranty_expiry_date follows warranty_expiry."""
+        repo = ItemsRepository(test_items_collection)
+        created = await repo.create(sample_item_data)
+        assert created["warranty_expiry_date"] == datetime(2025, 12, 31)
+
+        updated = await repo.update(created["_id"], {"warranty_expiry": "15/03/2027"})
+        assert updated["warranty_expiry_date"] == datetime(2027, 3, 15)
+
+    @pytest.mark.asyncio
+    async def test_get_expiring_warranties(self, test_items_collection, sample_item_data):
+        """Test the expiry window is a date range sorted by expiry."""
+        repo = ItemsRepository(test_items_collection)
+        today = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
+        for catalog_number, offset in [("SOON", 10), ("LATER", 60), ("FAR", 400), ("PAST", -5)]:
+            data = sample_item_data.copy()
+            data["catalog_number"] = catalog_number
+            data["warranty_expiry"] = (today + timedelta(days=offset)).strftime("%Y-%m-%d")
+            await repo.create(data)
+
+        items, total = await repo.get_expiring_warranties(today, today + timedelta(days=90))
+
+        assert total == 2
+        assert [item["catalog_number"] for item in items] == ["SOON", "LATER"]
+
+    # ========== Match Syntax Tests ==========
+
+    @pytest_asyncio.fixture
+    async def indexed_repository(self, test_items_collection, sample_item_data):
+        """Repository over the production inventory indexes, with a few items."""
+        for keys, options in INDEXES["inventory"]:
+            await test_items_collection.create_index(keys, **options)
+        repo = ItemsRepository(test_items_collection)
+        for catalog_number, serial in [("ABC-100", "SN-1"), ("abc-200", "SN-2"), ("XABC-300", "SN-3")]:
+            data = sample_item_data.copy()
+            data["catalog_number"] = catalog_number
+            data["serial"] = serial
+            await repo.create(data)
+        return repo
+
+    @pytest.mark.asyncio
+    async def test_match_syntax(self, indexed_repository):
+        """Test contains (the default), prefix and exact filters ignore case."""
+        async def catalog_numbers(value):
+            items, _ = await indexed_repository.search(ItemFilter(catalog_number=value, sort_by="catalog_number"))
+            return sorted(item["catalog_number"] for item in items)
+
+        assert await catalog_numbers("=abc-100") == ["ABC-100"]
+        assert await catalog_numbers("abc") == ["ABC-100", "XABC-300", "abc-200"]
+        assert await catalog_numbers("ABC*") == ["ABC-100", "abc-200"]
+        assert await catalog_numbers("*abc") == ["ABC-100", "XABC-300", "abc-200"]
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("value", ["=abc-100", "abc*"])
+    async def test_exact_and_prefix_filters_use_index(self, indexed_repository, value):
+        """Test exact and prefix filters are served by the collated catalog_number index."""
+        filter_params = ItemFilter(catalog_number=value)
+        explain = await indexed_repository.collection.find(
+            MongoQueryBuilder.build_search_query(filter_params),
+            collation=MongoQueryBuilder.collation(filter_params)
+        ).explain()
+
+        winning_plan = str(explain["queryPlanner"]["winningPlan"])
+        assert "IXSCAN" in winning_plan
+        assert "'catalog_number'" in winning_plan
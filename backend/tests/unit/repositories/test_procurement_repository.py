@@ -168,6 +168,89 @@ class TestProcurementRepository:
         
         assert total == 2
 
+    @pytest.mark.asyncio
+    async def test_get_orders_prefix_match_is_case_insensitive(self, test_procurement_collection, sample_procurement_data):
+        """Test catalog number matches as an anchored, case-insensitive prefix."""
+        repo = ProcurementRepository()
+        repo.collection = test_procurement_collection
+        
+        for cat in ["alpha-001", "ALPHA-002", "X-ALPHA-003", "alp(ha"]:
+            data = sample_procurement_data.copy()
+            data["catalog_number"] = cat
+            await repo.create_order(data)
+        
+        orders, total = await repo.get_orders(catalog_number="Alpha")
+        assert total == 2
+        assert {order["catalog_number"] for order in orders} == {"alpha-001", "ALPHA-002"}
+        
+        # Input is not interpreted as a regex
+        orders, total = await repo.get_orders(catalog_number="alp(")
+        assert total == 1
+
+    @pytest.mark.asyncio
+    async def test_get_orders_date_range_and_status(self, test_procurement_collection, sample_procurement_data):
+        """Test a status filter combined with an order_date range."""
+        repo = ProcurementRepository()
+        repo.collection = test_procurement_collection
+        
+        for day, status in [(1, "ordered"), (5, "ordered"), (5, "received"), (9, "ordered")]:
+            data = sample_procurement_data.copy()
+            data["order_date"] = datetime(2025, 1, day)
+            data["status"] = status
+            await repo.create_order(data)
+        
+        orders, total = await repo.get_orders(
+            status_ne="received", date_from=datetime(2025, 1, 2), date_to=datetime(2025, 1, 9)
+        )
+        
+        assert total == 1
+        assert orders[0]["order_date"] == datetime(2025, 1, 5)
+
+    @pytest.mark.asyncio
+    async def test_get_orders_keyset_pagination(self, test_procurement_collection, sample_procurement_data):
+        """Test walking all orders by cursor, including ties on order_date."""
+        from app.db.utils.procurement_query import encode_cursor
+        repo = ProcurementRepository()
+        repo.collection = test_procurement_collection
+        
+        for i in range(7):
+            data = sample_procurement_data.copy()
+            data["order_date"] = datetime(2025, 1, 1 + i // 2)
+            await repo.create_order(data)
+        
+        seen = []
+        after = None
+        while True:
+            orders, total = await repo.get_orders(limit=3, after=after, include_total=False)
+            assert total is None
+            seen.extend(orders)
+            if len(orders) < 3:
+                break
+            after = encode_cursor(orders[-1])
+        
+        assert len(seen) == 7
+        assert len({order["id"] for order in seen}) == 7
+        dates = [order["order_date"] for order in seen]
+        assert dates == sorted(dates, reverse=True)
+
+    @pytest.mark.asyncio
+    async def test_get_orders_keyset_pagination_aware_date_to(self, test_procurement_collection, sample_procurement_data):
+        """Test paging with a timezone-aware date_to (?date_to=...Z) against naive stored dates."""
+        from app.db.utils.procurement_query import encode_cursor
+        repo = ProcurementRepository()
+        repo.collection = test_procurement_collection
+        
+        for day in range(1, 6):
+            data = sample_procurement_data.copy()
+            data["order_date"] = datetime(2025, 1, day)
+            await repo.create_order(data)
+        
+        date_to = datetime.fromisoformat("2025-01-05T00:00:00+00:00")  # How FastAPI parses "2025-01-05T00:00:00Z"
+        first, _ = await repo.get_orders(limit=2, date_to=date_to, include_total=False)
+        second, _ = await repo.get_orders(limit=2, date_to=date_to, after=encode_cursor(first[-1]), include_total=False)
+        
+        assert [order["order_date"].day for order in first + second] == [4, 3, 2, 1]
+
     # ========== Update Tests ==========
 
     @pytest.mark.asyncio
@@ -348,6 +431,22 @@ class TestProcurementRepository:
         assert result["filename"] == "important.pdf"
         assert result["file_size"] == 2048
 
+    @pytest.mark.asyncio
+    async def test_get_file_metadata_fetches_one_file(self, test_procurement_collection, sample_procurement_data):
+        """Test only the requested file sub-document is returned from an order with many files."""
+        repo = ProcurementRepository()
+        repo.collection = test_procurement_collection
+        
+        created = await repo.create_order(sample_procurement_data)
+        order_id = created["id"]
+        for i in range(20):
+            await repo.add_file_to_order(order_id, {"file_id": f"file-{i}", "filename": f"{i}.pdf"})
+        
+        result = await repo.get_file_metadata(order_id, "file-13")
+        
+        assert result == {"file_id": "file-13", "filename": "13.pdf"}
+        assert await repo.get_file_metadata("not-an-object-id", "file-13") is None
+
     @pytest.mark.asyncio
     async def test_get_file_metadata_not_found(self, test_procurement_collection, sample_procurement_data):
         """Test getting non-existent file metadata returns None."""
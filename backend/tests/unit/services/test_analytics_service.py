@@ -9,13 +9,17 @@ from unittest.mock import MagicMock
 from app.services.analytics_service import AnalyticsService
 from app.db.repositories.items import ItemsRepository
 from app.services.audit_service import AuditService
+from app.schemas.audit import AuditAction
+from app.schemas.analytics import ActivityBucketSize, ActivityGroupBy
+from app.services.activity_rollup import hourly_activity_buffer
+from app.core.exceptions import BadRequestException
 
 
 class TestAnalyticsService:
     """Test suite for AnalyticsService."""
 
     @pytest.fixture
-    def analytics_service(self, test_db, test_items_collection, test_audit_collection):
+    def analytics_service(self, test_db, test_items_collection, test_audit_collection, test_activity_daily_collection):
         items_repo = ItemsRepository(test_items_collection)
         audit_service = AuditService()
         audit_service.repository.collection = test_audit_collection
@@ -63,6 +67,21 @@ class TestAnalyticsService:
         assert mfr_dist["Brand"] == 1
         assert mfr_dist["Brand2"] == 1
 
+    @pytest.mark.asyncio
+    async def test_dashboard_stock_totals(self, analytics_service, test_items_collection):
+        """Test stock totals are summed from the numeric stock_qty."""
+        await test_items_collection.insert_many([
+            {"catalog_number": "A", "current_stock": "10", "stock_qty": 10, "location": "Loc1"},
+            {"catalog_number": "B", "current_stock": "5", "stock_qty": 5, "location": "Loc1"},
+            {"catalog_number": "C", "current_stock": "0", "stock_qty": 0, "location": "Loc2"},
+            {"catalog_number": "D", "current_stock": "?", "stock_qty": None, "location": "Loc2"},
+        ])
+
+        stats = await analytics_service.get_dashboard_stats()
+
+        assert stats["stock"] == {"total_stock": 15, "in_stock": 2, "out_of_stock": 1}
+        assert stats["stock_by_location"] == [{"name": "Loc1", "value": 15}]
+
     @pytest.mark.asyncio
     async def test_get_activity_stats(self, analytics_service, test_audit_collection):
         """Test activity stats from audit logs."""
@@ -82,3 +101,53 @@ class TestAnalyticsService:
         assert stats["updated"] == 1
         assert stats["deleted"] == 1
         assert stats["days"] == 7
+
+    @pytest.mark.asyncio
+    async def test_get_daily_activity_from_rollup(self, analytics_service):
+        """Test daily activity series is served from the rollup kept by audit writes."""
+        audit_service = analytics_service.audit_service
+        for action in [AuditAction.ITEM_CREATE, AuditAction.ITEM_CREATE, AuditAction.USER_UPDATE, AuditAction.ITEM_DELETE]:
+            await audit_service.log_user_action(action=action, actor="admin", actor_role="admin")
+
+        result = await analytics_service.get_daily_activity(days=30)
+
+        assert result["days"] == 30
+        assert len(result["series"]) == 30
+        today = result["series"][-1]
+        assert today["date"] == datetime.utcnow().strftime('%Y-%m-%d')
+        assert today["created"] == 2
+        assert today["updated"] == 1
+        assert today["deleted"] == 1
+        assert result["totals"] == {"created": 2, "updated": 1, "deleted": 1}
+
+    @pytest.mark.asyncio
+    async def test_get_activity_series_from_hourly_rollup(self, analytics_service, test_activity_hourly_collection):
+        """Test activity series is answered from the flushed hourly rollup."""
+        # Drop counters left over from other tests
+        await hourly_activity_buffer.flush()
+        await test_activity_hourly_collection.delete_many({})
+
+        audit_service = analytics_service.audit_service
+        await audit_service.log_user_action(action=AuditAction.ITEM_CREATE, actor="alice", actor_role="admin", target_resource="item")
+        await audit_service.log_user_action(action=AuditAction.ITEM_UPDATE, actor="alice", actor_role="admin", target_resource="item")
+        await audit_service.log_user_action(action=AuditAction.USER_CREATE, actor="bob", actor_role="admin", target_resource="user")
+        await hourly_activity_buffer.flush()
+
+        result = await analytics_service.get_activity_series(
+            bucket=ActivityBucketSize.HOUR,
+            group_by=ActivityGroupBy.ACTOR,
+            start_date=datetime.utcnow() - timedelta(hours=2),
+            end_date=datetime.utcnow() + timedelta(hours=1)
+        )
+
+        totals = {s["key"]: s["total"] for s in result["series"]}
+        assert totals == {"alice": 2, "bob": 1}
+
+    @pytest.mark.asyncio
+    async def test_get_activity_series_range_is_bounded(self, analytics_service):
+        """Test hourly series rejects ranges longer than the cap."""
+        with pytest.raises(BadRequestException):
+            await analytics_service.get_activity_series(
+                bucket=ActivityBucketSize.HOUR,
+                start_date=datetime.utcnow() - timedelta(days=90)
+            )
@@ -34,6 +34,27 @@ class TestAuditService:
         assert logs_resp.logs[0].actor == "admin_user"
         assert logs_resp.logs[0].action == "item_create"
 
+    @pytest.mark.asyncio
+    async def test_log_user_actions_batch(self, audit_service):
+        """Test logging many entries in one call."""
+        entries = [
+            AuditLogCreate(
+                action=AuditAction.PROCUREMENT_UPDATE,
+                actor="admin_user",
+                actor_role="admin",
+                target_resource="procurement_order",
+                resource_id=str(i)
+            )
+            for i in range(3)
+        ]
+        
+        log_ids = await audit_service.log_user_actions(entries)
+        
+        assert len(log_ids) == 3
+        logs_resp = await audit_service.get_audit_logs()
+        assert logs_resp.total == 3
+        assert {log.resource_id for log in logs_resp.logs} == {"0", "1", "2"}
+
     @pytest.mark.asyncio
     async def test_get_audit_logs_pagination(self, audit_service):
         """Test fetching audit logs with pagination."""
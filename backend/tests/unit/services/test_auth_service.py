@@ -84,3 +84,54 @@ class TestAuthService:
         await auth_service.logout(mock_response)
         
         mock_response.delete_cookie.assert_called_once_with(key="access_token")
+
+    @pytest.mark.asyncio
+    async def test_login_rehashes_outdated_cost(self, auth_service, mock_mongodb):
+        """Test login upgrades a hash made with a different bcrypt cost."""
+        from app.core.password import hash_password, verify_password
+        from app.config import settings
+        users = mock_mongodb["test_users"]
+        old_hash = hash_password("secret", rounds=4)
+        await users.insert_one({
+            "username": "legacy",
+            "password_hash": old_hash,
+            "is_active": True
+        })
+
+        await auth_service.login(LoginRequest(username="legacy", password="secret"), MagicMock())
+
+        user = await users.find_one({"username": "legacy"})
+        assert user["password_hash"] != old_hash
+        assert user["password_hash"].split("$")[2] == f"{settings.BCRYPT_ROUNDS:02d}"
+        assert verify_password("secret", user["password_hash"])
+
+    @pytest.mark.asyncio
+    async def test_domain_login_caches_adfs_groups(self, auth_service, mock_mongodb):
+        """Test domain login resolves the group and caches the ADFS lookup per username."""
+        from unittest.mock import AsyncMock
+        from app.schemas.auth import DomainLoginRequest
+        from app.services import auth_service as auth_service_module
+        auth_service_module._adfs_groups_cache.clear()
+        await mock_mongodb["test_groups"].insert_one({"name": "WarehouseTeam", "role": "user"})
+        auth_service._get_user_groups_from_adfs_stub = AsyncMock(return_value=["Users", "WarehouseTeam"])
+
+        for _ in range(2):
+            result = await auth_service.domain_login(DomainLoginRequest(username="domain.user"), MagicMock())
+            assert "access_token" in result
+
+        auth_service._get_user_groups_from_adfs_stub.assert_awaited_once_with("domain.user")
+        auth_service_module._adfs_groups_cache.clear()
+
+    @pytest.mark.asyncio
+    async def test_domain_login_refused_after_remote_group_delete(self, auth_service, mock_mongodb):
+        """Test a group deleted by another replica (no change event) no longer grants domain login."""
+        from unittest.mock import AsyncMock
+        from app.schemas.auth import DomainLoginRequest
+        auth_service._get_user_adfs_groups = AsyncMock(return_value=["WarehouseTeam"])
+        await mock_mongodb["test_groups"].insert_one({"name": "WarehouseTeam", "role": "user"})
+        assert "access_token" in await auth_service.domain_login(DomainLoginRequest(username="domain.user"), MagicMock())
+
+        await mock_mongodb["test_groups"].delete_one({"name": "WarehouseTeam"})
+
+        with pytest.raises(UnauthorizedException):
+            await auth_service.domain_login(DomainLoginRequest(username="domain.user"), MagicMock())
@@ -0,0 +1,108 @@
+"""
+Tests for BlobStore.
+Tests deduplicated procurement attachments on local storage.
+"""
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+from pathlib import Path
+from unittest.mock import MagicMock
+from fastapi import UploadFile
+import io
+
+from app.db.mongodb import MongoDB
+from app.schemas.procurement import ProcurementOrderCreate
+from app.services.blob_store import BlobStore
+from app.services.procurement_service import ProcurementService
+from app.services.s3_service import S3Service
+
+
+def make_upload(filename: str, content: bytes) -> UploadFile:
+    upload = MagicMock(spec=UploadFile)
+    upload.filename = filename
+    upload.content_type = "application/pdf"
+    upload.size = len(content)
+    upload.file = io.BytesIO(content)
+    return upload
+
+
+class TestBlobStore:
+    """Test suite for BlobStore."""
+
+    @pytest_asyncio.fixture
+    async def procurement_service(self, mock_mongodb, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        s3_service = S3Service()
+        s3_service.use_s3 = False
+        yield ProcurementService(s3_service=s3_service)
+        await MongoDB.get_collection("procurement-blobs").delete_many({})
+
+    async def _create_order(self, procurement_service, catalog_number: str) -> dict:
+        return await procurement_service.create_order(
+            ProcurementOrderCreate(
+                catalog_number=catalog_number, manufacturer="M", description="D",
+                quantity=1, order_date=datetime.utcnow(), amount=10.0
+            ),
+            "admin"
+        )
+
+    async def _upload(self, procurement_service, order_id: str, content: bytes) -> dict:
+        await procurement_service.upload_file(
+            order_id, make_upload("quote.pdf", content), uploaded_by="admin", user_role="admin"
+        )
+        order = await procurement_service.get_order_by_id(order_id)
+        return order["files"][-1]
+
+    @pytest.mark.asyncio
+    async def test_same_content_stored_once(self, procurement_service):
+        """Test the second upload of identical bytes references the first copy."""
+        first_order = await self._create_order(procurement_service, "BLOB-1")
+        second_order = await self._create_order(procurement_service, "BLOB-2")
+
+        first = await self._upload(procurement_service, first_order["id"], b"same quote")
+        second = await self._upload(procurement_service, second_order["id"], b"same quote")
+
+        assert first["file_id"] != second["file_id"]
+        assert first["local_path"] == second["local_path"]
+        assert [p for p in Path("uploads/procurement").rglob("*") if p.is_file()] == [Path(first["local_path"])]
+
+        blob = await procurement_service.blob_store.repository.collection.find_one({"_id": first["sha256"]})
+        assert blob["refcount"] == 2
+
+    @pytest.mark.asyncio
+    async def test_storage_deleted_with_last_reference(self, procurement_service):
+        """Test the stored object outlives all but the last referencing file."""
+        first_order = await self._create_order(procurement_service, "BLOB-3")
+        second_order = await self._create_order(procurement_service, "BLOB-4")
+        first = await self._upload(procurement_service, first_order["id"], b"shared")
+        second = await self._upload(procurement_service, second_order["id"], b"shared")
+
+        await procurement_service.delete_file(first_order["id"], first["file_id"], user_role="admin")
+        assert Path(second["local_path"]).exists()
+
+        await procurement_service.delete_order(second_order["id"], user_role="admin")
+        await procurement_service.blob_store.cleanup_queue.stop()
+        assert not Path(second["local_path"]).exists()
+        assert await procurement_service.blob_store.repository.collection.find_one({"_id": first["sha256"]}) is None
+
+    @pytest.mark.asyncio
+    async def test_collect_garbage(self, procurement_service):
+        """Test GC repairs refcounts and removes orphaned storage."""
+        order = await self._create_order(procurement_service, "BLOB-5")
+        kept = await self._upload(procurement_service, order["id"], b"kept")
+
+        blob_store: BlobStore = procurement_service.blob_store
+        old = datetime.utcnow() - timedelta(days=1)
+        await blob_store.repository.collection.update_one(
+            {"_id": kept["sha256"]}, {"$set": {"refcount": 5, "updated_at": old}}
+        )
+        orphan = await procurement_service.s3_service.upload_file(io.BytesIO(b"orphan"), "lost.pdf", "application/pdf")
+
+        stats = await blob_store.collect_garbage(grace_seconds=0)
+
+        assert stats["refcounts_fixed"] == 1
+        assert stats["orphans_deleted"] == 1
+        assert not Path(orphan["local_path"]).exists()
+        assert Path(kept["local_path"]).exists()
+        blob = await blob_store.repository.collection.find_one({"_id": kept["sha256"]})
+        assert blob["refcount"] == 1
@@ -107,3 +107,43 @@ class TestGroupService:
         # Verify gone
         with pytest.raises(NotFoundException):
             await group_service.get_group_by_id(group_id)
+
+    @pytest.mark.asyncio
+    async def test_resolve_group_tracks_writes(self, group_service, mock_mongodb):
+        """Test the in-process name map follows create, rename and delete."""
+        created = await group_service.create_group(
+            GroupCreate(name="WarehouseTeam", role="user"),
+            created_by="admin",
+            creator_role="superadmin"
+        )
+        resolved = await group_service.resolve_group(["Users", "WarehouseTeam"])
+        assert resolved["id"] == created["id"]
+
+        # Loaded map must not hit the collection again
+        await mock_mongodb["test_groups"].insert_one({"name": "Users", "role": "user"})
+        assert (await group_service.resolve_group(["Users"])) is None
+
+        await group_service.update_group(
+            created["id"], GroupUpdate(name="Renamed"), updated_by="admin", updater_role="superadmin"
+        )
+        assert (await group_service.resolve_group(["WarehouseTeam"])) is None
+        assert (await group_service.resolve_group(["Renamed"]))["id"] == created["id"]
+
+        await group_service.delete_group(
+            created["id"], reason="Cleanup", deleted_by="admin", deleter_role="superadmin"
+        )
+        assert (await group_service.resolve_group(["Renamed"])) is None
+
+    @pytest.mark.asyncio
+    async def test_change_event_reloads_map(self, group_service, mock_mongodb):
+        """Test a change event from another replica drops the cached map."""
+        from app.core.events import ChangeEvent, ChangeOperation
+        from app.services import group_service as group_service_module
+
+        assert (await group_service.resolve_group(["Remote"])) is None
+        await mock_mongodb["test_groups"].insert_one({"name": "Remote", "role": "user"})
+
+        group_service_module.group_directory.on_change_event(
+            ChangeEvent(collection="groups", operation=ChangeOperation.INSERT)
+        )
+        assert (await group_service.resolve_group(["Remote"]))["name"] == "Remote"
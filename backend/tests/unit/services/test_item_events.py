@@ -0,0 +1,132 @@
+"""
+Tests for the live items feed broker.
+"""
+import pytest
+from unittest.mock import MagicMock, AsyncMock
+
+from app.services.item_events import ItemEventBroker, item_event_broker
+from app.services.item_service import ItemService
+from app.services.audit_service import AuditService
+from app.db.repositories.items import ItemsRepository
+from app.schemas.item import ItemChangeType, ItemCreate, ItemUpdate
+
+
+def drain(subscription):
+    events = []
+    while not subscription.queue.empty():
+        events.append(subscription.queue.get_nowait()[1])
+    return events
+
+
+class TestItemEventBroker:
+    """Test suite for ItemEventBroker."""
+
+    @pytest.mark.asyncio
+    async def test_filters_by_ids_and_fields(self):
+        """Test per-connection id and field filters."""
+        broker = ItemEventBroker(queue_size=10)
+        everything = broker.subscribe()
+        only_a = broker.subscribe(ids=["a"])
+        only_notes = broker.subscribe(fields=["notes"])
+
+        broker.item_updated("a", {"notes": "hello", "location": "X1"})
+        broker.item_updated("b", {"location": "X2"})
+        broker.items_deleted(["b"])
+
+        assert [(e.type, e.id) for e in drain(everything)] == [
+            (ItemChangeType.UPDATED, "a"), (ItemChangeType.UPDATED, "b"), (ItemChangeType.DELETED, "b")
+        ]
+        assert [e.changes for e in drain(only_a)] == [{"notes": "hello", "location": "X1"}]
+        # The location-only update is dropped, the delete still goes through
+        assert [(e.type, e.changes) for e in drain(only_notes)] == [
+            (ItemChangeType.UPDATED, {"notes": "hello"}), (ItemChangeType.DELETED, {})
+        ]
+
+    @pytest.mark.asyncio
+    async def test_slow_consumer_gets_resync(self):
+        """Test a full queue is replaced by a single resync event."""
+        broker = ItemEventBroker(queue_size=3)
+        subscription = broker.subscribe()
+
+        broker.items_deleted([str(i) for i in range(10)])
+
+        events = drain(subscription)
+        assert events[0].type == ItemChangeType.RESYNC
+        assert len(events) <= 3
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe(self):
+        """Test closed connections stop receiving events."""
+        broker = ItemEventBroker(queue_size=3)
+        subscription = broker.subscribe()
+        broker.unsubscribe(subscription)
+
+        broker.resync()
+
+        assert subscription.queue.empty()
+        assert broker.connection_count == 0
+
+    @pytest.mark.asyncio
+    async def test_change_events_from_other_replicas(self):
+        """Test inventory change events on the bus reach the feed."""
+        from app.core.events import ChangeEvent, ChangeOperation, ChangeSource, EventBus
+        bus = EventBus()
+        broker = ItemEventBroker(queue_size=10)
+        bus.subscribe("inventory", broker.on_change_event)
+        everything = broker.subscribe()
+        only_notes = broker.subscribe(fields=["notes"])
+
+        await bus.publish(ChangeEvent(
+            collection="inventory", operation=ChangeOperation.UPDATE, document_id="a",
+            updated_fields={"notes": "remote", "location": "X1"}, removed_fields=["serial"]
+        ))
+        await bus.publish(ChangeEvent(
+            collection="inventory", operation=ChangeOperation.UPDATE, document_id="b", source=ChangeSource.POLLING
+        ))
+        await bus.publish(ChangeEvent(collection="inventory", operation=ChangeOperation.INSERT, document_id="c"))
+        await bus.publish(ChangeEvent(collection="inventory", operation=ChangeOperation.DELETE, document_id="a"))
+        await bus.publish(ChangeEvent(collection="inventory", operation=ChangeOperation.RESYNC))
+
+        assert [(e.type, e.id, e.changes) for e in drain(everything)] == [
+            (ItemChangeType.UPDATED, "a", {"notes": "remote", "location": "X1", "serial": None}),
+            (ItemChangeType.UPDATED, "b", {}),
+            (ItemChangeType.CREATED, "c", {}),
+            (ItemChangeType.DELETED, "a", {}),
+            (ItemChangeType.RESYNC, None, {}),
+        ]
+        # Polled updates carry no fields, so field-filtered connections still hear about them
+        assert [(e.type, e.id) for e in drain(only_notes)] == [
+            (ItemChangeType.UPDATED, "a"), (ItemChangeType.UPDATED, "b"), (ItemChangeType.CREATED, "c"),
+            (ItemChangeType.DELETED, "a"), (ItemChangeType.RESYNC, None)
+        ]
+
+
+class TestItemServiceEvents:
+    """Test ItemService write paths publish diffs."""
+
+    @pytest.fixture
+    def item_service(self, test_items_collection):
+        audit_service = MagicMock(spec=AuditService)
+        audit_service.log_user_action = AsyncMock(return_value="log_id_123")
+        return ItemService(ItemsRepository(test_items_collection), audit_service)
+
+    @pytest.mark.asyncio
+    async def test_create_and_update_publish_diffs(self, item_service, mock_admin_user):
+        """Test create/update produce created/updated events with new values."""
+        subscription = item_event_broker.subscribe()
+        try:
+            created = await item_service.create_item(ItemCreate(catalog_number="SSE-001"), mock_admin_user)
+            await item_service.update_item_field(
+                created["_id"], ItemUpdate(field="location", value="B7"), mock_admin_user
+            )
+
+            events = drain(subscription)
+        finally:
+            item_event_broker.unsubscribe(subscription)
+
+        assert events[0].type == ItemChangeType.CREATED
+        assert events[0].id == created["_id"]
+        assert events[0].changes["catalog_number"] == "SSE-001"
+        assert events[1].type == ItemChangeType.UPDATED
+        assert events[1].changes["location"] == "B7"
+        assert "updated_at" in events[1].changes
@@ -6,7 +6,10 @@ import pytest
 from unittest.mock import MagicMock, AsyncMock
 from fastapi import UploadFile
 import io
+import threading
 
+from app.core.excel_parser import ExcelParser
+from app.core.exceptions import ExcelFileException
 from app.services.procurement_service import ProcurementService
 from app.schemas.procurement import ProcurementOrderCreate, ProcurementOrderUpdate
 
@@ -76,6 +79,54 @@ class TestProcurementService:
         
         assert result["quantity"] == 50
 
+    @pytest.mark.asyncio
+    async def test_update_order_records_status_history(self, procurement_service, mock_admin_user):
+        """Test status changes are appended to status_history."""
+        from datetime import datetime
+        created = await procurement_service.create_order(
+            ProcurementOrderCreate(
+                catalog_number="HISTORY", manufacturer="M", description="D",
+                quantity=1, order_date=datetime.utcnow(), amount=10.0
+            ),
+            mock_admin_user["username"]
+        )
+        assert [h["status"] for h in created["status_history"]] == ["waiting_emf"]
+        
+        await procurement_service.update_order(
+            created["id"], ProcurementOrderUpdate(quantity=2), user_role="admin", username="editor"
+        )
+        result = await procurement_service.update_order(
+            created["id"], ProcurementOrderUpdate(status="ordered"), user_role="admin", username="editor"
+        )
+        
+        assert [h["status"] for h in result["status_history"]] == ["waiting_emf", "ordered"]
+        assert result["status_history"][-1]["changed_by"] == "editor"
+
+    @pytest.mark.asyncio
+    async def test_get_stats_invalidated_on_change(self, procurement_service, mock_admin_user):
+        """Test stats are cached and recomputed after an order changes."""
+        from datetime import datetime
+        before = await procurement_service.get_stats()
+        assert await procurement_service.get_stats() is before
+        
+        created = await procurement_service.create_order(
+            ProcurementOrderCreate(
+                catalog_number="STATS", manufacturer="Stats Vendor", description="D",
+                quantity=1, order_date=datetime(2025, 3, 10), amount=250.0
+            ),
+            mock_admin_user["username"]
+        )
+        await procurement_service.update_order(
+            created["id"], ProcurementOrderUpdate(status="received"), user_role="admin"
+        )
+        after = await procurement_service.get_stats()
+        
+        assert after["total_orders"] == before["total_orders"] + 1
+        assert after["total_amount"] == pytest.approx(before["total_amount"] + 250.0)
+        assert {"key": "Stats Vendor", "count": 1, "amount": 250.0} in after["by_manufacturer"]
+        assert any(bucket["key"] == "2025-03" for bucket in after["by_month"])
+        assert after["lead_time"]["orders"] == before["lead_time"]["orders"] + 1
+
     @pytest.mark.asyncio
     async def test_update_order_as_user_fails(self, procurement_service):
         """Test updating order as regular user fails."""
@@ -149,3 +200,102 @@ class TestProcurementService:
         order = await procurement_service.get_order_by_id(created["id"])
         assert len(order["files"]) == 1
         assert order["files"][0]["file_id"] == "file_123"
+
+    @pytest.mark.asyncio
+    async def test_upload_file_over_limit(self, procurement_service, mock_admin_user, monkeypatch):
+        """Test an upload crossing MAX_FILE_SIZE is rejected and not attached."""
+        from datetime import datetime
+        from fastapi import HTTPException
+        from app.services.s3_service import FileTooLargeError
+        created = await procurement_service.create_order(
+            ProcurementOrderCreate(
+                catalog_number="FILE-BIG", manufacturer="M", description="D",
+                quantity=1, order_date=datetime.utcnow(), amount=10.0
+            ),
+            mock_admin_user["username"]
+        )
+
+        mock_s3 = MagicMock()
+        mock_s3.upload_file = AsyncMock(side_effect=FileTooLargeError(10))
+        monkeypatch.setattr(procurement_service, "s3_service", mock_s3)
+
+        mock_file = MagicMock(spec=UploadFile)
+        mock_file.filename = "big.pdf"
+        mock_file.content_type = "application/pdf"
+        mock_file.size = None
+        mock_file.file = io.BytesIO(b"x" * 100)
+
+        with pytest.raises(HTTPException) as exc:
+            await procurement_service.upload_file(
+                created["id"], mock_file, uploaded_by="admin", user_role="admin"
+            )
+        assert exc.value.status_code == 400
+
+        order = await procurement_service.get_order_by_id(created["id"])
+        assert order["files"] == []
+
+    @pytest.mark.asyncio
+    async def test_bulk_update_orders(self, procurement_service, mock_admin_user):
+        """Test bulk update applies valid orders and reports the rest."""
+        from datetime import datetime
+        from app.schemas.procurement import ProcurementBulkUpdate
+        ids = []
+        for received_emf in (False, False, True):
+            created = await procurement_service.create_order(
+                ProcurementOrderCreate(
+                    catalog_number="BULK", manufacturer="M", description="D", quantity=1,
+                    order_date=datetime.utcnow(), amount=10.0, status="waiting_bom", received_emf=received_emf
+                ),
+                mock_admin_user["username"]
+            )
+            ids.append(created["id"])
+        
+        result = await procurement_service.bulk_update_orders(
+            ProcurementBulkUpdate(ids=ids + ["000000000000000000000000"], status="waiting_emf"),
+            user_role="admin", username="bulk-editor"
+        )
+        
+        assert result["modified_count"] == 2
+        assert {error["key"] for error in result["errors"]} == {ids[2], "000000000000000000000000"}
+        updated = await procurement_service.get_order_by_id(ids[0])
+        assert updated["status"] == "waiting_emf"
+        assert updated["status_history"][-1]["changed_by"] == "bulk-editor"
+        untouched = await procurement_service.get_order_by_id(ids[2])
+        assert untouched["status"] == "waiting_bom"
+
+    @pytest.mark.asyncio
+    async def test_import_orders_csv(self, procurement_service, mock_admin_user):
+        """Test CSV import creates valid rows and reports invalid ones by line."""
+        csv_content = (
+            "catalog_number,manufacturer,quantity,order_date,amount,status\n"
+            "IMP-1,Cisco,5,2025-01-02,100.5,ordered\n"
+            "IMP-2,Dell,not-a-number,2025-01-03,7,\n"
+        ).encode()
+        upload = MagicMock(spec=UploadFile)
+        upload.filename = "orders.csv"
+        upload.read = AsyncMock(return_value=csv_content)
+        
+        result = await procurement_service.import_orders(upload, user_role="admin", created_by="importer")
+        
+        assert len(result["created_ids"]) == 1
+        assert result["errors"][0]["key"] == "3"
+        order = await procurement_service.get_order_by_id(result["created_ids"][0])
+        assert order["received_emf"] is True and order["received_bom"] is True
+
+    @pytest.mark.asyncio
+    async def test_import_orders_parses_off_event_loop(self, procurement_service, monkeypatch):
+        """Test the file is parsed in a worker thread, not on the event loop."""
+        threads = []
+
+        def parse(contents, filename):
+            threads.append(threading.get_ident())
+            return []
+
+        monkeypatch.setattr(ExcelParser, "parse_procurement_orders", parse)
+        upload = MagicMock(spec=UploadFile)
+        upload.filename = "orders.csv"
+        upload.read = AsyncMock(return_value=b"")
+
+        with pytest.raises(ExcelFileException):
+            await procurement_service.import_orders(upload, user_role="admin", created_by="importer")
+        assert threads and threads[0] != threading.get_ident()
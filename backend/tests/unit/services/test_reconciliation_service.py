@@ -0,0 +1,141 @@
+"""
+Tests for ReconciliationService.
+Tests the materialized inventory / procurement reconciliation report.
+"""
+import pytest
+import pytest_asyncio
+from datetime import datetime, timedelta
+
+from app.core.events import ChangeEvent, ChangeOperation
+from app.db.mongodb import MongoDB
+from app.services.reconciliation_service import ReconciliationService
+
+
+def make_order(catalog_number: str, quantity: int, status: str) -> dict:
+    now = datetime.utcnow()
+    return {
+        "catalog_number": catalog_number, "manufacturer": "M", "description": "D",
+        "quantity": quantity, "order_date": now, "amount": 10.0, "status": status,
+        "files": [], "created_at": now, "updated_at": now
+    }
+
+
+def make_item(catalog_number: str, location: str, stock: str, allocations: dict) -> dict:
+    now = datetime.utcnow()
+    return {
+        "catalog_number": catalog_number, "location": location, "current_stock": stock,
+        "project_allocations": allocations, "created_at": now, "updated_at": now
+    }
+
+
+class TestReconciliationService:
+    """Test suite for ReconciliationService."""
+
+    @pytest_asyncio.fixture
+    async def service(self, mock_mongodb):
+        service = ReconciliationService(interval=0)
+        yield service
+        for name in ("procurement_orders", "inventory", "procurement-reconciliation", "procurement-reconciliation-state"):
+            await MongoDB.get_collection(name).delete_many({})
+
+    @pytest.mark.asyncio
+    async def test_full_run(self, service):
+        """Test ordered, received, on-hand and reserved quantities per catalog number."""
+        await MongoDB.get_collection("procurement_orders").insert_many([
+            make_order("REC-1", 5, "ordered"),
+            make_order("REC-1", 10, "received"),
+            make_order("REC-2", 3, "received"),
+        ])
+        # Allocations are repeated on every item of the same location
+        await MongoDB.get_collection("inventory").insert_many([
+            make_item("REC-1", "A", "4", {"p1": 2}),
+            make_item("REC-1", "A", "3", {"p1": 2}),
+            make_item("REC-1", "B", "1", {}),
+            make_item("REC-2", "A", "not a number", {}),
+        ])
+
+        result = await service.run()
+        assert result["full"] is True
+        assert result["rows"] == 2
+
+        report = await service.get_report()
+        rows = {row["catalog_number"]: row for row in report["rows"]}
+        assert rows["REC-1"]["ordered_qty"] == 5
+        assert rows["REC-1"]["on_hand_qty"] == 8
+        assert rows["REC-1"]["reserved_qty"] == 2
+        assert rows["REC-1"]["missing_qty"] == 2
+        assert rows["REC-2"]["state"] == "missing"
+        assert report["last_run_full"] is True
+
+    @pytest.mark.asyncio
+    async def test_incremental_run_recomputes_changed_only(self, service):
+        """Test an incremental run picks up catalog numbers written since the watermark."""
+        orders = MongoDB.get_collection("procurement_orders")
+        await orders.insert_one(make_order("REC-3", 2, "ordered"))
+        await service.run()
+
+        await service.repository.state_collection.update_one(
+            {"_id": service.repository.STATE_ID},
+            {"$set": {"watermark": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        await orders.insert_one(make_order("REC-4", 7, "ordered"))
+
+        result = await service.run()
+        assert result["full"] is False
+        assert result["catalog_numbers"] == 1
+        assert result["rows"] == 2
+
+    @pytest.mark.asyncio
+    async def test_delete_event_forces_full_rebuild(self, service):
+        """Test deleted orders disappear from the report after a delete event."""
+        orders = MongoDB.get_collection("procurement_orders")
+        inserted = await orders.insert_one(make_order("REC-5", 1, "ordered"))
+        await service.run()
+
+        await orders.delete_one({"_id": inserted.inserted_id})
+        service.on_change_event(ChangeEvent(
+            collection="procurement_orders", operation=ChangeOperation.DELETE, document_id=str(inserted.inserted_id)
+        ))
+
+        result = await service.run()
+        assert result["full"] is True
+        assert (await service.get_report())["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_mixed_case_catalog_numbers(self, service):
+        """Test spellings of one catalog number share a row, and its stale row is removed by any spelling."""
+        orders = MongoDB.get_collection("procurement_orders")
+        await orders.insert_many([make_order("ABC-1", 5, "ordered"), make_order("abc-1", 3, "ordered")])
+        await MongoDB.get_collection("inventory").insert_one(make_item("Abc-1", "A", "2", {}))
+
+        await service.run()
+
+        report = await service.get_report()
+        assert report["total"] == 1
+        assert report["rows"][0]["ordered_qty"] == 8
+        assert report["rows"][0]["on_hand_qty"] == 2
+        options = await service.repository.results_collection.options()
+        assert options["collation"]["strength"] == 2
+
+        # Orders gone; only an item written with another spelling marks the catalog number as changed
+        await orders.delete_many({})
+        await service.repository.state_collection.update_one(
+            {"_id": service.repository.STATE_ID},
+            {"$set": {"watermark": datetime.utcnow() - timedelta(seconds=1)}}
+        )
+        await MongoDB.get_collection("inventory").insert_one(make_item("aBC-1", "B", "1", {}))
+
+        result = await service.run()
+        assert result["full"] is False
+        assert (await service.get_report())["total"] == 0
+
+    @pytest.mark.asyncio
+    async def test_lease_held_by_another_replica(self, service):
+        """Test a run is skipped while another process holds the lease."""
+        await service.repository.state_collection.insert_one({
+            "_id": service.repository.STATE_ID,
+            "owner": "other-host:1",
+            "locked_until": datetime.utcnow() + timedelta(minutes=5)
+        })
+
+        assert await service.run() == {"skipped": True}
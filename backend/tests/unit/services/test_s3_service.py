@@ -0,0 +1,213 @@
+"""
+Tests for S3Service: S3 against an in-process stand-in (moto), and local storage.
+"""
+import io
+import pytest
+
+from app.config import settings
+from app.core.exceptions import RangeNotSatisfiableException
+from app.services import s3_service as s3_module
+from app.services.s3_service import S3Service, FileTooLargeError
+import hashlib
+
+BUCKET = "test-procurement"
+
+
+@pytest.fixture
+def s3_service(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "USE_S3", True)
+    monkeypatch.setattr(settings, "S3_BUCKET_NAME", BUCKET)
+    monkeypatch.setattr(settings, "S3_ACCESS_KEY", "testing")
+    monkeypatch.setattr(settings, "S3_SECRET_KEY", "testing")
+    monkeypatch.setattr(settings, "S3_ENDPOINT_URL", "")
+    # Force multipart for anything above 5MB (the S3 minimum part size)
+    monkeypatch.setattr(settings, "S3_MULTIPART_THRESHOLD_MB", 5)
+    monkeypatch.setattr(settings, "S3_MULTIPART_CHUNK_MB", 5)
+    monkeypatch.setattr(settings, "STORAGE_STREAM_CHUNK_SIZE", 64 * 1024)
+    monkeypatch.chdir(tmp_path)
+
+    moto = pytest.importorskip("moto")
+    with moto.mock_aws():
+        service = S3Service()
+        service.s3_client.create_bucket(Bucket=BUCKET)
+        yield service
+
+
+async def _read_all(download) -> bytes:
+    return b"".join([chunk async for chunk in download.chunks])
+
+
+class TestS3Service:
+    """Test suite for the S3 storage backend."""
+
+    @pytest.mark.asyncio
+    async def test_upload_and_stream_download(self, s3_service):
+        content = b"procurement file content" * 1000
+        result = await s3_service.upload_file(io.BytesIO(content), "order.pdf", "application/pdf")
+        assert result["s3_key"].endswith("/order.pdf")
+
+        download = await s3_service.download_file(s3_key=result["s3_key"])
+
+        assert download.content_length == len(content)
+        assert download.supports_ranges
+        assert await _read_all(download) == content
+
+    @pytest.mark.asyncio
+    async def test_upload_reports_size_and_sha256(self, s3_service):
+        content = b"hash me" * 5000
+        result = await s3_service.upload_file(io.BytesIO(content), "h.bin", "application/octet-stream")
+
+        assert result["file_size"] == len(content)
+        assert result["sha256"] == hashlib.sha256(content).hexdigest()
+
+    @pytest.mark.asyncio
+    async def test_upload_over_limit_is_aborted(self, s3_service):
+        content = b"y" * (6 * 1024 * 1024)
+        with pytest.raises(FileTooLargeError):
+            await s3_service.upload_file(
+                io.BytesIO(content), "big.bin", "application/octet-stream", max_size=5 * 1024 * 1024 + 1
+            )
+
+        listing = s3_service.s3_client.list_objects_v2(Bucket=BUCKET)
+        assert listing.get("KeyCount", 0) == 0
+        uploads = s3_service.s3_client.list_multipart_uploads(Bucket=BUCKET)
+        assert not uploads.get("Uploads")
+
+    @pytest.mark.asyncio
+    async def test_multipart_upload(self, s3_service):
+        content = b"x" * (11 * 1024 * 1024)
+        result = await s3_service.upload_file(io.BytesIO(content), "big.bin", "application/octet-stream")
+
+        head = s3_service.s3_client.head_object(Bucket=BUCKET, Key=result["s3_key"])
+        # Multipart ETags carry the part count
+        assert head["ETag"].strip('"').endswith("-3")
+        assert head["ContentLength"] == len(content)
+
+    @pytest.mark.asyncio
+    async def test_ranged_download(self, s3_service):
+        content = bytes(range(256)) * 4
+        result = await s3_service.upload_file(io.BytesIO(content), "range.bin", "application/octet-stream")
+
+        download = await s3_service.download_file(s3_key=result["s3_key"], byte_range="bytes=100-199")
+
+        assert download.content_length == 100
+        assert download.content_range == f"bytes 100-199/{len(content)}"
+        assert await _read_all(download) == content[100:200]
+
+    @pytest.mark.asyncio
+    async def test_conditional_download_not_modified(self, s3_service):
+        result = await s3_service.upload_file(io.BytesIO(b"cached"), "cached.txt", "text/plain")
+        etag = (await s3_service.download_file(s3_key=result["s3_key"])).etag
+
+        download = await s3_service.download_file(s3_key=result["s3_key"], if_none_match=etag)
+
+        assert download.not_modified
+        assert download.chunks is None
+        assert download.etag == etag
+
+    @pytest.mark.asyncio
+    async def test_conditional_download_modified(self, s3_service):
+        result = await s3_service.upload_file(io.BytesIO(b"fresh"), "fresh.txt", "text/plain")
+
+        download = await s3_service.download_file(s3_key=result["s3_key"], if_none_match='"stale"')
+
+        assert not download.not_modified
+        assert await _read_all(download) == b"fresh"
+
+    @pytest.mark.asyncio
+    async def test_invalid_range(self, s3_service):
+        result = await s3_service.upload_file(io.BytesIO(b"short"), "short.txt", "text/plain")
+        with pytest.raises(RangeNotSatisfiableException):
+            await s3_service.download_file(s3_key=result["s3_key"], byte_range="bytes=100-200")
+
+    @pytest.mark.asyncio
+    async def test_missing_object_and_delete(self, s3_service):
+        assert await s3_service.download_file(s3_key="procurement/missing/file.pdf") is None
+
+        result = await s3_service.upload_file(io.BytesIO(b"data"), "gone.txt", "text/plain")
+        assert await s3_service.delete_file(s3_key=result["s3_key"])
+        assert await s3_service.download_file(s3_key=result["s3_key"]) is None
+
+
+    @pytest.mark.asyncio
+    async def test_delete_files_in_batches(self, s3_service, monkeypatch):
+        monkeypatch.setattr(s3_module, "S3_DELETE_BATCH_SIZE", 2)
+        calls = []
+        delete_objects = s3_service.s3_client.delete_objects
+
+        def counting_delete_objects(**kwargs):
+            calls.append(len(kwargs["Delete"]["Objects"]))
+            return delete_objects(**kwargs)
+
+        monkeypatch.setattr(s3_service.s3_client, "delete_objects", counting_delete_objects)
+        locations = [
+            await s3_service.upload_file(io.BytesIO(b"%d" % i), f"f{i}.txt", "text/plain")
+            for i in range(5)
+        ]
+
+        failed = await s3_service.delete_files(locations)
+
+        assert failed == []
+        assert sorted(calls) == [1, 2, 2]
+        assert s3_service.s3_client.list_objects_v2(Bucket=BUCKET).get("KeyCount", 0) == 0
+
+
+class TestLocalStorage:
+    """Test suite for the local storage fallback."""
+
+    @pytest.fixture
+    def local_service(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "USE_S3", False)
+        monkeypatch.chdir(tmp_path)
+        return S3Service()
+
+    @pytest.mark.asyncio
+    async def test_download_describes_file_without_reading_it(self, local_service):
+        content = b"local content"
+        result = await local_service.upload_file(io.BytesIO(content), "local.txt", "text/plain")
+
+        download = await local_service.download_file(local_path=result["local_path"])
+
+        assert download.chunks is None
+        assert download.path == result["local_path"]
+        assert download.content_length == len(content)
+        assert download.etag == s3_module.local_etag(download.stat_result)
+        assert download.last_modified is not None
+
+    @pytest.mark.asyncio
+    async def test_missing_local_file(self, local_service):
+        assert await local_service.download_file(local_path="uploads/procurement/nope/x.txt") is None
+
+    @pytest.mark.asyncio
+    async def test_upload_streams_with_hash(self, local_service, monkeypatch):
+        monkeypatch.setattr(settings, "STORAGE_STREAM_CHUNK_SIZE", 1024)
+        content = b"z" * 10_000
+        result = await local_service.upload_file(io.BytesIO(content), "z.bin", "application/octet-stream")
+
+        assert result["file_size"] == len(content)
+        assert result["sha256"] == hashlib.sha256(content).hexdigest()
+        with open(result["local_path"], "rb") as f:
+            assert f.read() == content
+
+    @pytest.mark.asyncio
+    async def test_upload_over_limit_leaves_nothing(self, local_service, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "STORAGE_STREAM_CHUNK_SIZE", 1024)
+        source = io.BytesIO(b"z" * 10_000)
+
+        with pytest.raises(FileTooLargeError):
+            await local_service.upload_file(source, "z.bin", "application/octet-stream", max_size=4096)
+
+        # Stopped right after crossing the limit, not after reading everything
+        assert source.tell() <= 4096 + 1024
+        assert list((tmp_path / "uploads" / "procurement").iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_delete_files(self, local_service):
+        locations = [
+            await local_service.upload_file(io.BytesIO(b"%d" % i), f"f{i}.txt", "text/plain")
+            for i in range(3)
+        ]
+        locations.append({"s3_key": None, "local_path": "uploads/procurement/already/gone.txt"})
+
+        assert await local_service.delete_files(locations) == []
+        assert list(local_service.local_storage_path.iterdir()) == []
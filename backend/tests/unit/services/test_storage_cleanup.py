@@ -0,0 +1,76 @@
+"""
+Tests for StorageCleanupQueue.
+Tests deferred deletion and retries with a fake storage backend.
+"""
+import asyncio
+import pytest
+
+from app.services.storage_cleanup import StorageCleanupQueue
+
+
+class FakeStorage:
+    """delete_files stand-in that fails the given locations a number of times."""
+
+    def __init__(self, failures: int = 0):
+        self.failures = failures
+        self.deleted = []
+
+    async def delete_files(self, locations):
+        if self.failures:
+            self.failures -= 1
+            return list(locations)
+        self.deleted.extend(locations)
+        return []
+
+
+LOCATION = {"s3_key": "procurement/a/b.pdf", "local_path": None}
+
+
+class TestStorageCleanupQueue:
+    """Test suite for StorageCleanupQueue."""
+
+    @pytest.mark.asyncio
+    async def test_worker_deletes_enqueued_files(self):
+        storage = FakeStorage()
+        queue = StorageCleanupQueue(storage, retry_interval=60, max_attempts=3)
+        queue.start()
+
+        queue.enqueue([LOCATION])
+        await asyncio.sleep(0.01)
+
+        assert storage.deleted == [LOCATION]
+        assert len(queue) == 0
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_failures_are_retried(self):
+        storage = FakeStorage(failures=1)
+        queue = StorageCleanupQueue(storage, retry_interval=0.01, max_attempts=3)
+        queue.start()
+
+        queue.enqueue([LOCATION])
+        await asyncio.sleep(0.1)
+
+        assert storage.deleted == [LOCATION]
+        await queue.stop()
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(self):
+        storage = FakeStorage(failures=10)
+        queue = StorageCleanupQueue(storage, retry_interval=60, max_attempts=2)
+        queue._pending.append(LOCATION)
+
+        assert await queue.drain() == 0
+        assert len(queue) == 1
+        assert await queue.drain() == 0
+        assert len(queue) == 0
+
+    @pytest.mark.asyncio
+    async def test_without_worker_deletes_in_background(self):
+        storage = FakeStorage()
+        queue = StorageCleanupQueue(storage)
+
+        queue.enqueue([LOCATION])
+        await queue.stop()
+
+        assert storage.deleted == [LOCATION]
@@ -0,0 +1,54 @@
+import React from 'react';
+import PropTypes from 'prop-types';
+import { FiShield } from 'react-icons/fi';
+
+const WarrantyExpiryCard = ({ data }) => {
+    const counts = [
+        { key: 'expired', label: 'אחריות פגה', color: 'red' },
+        { key: 'expiring_30_days', label: 'מסתיימת ב-30 הימים הקרובים', color: 'amber' },
+        { key: 'expiring_90_days', label: 'מסתיימת ב-90 הימים הקרובים', color: 'green' }
+    ];
+    const upcoming = data?.upcoming || [];
+
+    return (
+        <div className="activity-card" style={{ height: '100%', display: 'flex', gap: '2rem', flexWrap: 'wrap' }}>
+            <div className="activity-stats-display" style={{ flex: 1, minWidth: 260 }}>
+                {counts.map(({ key, label, color }) => (
+                    <div className="activity-item" key={key}>
+                        <div className={`activity-icon ${color}`}>
+                            <FiShield />
+                        </div>
+                        <div className="activity-details">
+                            <span className="activity-count">{data?.[key] || 0}</span>
+                            <span className="activity-label">{label}</span>
+                        </div>
+                    </div>
+                ))}
+            </div>
+
+            <div className="activity-stats-display" style={{ flex: 1, minWidth: 260 }}>
+                {upcoming.length === 0 && <span className="activity-label">אין אחריות שמסתיימת בקרוב</span>}
+                {upcoming.map((item) => (
+                    <div className="activity-item" key={item._id}>
+                        <div className="activity-details">
+                            <span className="activity-label">{item.catalog_number} {item.serial && `· ${item.serial}`}</span>
+                            <span className="activity-label">{item.location}</span>
+                        </div>
+                        <span className="activity-label">{item.warranty_expiry}</span>
+                    </div>
+                ))}
+            </div>
+        </div>
+    );
+};
+
+WarrantyExpiryCard.propTypes = {
+    data: PropTypes.shape({
+        expired: PropTypes.number,
+        expiring_30_days: PropTypes.number,
+        expiring_90_days: PropTypes.number,
+        upcoming: PropTypes.arrayOf(PropTypes.object)
+    })
+};
+
+export default WarrantyExpiryCard;
@@ -1,5 +1,5 @@
 import React, { useEffect, useState } from 'react';
-import { FiBox, FiPackage, FiHash, FiMapPin } from 'react-icons/fi';
+import { FiBox, FiPackage, FiHash, FiMapPin, FiShield } from 'react-icons/fi';
 import analyticsService from '../../api/services/analyticsService';
 import Spinner from '../../components/common/Spinner/Spinner';
 
@@ -12,6 +12,7 @@ import ItemSearchChart from '../../components/dashboard/charts/ItemSearchChart';
 import ActivityStatsCard from '../../components/dashboard/charts/ActivityStatsCard';
 import ManufacturerChart from '../../components/dashboard/charts/ManufacturerChart';
 import LocationChart from '../../components/dashboard/charts/LocationChart';
+import WarrantyExpiryCard from '../../components/dashboard/charts/WarrantyExpiryCard';
 
 import './DashboardPage.css';
 
@@ -116,6 +117,13 @@ const DashboardPage = () => {
                     </div>
                 </ChartCard>
             </div>
+
+            {/* Fourth Row - Warranty Expiry */}
+            <div className="charts-grid fourth-row">
+                <ChartCard title="תוקף אחריות" icon={FiShield}>
+                    <WarrantyExpiryCard data={stats?.warranties} />
+                </ChartCard>
+            </div>
         </div>
     );
 };